@@ -1,22 +1,8 @@
-import os
-from dotenv import load_dotenv
 from app import create_app
-from flask_wtf.csrf import CSRFProtect
-
-# Load environment variables from .env file
-load_dotenv()
 
+# Development server; production runs wsgi:app under gunicorn (see gunicorn.conf.py).
+# create_app loads .env, checks FLASK_SECRET_KEY and installs CSRF protection.
 app = create_app()
 
-# Set the secret key from an environment variable
-app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY')
-print("Secret Key:", app.config['SECRET_KEY'])
-
-# Check if secret key is set
-if not app.config['SECRET_KEY']:
-    raise ValueError("No FLASK_SECRET_KEY set. Please set the FLASK_SECRET_KEY environment variable or add it to .env file.")
-
-csrf = CSRFProtect(app)
-
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
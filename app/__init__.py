@@ -1,38 +1,110 @@
 from flask import Flask
+import ipaddress
+import logging
 import os
 from dotenv import load_dotenv
 from .extensions import db, login_manager
+from .assets import init_assets
+from .compression import init_compression
+from .database import configure_engines, install_sqlite_pragmas, load_database_config
+from .events import init_events
+from .gantt_svg import init_gantt_svg
+from .identity import init_identity_cache, load_identity
+from .jobs import init_jobs
+from .logging_config import configure_logging
+from .metrics import init_metrics
+from .passwords import init_password_hashing
 from flask_migrate import Migrate
 from flask_wtf import CSRFProtect
 
 csrf = CSRFProtect()
+logger = logging.getLogger(__name__)
 
-def create_app():
+def create_app(test_config=None):
     load_dotenv()
     app = Flask(__name__)
     basedir = os.path.abspath(os.path.dirname(__file__))
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'site.db')
+    load_database_config(app, basedir)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['IMPORT_CHUNK_SIZE'] = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))  # Rows per bulk INSERT/commit
+    app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))  # Rows fetched per cursor batch
+    # Per-process cache of logged-in identities (see identity.py); a TTL of 0 disables it. Other processes
+    # are not told of changes, so the TTL is how long a worker may still accept a user after a password
+    # change or deletion, or route them to their old shard after a move.
+    app.config['IDENTITY_CACHE_TTL'] = float(os.getenv('IDENTITY_CACHE_TTL', '60'))
+    app.config['IDENTITY_CACHE_SIZE'] = int(os.getenv('IDENTITY_CACHE_SIZE', '1024'))
+    # Password hashing runs on a bounded pool (see passwords.py); when the workers and the
+    # queue are full, logins get 503 + Retry-After instead of stalling other routes
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    app.config['PASSWORD_HASH_QUEUE'] = int(os.getenv('PASSWORD_HASH_QUEUE', '8'))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+    app.config['PASSWORD_HASH_RETRY_AFTER'] = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', '1'))
+    # Live project updates (see events.py): redis://... shares events between worker processes
+    app.config['EVENTS_BACKEND_URL'] = os.getenv('EVENTS_BACKEND_URL')
+    app.config['EVENTS_MAX_QUEUE'] = int(os.getenv('EVENTS_MAX_QUEUE', '100'))  # Per client, before it must reload
+    app.config['EVENTS_KEEPALIVE'] = float(os.getenv('EVENTS_KEEPALIVE', '15'))
+    app.config['EVENTS_MAX_STREAM_SECONDS'] = float(os.getenv('EVENTS_MAX_STREAM_SECONDS', '300'))
+    # Open streams per process. Each one holds a request thread, so keep this below GUNICORN_THREADS;
+    # pages turned away fall back to polling the changes endpoint. 0 means no limit.
+    app.config['EVENTS_MAX_STREAMS'] = int(os.getenv('EVENTS_MAX_STREAMS', '2'))
+    app.config['EVENTS_RETRY_AFTER'] = int(os.getenv('EVENTS_RETRY_AFTER', '30'))
+    # Static files get content-hashed URLs cached as immutable, plus .gz siblings written at startup
+    # (see assets.py); turn fingerprinting off while editing static files without restarting
+    app.config['ASSETS_FINGERPRINT'] = os.getenv('ASSETS_FINGERPRINT', '1') == '1'
+    app.config['ASSETS_PRECOMPRESS'] = os.getenv('ASSETS_PRECOMPRESS', '1') == '1'
+    # Smallest static file or JSON response worth gzipping, and the level used for JSON
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', '6'))
+    # Projects with more tasks than this get the server-rendered SVG timeline instead of frappe-gantt
+    app.config['GANTT_CLIENT_MAX_TASKS'] = int(os.getenv('GANTT_CLIENT_MAX_TASKS', '2000'))
+    app.config['GANTT_SVG_CACHE_SIZE'] = int(os.getenv('GANTT_SVG_CACHE_SIZE', '32'))  # Rendered charts kept per process
+    # Background jobs (see jobs.py) run in `flask run-jobs`. Worker threads inside each web process are
+    # opt-in: every gunicorn worker would start its own set polling the queue.
+    app.config['JOBS_WORKERS'] = int(os.getenv('JOBS_WORKERS', '0'))
+    app.config['JOBS_POLL_INTERVAL'] = float(os.getenv('JOBS_POLL_INTERVAL', '2'))  # Seconds between idle polls
+    # A running job that has not reported progress for this long is assumed lost and requeued
+    app.config['JOBS_STALE_SECONDS'] = int(os.getenv('JOBS_STALE_SECONDS', '300'))
+    app.config['JOBS_SPOOL_DIR'] = os.getenv('JOBS_SPOOL_DIR', os.path.join(app.instance_path, 'jobs'))  # Uploads awaiting a job
+    app.config['PROJECT_DELETE_CHUNK'] = int(os.getenv('PROJECT_DELETE_CHUNK', '1000'))  # Tasks deleted per transaction
+    # Who may read /metrics (see metrics.py): addresses or networks, and/or a bearer token for scrapers
+    app.config['METRICS_ALLOW'] = [ipaddress.ip_network(network, strict=False)
+                                   for network in os.getenv('METRICS_ALLOW', '127.0.0.1 ::1').split()]
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
     app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY')
+    if test_config is not None:
+        app.config.update(test_config)
+    configure_engines(app)
     if not app.config['SECRET_KEY']:
         raise ValueError("No FLASK_SECRET_KEY set. Please set the FLASK_SECRET_KEY environment variable or add it to .env file.")
-    print("Database URI:", app.config['SQLALCHEMY_DATABASE_URI'])  # Debug
-    print("Current directory:", basedir)  # Debug
+    configure_logging(app)
+    logger.debug("Database URI: %s", app.config['SQLALCHEMY_DATABASE_URI'])
 
     csrf.init_app(app)
 
     db.init_app(app)
+    install_sqlite_pragmas(app, db)
+    init_metrics(app, db)
+    init_compression(app)
+    init_assets(app)
     login_manager.init_app(app)
     login_manager.login_view = 'main.login'
     login_manager.login_message_category = 'info'
     migrate = Migrate(app, db)
 
-    @login_manager.user_loader
-    def load_user(user_id):
-        from .models import User
-        return User.query.get(int(user_id))
+    login_manager.user_loader(load_identity)
+    init_identity_cache(app)
+    init_password_hashing(app)
+    init_events(app)
+    init_gantt_svg(app)
+    init_jobs(app)
 
+    from . import versioning  # noqa: F401 -- registers the project version listeners
+    from . import stats  # noqa: F401 -- registers the project_stats rollup listener
     from .routes import bp as main_bp
     app.register_blueprint(main_bp)
 
+    from .commands import register_commands
+    register_commands(app)
+
     return app
\ No newline at end of file
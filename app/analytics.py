@@ -0,0 +1,210 @@
+import itertools
+from collections import namedtuple
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import Integer, case, cast, func, select
+from .extensions import db
+from .intervals import EPOCH, day_number
+from .models import Project, Task, utcnow
+from .serializers import DATE_FORMAT, format_date
+from .task_query import TaskQueryError, parse_window
+
+# Core tables rather than the ORM entities, so rows skip ORM loading on the way into NumPy
+task_table = Task.__table__
+project_table = Project.__table__
+
+# Same statuses as the Gantt bar classes; anything else counts as 'To Do'
+STATUS_CODES = {'To Do': 0, 'In Progress': 1, 'Completed': 2, 'Blocked': 3}
+STATUSES = tuple(STATUS_CODES)
+# Longest day axis one request may cover, about ten years
+MAX_DAYS = 3660
+# Day number for a task never updated since it was inserted raw; its progress counts from before the axis
+UNKNOWN_DAY = -2 ** 31
+
+# One array per column of a user's dated tasks, dates as days since 1970-01-01.
+# Work is counted in task-days: a task from the 1st to the 3rd is 3 days of work.
+TaskArrays = namedtuple('TaskArrays', 'project start end progress status updated')
+
+
+class AnalyticsError(ValueError):
+    """Raised for analytics parameters that cannot be satisfied; served as 400."""
+
+
+def parse_analytics(args):
+    """Validate ``project_id`` (repeatable), ``from`` / ``to`` and ``as_of`` into a spec dict."""
+    try:
+        project_ids = [int(value) for value in args.getlist('project_id')]
+    except ValueError:
+        raise AnalyticsError('project_id must be an integer.') from None
+    try:
+        date_from, date_to = parse_window(args)
+    except TaskQueryError as e:
+        raise AnalyticsError(str(e)) from None
+    try:
+        as_of = datetime.strptime(args['as_of'], DATE_FORMAT).date() if args.get('as_of') else utcnow().date()
+    except ValueError:
+        raise AnalyticsError('as_of must be in YYYY-MM-DD format.') from None
+    if date_from and date_to and (date_to - date_from).days >= MAX_DAYS:
+        raise AnalyticsError(f'from and to can be at most {MAX_DAYS} days apart.')
+    return {'project_ids': project_ids, 'from': date_from, 'to': date_to, 'as_of': as_of}
+
+
+def _on_sqlite():
+    # The database task reads are routed to (read replica or shard), not necessarily the primary engine
+    return db.session.get_bind(clause=select(task_table.c.id)).dialect.name == 'sqlite'
+
+
+def _day_columns(on_sqlite):
+    """Start, end and last-update day numbers, computed by SQLite or converted here."""
+    columns = task_table.c
+    if on_sqlite:
+        def day(column):
+            return cast(func.julianday(column) - 2440587.5, Integer)
+        return day(columns.start_date), day(columns.end_date), func.coalesce(day(columns.updated_at), UNKNOWN_DAY)
+    return columns.start_date, columns.end_date, columns.updated_at
+
+
+def load_task_arrays(user_id, project_ids=None):
+    """Read the dated tasks of ``user_id``'s live projects into one array per column.
+
+    One query; SQLite does the date arithmetic and the values stream
+    straight into a NumPy buffer. Nothing downstream loops over tasks in
+    Python.
+    """
+    columns = task_table.c
+    on_sqlite = _on_sqlite()
+    start, end, updated = _day_columns(on_sqlite)
+    status = case(*((columns.status == name, code) for name, code in STATUS_CODES.items()), else_=0)
+    query = (select(columns.project_id, start, end, columns.progress, status, updated)
+             .join(project_table, project_table.c.id == columns.project_id)
+             .where(columns.user_id == user_id, project_table.c.deleted_at.is_(None),
+                    columns.start_date.isnot(None), columns.end_date.isnot(None)))
+    if project_ids:
+        query = query.where(columns.project_id.in_(project_ids))
+    rows = db.session.execute(query)
+    if not on_sqlite:
+        rows = ((project, day_number(start), day_number(end), progress, status,
+                 day_number(updated.date()) if updated else UNKNOWN_DAY)
+                for project, start, end, progress, status, updated in rows)
+    table = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.int64).reshape(-1, 6)
+    project, start, end, progress, status, updated = table.T
+    # Reversed dates are drawn as a bar between them, so they count the same way here
+    return TaskArrays(project, np.minimum(start, end), np.maximum(start, end),
+                      np.clip(progress, 0, 100), status, updated)
+
+
+def _as_date(day):
+    return EPOCH + timedelta(days=int(day))
+
+
+def _series(values):
+    return np.round(values, 1).tolist()
+
+
+def earned_value(tasks, as_of):
+    """Schedule-based earned value per task as of day ``as_of``; returns arrays of task-days.
+
+    Planned value assumes each task's work is spread evenly over its days.
+    There is no cost data, so the cost indices (AC, CPI) are not available.
+    """
+    duration = (tasks.end - tasks.start + 1).astype(np.float64)
+    planned = np.clip(as_of - tasks.start + 1, 0, duration)
+    earned = duration * tasks.progress / 100
+    late = (tasks.end < as_of) & (tasks.progress < 100)
+    return duration, planned, earned, late
+
+
+def _ev_summary(budget, planned, earned, late):
+    return {
+        'budget': round(float(budget), 1),
+        'planned_value': round(float(planned), 1),
+        'earned_value': round(float(earned), 1),
+        'schedule_variance': round(float(earned - planned), 1),
+        'schedule_performance_index': round(float(earned / planned), 3) if planned else None,
+        'percent_planned': round(float(100 * planned / budget), 1) if budget else 0.0,
+        'percent_complete': round(float(100 * earned / budget), 1) if budget else 0.0,
+        'late_tasks': int(late),
+    }
+
+
+def compute_analytics(tasks, spec):
+    """Burndown, earned value and daily load for the tasks in ``tasks`` (a TaskArrays).
+
+    The day curves come from one difference-array sweep: every task adds
+    +1 on its first day in the axis and -1 after its last. A cumulative
+    sum turns that into the number of tasks active each day, and a second
+    cumulative sum turns the daily load into planned work to date.
+    Completed work is the progress of each task credited to the day it was
+    last updated. Per-project totals are bincounts over the project index.
+    """
+    as_of = day_number(spec['as_of'])
+    duration, planned_now, earned_now, late = earned_value(tasks, as_of)
+    result = {
+        'as_of': format_date(spec['as_of']),
+        'task_count': int(len(tasks.start)),
+        'earned_value': _ev_summary(duration.sum(), planned_now.sum(), earned_now.sum(), np.count_nonzero(late)),
+    }
+
+    project_ids, project_index = np.unique(tasks.project, return_inverse=True)
+    per_project = [np.bincount(project_index, weights=values, minlength=len(project_ids))
+                   for values in (duration, planned_now, earned_now, late)]
+    names = dict(db.session.execute(select(Project.id, Project.name)
+                                    .where(Project.id.in_(project_ids.tolist()))).all()) if len(project_ids) else {}
+    result['projects'] = [
+        dict(_ev_summary(*(values[index] for values in per_project)), id=int(project_id), name=names.get(int(project_id)))
+        for index, project_id in enumerate(project_ids)
+    ]
+
+    if not len(tasks.start) and not (spec['from'] and spec['to']):
+        result.update({'from': None, 'to': None, 'days': 0, 'work': None, 'burndown': None, 'load': None})
+        return result
+    first = day_number(spec['from']) if spec['from'] else int(tasks.start.min())
+    last = day_number(spec['to']) if spec['to'] else max(int(tasks.end.max()), first)
+    # A lone 'to' before every task starts leaves the axis as that one day
+    first = min(first, last)
+    days = last - first + 1
+    if days > MAX_DAYS:
+        raise AnalyticsError(f'These tasks span {days} days; pass from and to at most {MAX_DAYS} days apart.')
+
+    visible = (tasks.start <= last) & (tasks.end >= first)
+    opens = np.clip(tasks.start[visible], first, last) - first
+    closes = np.clip(tasks.end[visible], first, last) - first + 1
+    # Each status gets its own row of the difference array, laid end to end for a single bincount
+    width = days + 1
+    offset = tasks.status[visible] * width
+    size = len(STATUSES) * width
+    deltas = np.bincount(offset + opens, minlength=size) - np.bincount(offset + closes, minlength=size)
+    load_by_status = np.cumsum(deltas.reshape(len(STATUSES), width), axis=1)[:, :days]
+    load = load_by_status.sum(axis=0)
+
+    budget = duration.sum()
+    # Work planned before the axis starts, then one task-day per active task per day
+    planned = np.clip(first - tasks.start, 0, duration).sum() + np.cumsum(load)
+    credited = tasks.updated - first
+    in_axis = (credited >= 0) & (credited < days)
+    completed = earned_now[credited < 0].sum() + np.cumsum(
+        np.bincount(credited[in_axis], weights=earned_now[in_axis], minlength=days))
+
+    peak = int(np.argmax(load))
+    concurrent, day_counts = np.unique(load, return_counts=True)
+    result.update({
+        'from': format_date(_as_date(first)),
+        'to': format_date(_as_date(last)),
+        'days': days,
+        # Every series below has one value per day, starting at 'from'
+        'work': {'planned': _series(planned), 'completed': _series(completed)},
+        'burndown': {'planned': _series(budget - planned), 'actual': _series(budget - completed)},
+        'load': {
+            'active': load.tolist(),
+            'by_status': {status: load_by_status[code].tolist() for status, code in STATUS_CODES.items()},
+            'peak': int(load[peak]),
+            'peak_date': format_date(_as_date(first + peak)),
+            # How many days had exactly this many tasks running
+            'histogram': {'active_tasks': concurrent.tolist(), 'days': day_counts.tolist()},
+        },
+    })
+    return result
+
+
+def portfolio_analytics(user_id, spec):
+    return compute_analytics(load_task_arrays(user_id, spec['project_ids']), spec)
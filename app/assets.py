@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+from flask import current_app, request, send_from_directory
+
+logger = logging.getLogger(__name__)
+
+# Text assets worth shipping gzipped; images and fonts are already compressed
+COMPRESSIBLE = ('.js', '.css', '.svg', '.json', '.map', '.txt', '.html')
+HASH_LENGTH = 12
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class AssetManifest:
+    """Content hashes and precompressed variants of the files in a static folder.
+
+    ``hashed`` maps ``css/style.css`` to ``css/style.<hash>.css`` and
+    ``sources`` maps it back. ``compressed`` holds the names that have an
+    up-to-date ``.gz`` sibling on disk.
+    """
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.hashed = {}
+        self.sources = {}
+        self.compressed = set()
+
+    def scan(self, precompress=True, min_size=1024):
+        """Hash every asset and, with ``precompress``, write any missing or stale ``.gz`` sibling."""
+        written = 0
+        for root, _, files in os.walk(self.static_folder):
+            for file_name in files:
+                if file_name.endswith('.gz'):
+                    continue
+                path = os.path.join(root, file_name)
+                name = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as stream:
+                    data = stream.read()
+                stem, ext = os.path.splitext(name)
+                hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+                self.hashed[name] = hashed
+                self.sources[hashed] = name
+                if ext in COMPRESSIBLE and len(data) >= min_size:
+                    if _is_fresh(path + '.gz', path):
+                        self.compressed.add(name)
+                    elif precompress and _write_gzip(path + '.gz', data):
+                        self.compressed.add(name)
+                        written += 1
+        return written
+
+
+def _is_fresh(gz_path, path):
+    try:
+        return os.stat(gz_path).st_mtime >= os.stat(path).st_mtime
+    except OSError:
+        return False
+
+
+def _write_gzip(gz_path, data):
+    # mtime=0 keeps the output byte-identical across builds; write-then-rename so
+    # a worker never serves a half-written file
+    tmp_path = f'{gz_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as stream:
+            stream.write(gzip.compress(data, compresslevel=9, mtime=0))
+        os.replace(tmp_path, gz_path)
+        return True
+    except OSError:
+        logger.warning("Cannot write %s; serving it uncompressed", gz_path)
+        return False
+
+
+def _fingerprint_static_url(endpoint, values):
+    # url_for('static', filename='js/tasks.js') -> /static/js/tasks.<hash>.js, templates unchanged
+    if endpoint == 'static' and 'filename' in values:
+        manifest = current_app.extensions['assets']
+        values['filename'] = manifest.hashed.get(values['filename'], values['filename'])
+
+
+def static_view(filename):
+    """Serve a static file, negotiating its ``.gz`` variant.
+
+    Fingerprinted names are cached for a year as immutable, since new
+    content gets a new name. Plain names keep Flask's default caching.
+    """
+    manifest = current_app.extensions['assets']
+    name = manifest.sources.get(filename, filename)
+    max_age = None if name != filename else current_app.get_send_file_max_age(name)
+    if name in manifest.compressed:
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if request.accept_encodings['gzip']:
+            response = send_from_directory(manifest.static_folder, name + '.gz', mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_from_directory(manifest.static_folder, name, max_age=max_age)
+        response.vary.add('Accept-Encoding')
+    else:
+        response = send_from_directory(manifest.static_folder, name, max_age=max_age)
+    if name != filename:
+        response.headers['Cache-Control'] = IMMUTABLE
+    return response
+
+
+def build_assets(app):
+    """Scan the static folder into ``app.extensions['assets']``; returns the number of .gz files written."""
+    manifest = AssetManifest(app.static_folder)
+    written = manifest.scan(precompress=app.config['ASSETS_PRECOMPRESS'],
+                            min_size=app.config['COMPRESS_MIN_SIZE'])
+    if not app.config['ASSETS_FINGERPRINT']:
+        manifest.hashed, manifest.sources = {}, {}
+    app.extensions['assets'] = manifest
+    return written
+
+
+def init_assets(app):
+    build_assets(app)
+    app.url_defaults(_fingerprint_static_url)
+    app.view_functions['static'] = static_view
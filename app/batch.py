@@ -0,0 +1,182 @@
+from sqlalchemy.orm import selectinload
+from .extensions import db
+from .graph import load_dependency_edges, topological_order
+from .models import Task
+from .scheduling import propagate_schedules
+from .serializers import format_date
+from .validation import validate_task_fields
+
+BATCH_OPS = ('create', 'update', 'delete')
+MAX_BATCH_OPERATIONS = 1000
+# JSON types accepted per field; dependencies are checked separately
+FIELD_TYPES = {
+    'name': (str,),
+    'start_date': (str, type(None)),
+    'end_date': (str, type(None)),
+    'progress': (int, str),
+    'status': (str,),
+    'comment': (str, type(None)),
+    'dependencies': (list,),
+}
+
+
+class BatchError(ValueError):
+    """Raised when the batch as a whole is malformed; served as 400."""
+
+
+def _dependency_keys(values):
+    """Dependencies are task ids or ``ref`` names of tasks created earlier in the same batch."""
+    if not isinstance(values, list):
+        return None
+    keys = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            return None
+        keys.append(value)
+    return keys
+
+
+def _check_shape(operations):
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('operations must be a non-empty list.')
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise BatchError(f'A batch holds at most {MAX_BATCH_OPERATIONS} operations.')
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPS:
+            raise BatchError(f"Operation {index}: op must be one of {', '.join(BATCH_OPS)}.")
+        fields = operation.get('fields', {})
+        if not isinstance(fields, dict):
+            raise BatchError(f'Operation {index}: fields must be an object.')
+        unknown = sorted(set(fields) - set(FIELD_TYPES))
+        if unknown:
+            raise BatchError(f"Operation {index}: unknown fields {', '.join(unknown)}.")
+        for field, value in fields.items():
+            if isinstance(value, bool) or not isinstance(value, FIELD_TYPES[field]):
+                raise BatchError(f'Operation {index}: {field} has the wrong type.')
+        if operation['op'] != 'create' and (isinstance(operation.get('id'), bool)
+                                            or not isinstance(operation.get('id'), int)):
+            raise BatchError(f'Operation {index}: id must be a task id.')
+
+
+def apply_batch(project, operations):
+    """Validate and apply a list of task creates/updates/deletes to ``project`` in one transaction.
+
+    The affected tasks are loaded with one query and every operation is
+    validated before anything is written. If any operation fails, nothing is
+    applied and the per-operation results say why. Otherwise all changes,
+    the dependency cycle check and the rescheduling of dependents share one
+    flush and the caller commits once. Returns ``(ok, results, moved_tasks)``.
+    Raises BatchError for a malformed batch and DependencyCycleError if the
+    new dependencies close a loop; the caller rolls back.
+    """
+    _check_shape(operations)
+    referenced, options = set(), set()
+    for operation in operations:
+        fields = operation.get('fields', {})
+        if operation['op'] != 'create':
+            referenced.add(operation['id'])
+        if operation['op'] == 'delete':
+            # Deleting clears the task's edges in both directions
+            options.update((Task.predecessors, Task.successors))
+        elif operation['op'] == 'update' and 'dependencies' in fields:
+            options.add(Task.predecessors)
+        keys = _dependency_keys(fields.get('dependencies', []))
+        referenced.update(key for key in keys or () if isinstance(key, int))
+    tasks = {}
+    if referenced:
+        # One query for the rows, plus one per edge collection the batch will rewrite
+        query = Task.query.filter(Task.project_id == project.id, Task.id.in_(referenced))
+        query = query.options(*(selectinload(relationship) for relationship in options))
+        tasks = {task.id: task for task in query.all()}
+
+    results, plans = [], []
+    created_refs, deleted_ids, touched_ids = {}, set(), set()
+    # Field values a task will have after the updates planned so far, so later ops build on earlier ones
+    pending = {}
+    for index, operation in enumerate(operations):
+        op, fields = operation['op'], operation.get('fields', {})
+        result = {'index': index, 'op': op, 'success': False, 'errors': []}
+        results.append(result)
+        task = None
+        if op == 'create':
+            result['ref'] = operation.get('ref')
+            if result['ref'] is not None and (not isinstance(result['ref'], str) or result['ref'] in created_refs):
+                result['errors'].append('ref must be a unique string.')
+            current = {'name': '', 'start_date': '', 'end_date': '', 'progress': 0, 'status': '', 'comment': None}
+        else:
+            result['id'] = operation['id']
+            task = tasks.get(operation['id'])
+            if task is None:
+                result['errors'].append('Task not found in this project.')
+                continue
+            if task.id in deleted_ids or (op == 'delete' and task.id in touched_ids):
+                result['errors'].append('A task can only be deleted as its last operation in a batch.')
+                continue
+            if op == 'delete':
+                deleted_ids.add(task.id)
+                plans.append((result, op, task, None, None))
+                continue
+            touched_ids.add(task.id)
+            current = pending.get(task.id) or {
+                'name': task.name, 'start_date': format_date(task.start_date),
+                'end_date': format_date(task.end_date), 'progress': task.progress,
+                'status': task.status, 'comment': task.comment}
+
+        merged = dict(current, **{key: value for key, value in fields.items() if key != 'dependencies'})
+        values, errors = validate_task_fields(merged['name'].strip(), merged['start_date'] or None,
+                                              merged['end_date'] or None, merged['progress'], merged['status'].strip())
+        result['errors'].extend(errors)
+        values['comment'] = merged['comment']
+        dependencies = None
+        if 'dependencies' in fields:
+            keys = _dependency_keys(fields['dependencies'])
+            if keys is None:
+                result['errors'].append('dependencies must be a list of task ids or refs.')
+            else:
+                dependencies = []
+                for key in keys:
+                    target = created_refs.get(key) if isinstance(key, str) else tasks.get(key)
+                    if target is None or (isinstance(key, int) and key in deleted_ids):
+                        result['errors'].append(f'Unknown dependency {key!r}.')
+                    else:
+                        dependencies.append(target)
+        if result['errors']:
+            continue
+        if op == 'create':
+            task = Task(project_id=project.id, user_id=project.user_id)
+            if result['ref'] is not None:
+                created_refs[result['ref']] = task
+        else:
+            pending[task.id] = merged
+        plans.append((result, op, task, values, dependencies))
+
+    if any(result['errors'] for result in results):
+        return False, results, []
+
+    roots, dependencies_changed = [], False
+    for result, op, task, values, dependencies in plans:
+        if op == 'delete':
+            db.session.delete(task)
+            result['success'] = True
+            continue
+        dates_changed = op == 'create' or (task.start_date, task.end_date) != (values['start_date'], values['end_date'])
+        for field, value in values.items():
+            setattr(task, field, value)
+        if dependencies is not None:
+            task.predecessors = dependencies
+            dependencies_changed = True
+        if op == 'create':
+            db.session.add(task)
+        if dates_changed:
+            roots.append(task)
+        result['success'] = True
+    db.session.flush()
+    if dependencies_changed:
+        edges = load_dependency_edges([project.id])
+        topological_order({node for edge in edges for node in edge}, edges)
+    roots = [task for task in roots if task.id not in deleted_ids]
+    moved = propagate_schedules(roots) if roots else []
+    for result, op, task, _, _ in plans:
+        if op == 'create':
+            result['id'] = task.id
+    return True, results, moved
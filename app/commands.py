@@ -0,0 +1,216 @@
+import json
+import os
+import socket
+import time
+from datetime import timedelta
+import click
+from alembic import command as alembic_command
+from alembic.runtime.migration import MigrationContext
+from flask import current_app
+from sqlalchemy import func, select
+from .extensions import db
+from .assets import build_assets
+from .exporter import EXPORT_FORMATS, iter_export
+from .importer import IMPORT_FORMATS, detect_format, import_tasks
+from .jobs import run_pending_jobs
+from .models import Project, Task, User, utcnow
+from .query_plans import check_query_plans
+from .search import rebuild_search_index
+from .sharding import (ShardError, all_shards, copy_user_to_shard, engine_for, parse_shard, plan_rebalance,
+                       purge_user, shard_label, shard_names, use_shard, use_user_shard, user_weights)
+from .stats import rebuild_project_stats
+from .sync import prune_tombstones
+
+
+@click.command('import-tasks')
+@click.argument('project_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), help='Defaults to the file extension.')
+@click.option('--chunk-size', type=int, default=None, help='Rows per INSERT/commit.')
+@click.option('--shard', default='primary', show_default=True, help='Database holding the project.')
+def import_tasks_command(project_id, path, fmt, chunk_size, shard):
+    """Bulk import tasks into PROJECT_ID from a CSV or NDJSON file."""
+    try:
+        use_shard(parse_shard(shard))
+    except ShardError as e:
+        raise click.ClickException(str(e))
+    project = db.session.get(Project, project_id)
+    if project is None:
+        raise click.ClickException(f'Project {project_id} does not exist.')
+    fmt = fmt or detect_format(filename=path)
+    if fmt is None:
+        raise click.ClickException('Cannot tell the file format; pass --format csv or --format ndjson.')
+    with open(path, 'rb') as stream:
+        report = import_tasks(project, stream, fmt, chunk_size or current_app.config['IMPORT_CHUNK_SIZE'])
+    click.echo(json.dumps(report, indent=2))
+
+
+@click.command('export-tasks')
+@click.argument('user_id', type=int)
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='ndjson')
+@click.option('--project-id', type=int, default=None, help='Only export this project.')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Defaults to stdout.')
+def export_tasks_command(user_id, fmt, project_id, output):
+    """Stream USER_ID's projects and tasks as NDJSON or CSV."""
+    if db.session.get(User, user_id) is None:
+        raise click.ClickException(f'User {user_id} does not exist.')
+    use_user_shard(user_id)
+    for chunk in iter_export(user_id, fmt, project_id=project_id,
+                             batch_size=current_app.config['EXPORT_BATCH_SIZE']):
+        output.write(chunk)
+
+
+@click.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if any hot route errors or its query plan falls back to a full table scan."""
+    failures = check_query_plans()
+    for label, statement, problems in failures:
+        click.echo(f'{label}: {"; ".join(problems)}\n    {" ".join(statement.split())}', err=True)
+    if failures:
+        raise click.ClickException(f'{len(failures)} routes failed or queries use a full table scan.')
+    click.echo('All route queries use an index.')
+
+
+@click.command('prune-tombstones')
+@click.option('--days', type=int, default=30, show_default=True, help='Keep tombstones younger than this.')
+def prune_tombstones_command(days):
+    """Delete old task tombstones; clients syncing from before them get a full reload."""
+    pruned = 0
+    for shard in all_shards():
+        use_shard(shard)
+        pruned += prune_tombstones(utcnow() - timedelta(days=days))
+    click.echo(f'Pruned {pruned} tombstones.')
+
+
+@click.command('rebuild-project-stats')
+def rebuild_project_stats_command():
+    """Recompute the project_stats rollup from the task table."""
+    count = 0
+    for shard in all_shards():
+        use_shard(shard)
+        count += rebuild_project_stats(db.session)
+        db.session.commit()
+    click.echo(f'Rebuilt stats for {count} projects.')
+
+
+@click.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Repopulate the full-text search tables from tasks and projects."""
+    count = 0
+    for shard in all_shards():
+        use_shard(shard)
+        count += rebuild_search_index(db.session)
+        db.session.commit()
+    click.echo(f'Indexed {count} tasks and projects.')
+
+
+@click.command('build-assets')
+def build_assets_command():
+    """Write .gz siblings of the static assets ahead of a deploy (startup does the same)."""
+    written = build_assets(current_app)
+    manifest = current_app.extensions['assets']
+    click.echo(f'Fingerprinted {len(manifest.hashed)} assets, wrote {written} gzip files.')
+
+
+@click.command('run-jobs')
+@click.option('--once', is_flag=True, help='Run the jobs that are due now, then exit.')
+def run_jobs_command(once):
+    """Work through the background job queue in this process (pair with JOBS_WORKERS=0 on the web)."""
+    worker_id = f'{socket.gethostname()}:{os.getpid()}:cli'
+    if once:
+        count = run_pending_jobs(worker_id)
+        click.echo(f'Ran {count} jobs.')
+        return
+    click.echo('Waiting for jobs; Ctrl+C to stop.')
+    current_app.extensions['job_workers'].run(worker_id)
+
+
+@click.group('shards')
+def shards_group():
+    """Inspect, migrate and rebalance the databases named in DATABASE_SHARDS."""
+
+
+@shards_group.command('status')
+def shards_status_command():
+    """Show each database's migration revision, user count and task count."""
+    users = dict(db.session.execute(select(User.shard, func.count()).group_by(User.shard)).all())
+    for shard in all_shards():
+        with engine_for(shard).connect() as connection:
+            revision = MigrationContext.configure(connection).get_current_revision()
+            tasks = connection.scalar(select(func.count()).select_from(Task.__table__))
+        click.echo(f'{shard_label(shard):20} revision={revision} users={users.get(shard, 0)} tasks={tasks}')
+
+
+@shards_group.command('upgrade')
+@click.argument('revision', default='head')
+def shards_upgrade_command(revision):
+    """Apply migrations up to REVISION on the primary database and on every shard."""
+    config = current_app.extensions['migrate'].migrate.get_config()
+    for shard in all_shards():
+        with engine_for(shard).begin() as connection:
+            config.attributes['connection'] = connection
+            alembic_command.upgrade(config, revision)
+        click.echo(f'{shard_label(shard)}: upgraded to {revision}.')
+
+
+def _purge_moved(moved, no_wait):
+    # Other processes route a user by their cached identity until it expires
+    if moved and not no_wait:
+        wait = current_app.config['IDENTITY_CACHE_TTL']
+        click.echo(f'Waiting {wait:g}s for other processes to route the moved users to their new shard...')
+        time.sleep(wait)
+    for user_id, source in moved:
+        purge_user(source, user_id)
+        click.echo(f'Removed user {user_id} from {shard_label(source)}.')
+
+
+@shards_group.command('move')
+@click.argument('user_id', type=int)
+@click.argument('shard')
+@click.option('--no-wait', is_flag=True, help='Remove the old copy at once; safe only while the web app is stopped.')
+def shards_move_command(user_id, shard, no_wait):
+    """Move USER_ID's projects and tasks to SHARD ('primary' for the primary database)."""
+    try:
+        source, counts = copy_user_to_shard(user_id, parse_shard(shard))
+    except ShardError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Copied user {user_id} from {shard_label(source)} to {shard}: {json.dumps(counts)}')
+    _purge_moved([(user_id, source)], no_wait)
+
+
+@shards_group.command('rebalance')
+@click.option('--dry-run', is_flag=True, help='Only print the planned moves.')
+@click.option('--no-wait', is_flag=True, help='Remove the old copies at once; safe only while the web app is stopped.')
+def shards_rebalance_command(dry_run, no_wait):
+    """Even out task counts over the shards, moving users off the primary database as well."""
+    shards = shard_names()
+    if not shards:
+        raise click.ClickException('No shards configured; set DATABASE_SHARDS.')
+    weights = {shard: user_weights(shard) for shard in all_shards()}
+    moves = plan_rebalance(weights, shards)
+    for user_id, source, target in moves:
+        click.echo(f'User {user_id}: {shard_label(source)} -> {target} ({weights[source][user_id]} tasks)')
+    if dry_run or not moves:
+        click.echo(f'{len(moves)} moves planned.')
+        return
+    moved = []
+    for user_id, source, target in moves:
+        try:
+            copy_user_to_shard(user_id, target)
+        except ShardError as e:
+            click.echo(f'Skipped user {user_id}: {e}', err=True)
+            continue
+        moved.append((user_id, source))
+    _purge_moved(moved, no_wait)
+
+
+def register_commands(app):
+    app.cli.add_command(import_tasks_command)
+    app.cli.add_command(export_tasks_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(prune_tombstones_command)
+    app.cli.add_command(rebuild_project_stats_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(build_assets_command)
+    app.cli.add_command(run_jobs_command)
+    app.cli.add_command(shards_group)
@@ -0,0 +1,32 @@
+import gzip
+from flask import current_app, request
+
+COMPRESSED_MIMETYPES = ('application/json',)
+
+
+def _compress_response(response):
+    """Gzip JSON bodies of at least ``COMPRESS_MIN_SIZE`` bytes for clients that accept it.
+
+    Streamed responses (exports, events) are left alone. A compressed body
+    keeps its ETag as a weak one, so the same validator still answers
+    If-None-Match for both encodings.
+    """
+    if (response.status_code != 200 or response.mimetype not in COMPRESSED_MIMETYPES
+            or response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+    if response.content_length is None or response.content_length < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+    response.set_data(gzip.compress(response.get_data(), compresslevel=current_app.config['COMPRESS_LEVEL']))
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    # Registered after init_metrics: after_request handlers run in reverse, so metrics see wire sizes
+    app.after_request(_compress_response)
@@ -0,0 +1,159 @@
+import os
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+READ_BIND = 'read'
+# Tables that stay in the primary database when users are spread over shards (see sharding.py)
+GLOBAL_TABLES = frozenset({'user', 'job'})
+
+
+def load_database_config(app, basedir):
+    """Read the database settings from the environment into ``app.config``."""
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+        'DATABASE_URL', 'sqlite:///' + os.path.join(basedir, 'site.db'))
+    # Optional separate URI for read-only routes; with DB_READ_ROUTING=1 and SQLite
+    # the same file is opened a second time in read-only mode instead.
+    app.config['DATABASE_READ_URL'] = os.getenv('DATABASE_READ_URL')
+    app.config['DB_READ_ROUTING'] = os.getenv('DB_READ_ROUTING', '0') == '1'
+    # Optional tenant shards as whitespace-separated name=URI pairs, e.g. "a=sqlite:///a.db b=sqlite:///b.db".
+    # Each user's projects and tasks live on one of them; users and jobs stay in the primary database.
+    app.config['DATABASE_SHARDS'] = dict(
+        entry.split('=', 1) for entry in os.getenv('DATABASE_SHARDS', '').split() if '=' in entry)
+    # Pool settings are only passed through when set, so SQLAlchemy keeps its per-dialect defaults
+    app.config['DB_POOL'] = {
+        option: int(os.environ[variable])
+        for option, variable in (('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW'),
+                                 ('pool_timeout', 'DB_POOL_TIMEOUT'), ('pool_recycle', 'DB_POOL_RECYCLE'))
+        if os.getenv(variable)
+    }
+    app.config['SQLITE_PRAGMAS'] = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),  # Negative means KiB, so 64 MiB
+    }
+
+
+def read_bind(shard=None):
+    """Bind key of the read-only engine for ``shard``; None is the primary database."""
+    return READ_BIND if shard is None else f'{shard}-{READ_BIND}'
+
+
+def configure_engines(app):
+    """Derive engine options, the shard binds and the optional read binds from the loaded config.
+
+    Runs after any test_config override and before ``db.init_app``.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    if app.config['DB_POOL']:
+        options.update(app.config['DB_POOL'], pool_pre_ping=True)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    read_uri = app.config.get('DATABASE_READ_URL')
+    if not read_uri and app.config.get('DB_READ_ROUTING'):
+        read_uri = _sqlite_read_only_uri(uri)
+    if read_uri:
+        binds[READ_BIND] = read_uri
+    for shard, shard_uri in app.config.get('DATABASE_SHARDS', {}).items():
+        binds[shard] = shard_uri
+        shard_read_uri = app.config.get('DB_READ_ROUTING') and _sqlite_read_only_uri(shard_uri)
+        if shard_read_uri:
+            binds[read_bind(shard)] = shard_read_uri
+    if binds:
+        app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def _sqlite_read_only_uri(uri):
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return None
+    return f'sqlite:///file:{os.path.abspath(url.database)}?mode=ro&uri=true'
+
+
+def install_sqlite_pragmas(app, db):
+    """Apply the configured pragmas to every new SQLite connection."""
+    pragmas = app.config['SQLITE_PRAGMAS']
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            read_only = key is not None and (key == READ_BIND or key.endswith('-' + READ_BIND))
+
+            @event.listens_for(engine, 'connect')
+            def set_pragmas(dbapi_connection, connection_record, read_only=read_only):
+                cursor = dbapi_connection.cursor()
+                # journal_mode is persistent in the file, so only the writer sets it
+                if not read_only:
+                    cursor.execute(f"PRAGMA journal_mode={pragmas['journal_mode']}")
+                cursor.execute(f"PRAGMA synchronous={pragmas['synchronous']}")
+                cursor.execute(f"PRAGMA busy_timeout={int(pragmas['busy_timeout'])}")
+                cursor.execute(f"PRAGMA mmap_size={int(pragmas['mmap_size'])}")
+                cursor.execute(f"PRAGMA cache_size={int(pragmas['cache_size'])}")
+                if read_only:
+                    cursor.execute('PRAGMA query_only=1')
+                cursor.close()
+
+
+def read_only(view):
+    """Route the SELECTs of a view that never writes to the read bind, if one is configured."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def active_shard():
+    """Shard the current request or job works on, or None for the primary database.
+
+    Jobs and commands set ``g.db_shard`` themselves; in a request it comes
+    from the logged-in user's cached identity.
+    """
+    if 'db_shard' in g:
+        return g.db_shard
+    if has_request_context():
+        from flask_login import current_user
+        if current_user.is_authenticated:
+            g.db_shard = current_user.shard
+            return g.db_shard
+    return None
+
+
+def _is_global(mapper, clause):
+    if mapper is not None:
+        return mapper.local_table.name in GLOBAL_TABLES
+    table = getattr(clause, 'table', None)  # INSERT, UPDATE and DELETE
+    if table is not None:
+        return getattr(table, 'name', None) in GLOBAL_TABLES
+    froms = clause.get_final_froms() if hasattr(clause, 'get_final_froms') else ()
+    return bool(froms) and all(getattr(table, 'name', None) in GLOBAL_TABLES for table in froms)
+
+
+class RoutingSession(Session):
+    """Session that sends tenant statements to the active shard, and SELECTs
+    from ``@read_only`` views to the matching read engine.
+
+    Statements on the global tables (users, jobs) always go to the primary
+    database. Anything else, raw SQL included, follows ``active_shard()``.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None or not has_app_context():
+            return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        engines = self._db.engines
+        # Global tables are settled first: loading the identity that names the shard queries one
+        shard = None
+        if current_app.config['DATABASE_SHARDS'] and not _is_global(mapper, clause):
+            shard = active_shard()
+        if (not self._flushing and g.get('db_read_only') and read_bind(shard) in engines
+                and getattr(clause, 'is_select', False)):
+            return engines[read_bind(shard)]
+        if shard is not None:
+            return engines[shard]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,205 @@
+import json
+import logging
+import queue
+import threading
+import time
+from flask import current_app
+from .extensions import db
+from .models import Project
+from .sharding import project_topic
+from .sync import changes_since
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'project-events:'
+
+
+class StreamLimitReached(Exception):
+    """Raised when this process already serves its maximum number of event streams."""
+
+
+class Subscription:
+    """One SSE client's mailbox. A client too slow to drain it is told to reload instead."""
+
+    def __init__(self, topic, max_queue):
+        self.topic = topic
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next message, or None after ``timeout`` seconds without one."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventHub:
+    """Fans project events out to the SSE subscribers of this process.
+
+    Subscribers are keyed by topic, the project id qualified by its shard
+    (see sharding.project_topic). ``backend`` carries published messages to every process's hub:
+    ``InProcessBackend`` delivers straight back to this one, ``RedisBackend``
+    goes through Redis pub/sub so all gunicorn workers see each event.
+
+    Every subscriber is an open stream occupying a request thread, so at
+    most ``max_streams`` (0 for no limit) are admitted at a time.
+    """
+
+    def __init__(self, backend, max_queue=100, max_streams=0):
+        self.max_queue = max_queue
+        self.max_streams = max_streams
+        self._subscribers = {}
+        self._streams = 0
+        self._lock = threading.Lock()
+        self._started = False
+        self.backend = backend
+
+    def _start(self):
+        # Deferred to first use so listener threads start in the worker, not a preloading master
+        with self._lock:
+            if not self._started:
+                self.backend.start(self.dispatch)
+                self._started = True
+
+    def subscribe(self, topic):
+        if not self._started:
+            self._start()
+        subscription = Subscription(topic, self.max_queue)
+        with self._lock:
+            if self.max_streams and self._streams >= self.max_streams:
+                raise StreamLimitReached()
+            self._subscribers.setdefault(topic, set()).add(subscription)
+            self._streams += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        # Called both when the stream ends and when the response closes; only the first counts
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._streams -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    def publish(self, topic, message):
+        if not self._started:
+            self._start()
+        self.backend.publish(topic, message)
+
+    def dispatch(self, topic, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+
+class InProcessBackend:
+    """Single-process transport; events reach only clients connected to this worker."""
+
+    def start(self, dispatch):
+        self._dispatch = dispatch
+
+    def publish(self, topic, message):
+        self._dispatch(topic, message)
+
+
+class RedisBackend:
+    """Redis pub/sub transport so every worker process receives every event.
+
+    Needs the ``redis`` package; one listener thread per process relays
+    messages into the local hub.
+    """
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url)
+
+    def start(self, dispatch):
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(CHANNEL_PREFIX + '*')
+
+        def listen():
+            while True:
+                try:
+                    for item in pubsub.listen():
+                        channel = item['channel']
+                        channel = channel.decode() if isinstance(channel, bytes) else channel
+                        data = item['data']
+                        dispatch(channel[len(CHANNEL_PREFIX):], data.decode() if isinstance(data, bytes) else data)
+                except Exception:
+                    logger.exception("Redis event listener failed; reconnecting")
+                    time.sleep(1)
+
+        threading.Thread(target=listen, name='project-events', daemon=True).start()
+
+    def publish(self, topic, message):
+        self._client.publish(f'{CHANNEL_PREFIX}{topic}', message)
+
+
+def format_event(event, data, event_id=None):
+    """Encode one server-sent event."""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def changes_event(changes):
+    return format_event('reset' if changes['reset'] else 'changes', json.dumps(changes), changes['token'])
+
+
+def publish_project_changes(project_id, since):
+    """Push what changed in ``project_id`` after version ``since`` to its live viewers.
+
+    Called by the write routes after they commit. The payload is the same
+    delta the changes endpoint returns, with the new sync token as event id.
+    Publishing never fails the request that triggered it.
+    """
+    try:
+        project = db.session.get(Project, project_id)
+        if project is None:
+            return
+        changes = changes_since(project, since)
+        if changes['tasks'] or changes['deleted'] or changes['reset']:
+            current_app.extensions['event_hub'].publish(project_topic(project_id), changes_event(changes))
+    except Exception:
+        logger.exception("Publishing changes for project %s failed", project_id)
+
+
+def stream_events(hub, subscription, first=None, keepalive=15.0, max_seconds=300.0):
+    """Yield SSE text for ``subscription`` until the client goes away or ``max_seconds`` pass.
+
+    Runs outside the request context and touches no database session, so an
+    open stream holds no connection. Streams are closed periodically so
+    threads are recycled; EventSource reconnects on its own and catches up
+    via Last-Event-ID.
+    """
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield 'retry: 3000\n\n'
+        if first:
+            yield first
+        while time.monotonic() < deadline:
+            message = subscription.get(timeout=keepalive)
+            if subscription.overflowed:
+                yield format_event('reset', json.dumps({'reset': True}))
+                return
+            yield message if message is not None else ': keepalive\n\n'
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def init_events(app):
+    url = app.config['EVENTS_BACKEND_URL']
+    backend = RedisBackend(url) if url else InProcessBackend()
+    app.extensions['event_hub'] = EventHub(backend, max_queue=app.config['EVENTS_MAX_QUEUE'],
+                                           max_streams=app.config['EVENTS_MAX_STREAMS'])
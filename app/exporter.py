@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from .extensions import db
+from .models import Project, Task, task_dependency
+from .serializers import format_date
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+# Columns of a task row; name/start_date/end_date/progress/status/dependencies/comment
+# match what the importer reads, so an export can be imported into another project.
+TASK_FIELDS = ['project_id', 'project_name', 'task_id', 'name', 'start_date', 'end_date',
+               'progress', 'status', 'dependencies', 'comment']
+
+
+def _join_names(column):
+    # Comma-joined names; PostgreSQL spells the aggregate string_agg. The dialect is that of the
+    # database the task rows are read from, which read routing or sharding may make other than the primary.
+    if db.session.get_bind(clause=select(Task.id)).dialect.name == 'postgresql':
+        return func.string_agg(column, ',')
+    return func.group_concat(column, ',')
+
+
+def _export_query(user_id, project_id=None, include_empty_projects=False):
+    predecessor = aliased(Task)
+    # Predecessor names per task, resolved in SQL so rows can be streamed one at a time
+    dependency_names = (
+        select(_join_names(predecessor.name))
+        .select_from(task_dependency)
+        .join(predecessor, predecessor.id == task_dependency.c.predecessor_id)
+        .where(task_dependency.c.successor_id == Task.id)
+        .correlate(Task)
+        .scalar_subquery()
+    )
+    query = (
+        select(Project.id, Project.name, Project.description,
+               Task.id, Task.name, Task.start_date, Task.end_date, Task.progress,
+               Task.status, dependency_names, Task.comment)
+        .select_from(Project)
+        .join(Task, Task.project_id == Project.id, isouter=include_empty_projects)
+        .where(Project.user_id == user_id, Project.deleted_at.is_(None))
+        .order_by(Project.id, Task.id)
+    )
+    if project_id is not None:
+        query = query.where(Project.id == project_id)
+    return query
+
+
+def _stream_rows(query, batch_size):
+    # yield_per + stream_results fetch with fetchmany() instead of buffering the whole result
+    result = db.session.execute(query, execution_options={'yield_per': batch_size, 'stream_results': True})
+    for partition in result.partitions():
+        yield partition
+
+
+def iter_export(user_id, fmt, project_id=None, batch_size=1000):
+    """Yield a user's projects and tasks as CSV or NDJSON text chunks.
+
+    Rows are read ``batch_size`` at a time and each batch is encoded and
+    yielded immediately, so memory use does not depend on portfolio size.
+    NDJSON emits a ``"type": "project"`` record before each project's
+    ``"type": "task"`` records (empty projects included); CSV emits one row
+    per task with the project columns repeated.
+    """
+    if fmt == 'csv':
+        yield from _iter_csv(user_id, project_id, batch_size)
+    elif fmt == 'ndjson':
+        yield from _iter_ndjson(user_id, project_id, batch_size)
+    else:
+        raise ValueError(f'Unsupported export format: {fmt}')
+
+
+def _iter_csv(user_id, project_id, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TASK_FIELDS)
+    for rows in _stream_rows(_export_query(user_id, project_id), batch_size):
+        for (pid, project_name, _, task_id, name, start_date, end_date,
+             progress, status, dependencies, comment) in rows:
+            writer.writerow([pid, project_name, task_id, name, format_date(start_date), format_date(end_date),
+                             progress, status, dependencies or '', comment or ''])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _iter_ndjson(user_id, project_id, batch_size):
+    current_project = None
+    query = _export_query(user_id, project_id, include_empty_projects=True)
+    for rows in _stream_rows(query, batch_size):
+        lines = []
+        for (pid, project_name, description, task_id, name, start_date, end_date,
+             progress, status, dependencies, comment) in rows:
+            if pid != current_project:
+                current_project = pid
+                lines.append(json.dumps({'type': 'project', 'id': pid, 'name': project_name,
+                                         'description': description}))
+            if task_id is None:
+                continue
+            lines.append(json.dumps({
+                'type': 'task',
+                'project_id': pid,
+                'task_id': task_id,
+                'name': name,
+                'start_date': format_date(start_date),
+                'end_date': format_date(end_date),
+                'progress': progress,
+                'status': status,
+                'dependencies': dependencies or '',
+                'comment': comment or '',
+            }))
+        if lines:
+            yield '\n'.join(lines) + '\n'
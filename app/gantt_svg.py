@@ -0,0 +1,144 @@
+import gzip
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from markupsafe import escape
+from .serializers import status_class
+
+# Pixels per day for each zoom level, matching frappe-gantt's view modes
+SCALES = {'day': 24, 'week': 6, 'month': 2}
+DEFAULT_SCALE = 'week'
+ROW_HEIGHT = 24
+BAR_HEIGHT = 16
+HEADER_HEIGHT = 40
+LABEL_GAP = 4
+MARGIN_DAYS = 2
+MONTH_LABEL_WIDTH = 60
+# Same palette as the bar classes in frappe-gantt.css, so both views read alike
+STYLE = """
+.grid-row { fill: #ffffff; } .grid-row-alt { fill: #f5f5f5; }
+.tick { stroke: #e0e0e0; stroke-width: 1; } .header { fill: #ffffff; stroke: #e0e0e0; }
+.month { font: 12px sans-serif; fill: #555; } .label { font: 11px sans-serif; fill: #555; }
+.bar { fill: #b8c2cc; } .arrow { fill: none; stroke: #666; stroke-width: 1.2; }
+.bar-blue .bar-progress { fill: #337ab7; } .bar-yellow .bar-progress { fill: #f0ad4e; }
+.bar-green .bar-progress { fill: #5cb85c; } .bar-red .bar-progress { fill: #d9534f; }
+"""
+
+
+class RenderCache:
+    """Bounded LRU of rendered charts, keyed by project version and view.
+
+    A new project version changes the key, so stale charts are never served;
+    they just age out. Values are ``(svg, gzipped svg)`` byte strings.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, svg):
+        value = (svg, gzip.compress(svg, compresslevel=6))
+        if self.max_entries <= 0:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+def _month_starts(first, last):
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def render_gantt_svg(tasks, edges, title='', date_from=None, date_to=None, scale=DEFAULT_SCALE):
+    """Draw dated ``tasks`` as an SVG timeline; returns UTF-8 bytes.
+
+    One row per task in start-date order, bars coloured by status class with
+    the progress filled in, month gridlines, and an elbow arrow for every
+    (predecessor_id, successor_id) edge whose ends are both drawn. The
+    time axis spans ``date_from``..``date_to`` when given, otherwise the
+    tasks themselves. The output is static markup, no scripts, so it can be
+    cached, printed or opened on its own.
+    """
+    day_width = SCALES[scale]
+    tasks = sorted((task for task in tasks if task.start_date and task.end_date),
+                   key=lambda task: (task.start_date, task.id))
+    if tasks:
+        first = date_from or min(task.start_date for task in tasks) - timedelta(days=MARGIN_DAYS)
+        last = date_to or max(task.end_date for task in tasks) + timedelta(days=MARGIN_DAYS)
+    else:
+        first = last = date_from or date_to
+    days = (last - first).days + 1 if first else 0
+    width = max(days * day_width, 200)
+    height = HEADER_HEIGHT + max(len(tasks), 1) * ROW_HEIGHT
+
+    def x(day):
+        return (day - first).days * day_width
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" class="gantt">',
+        f'<title>{escape(title)}</title>',
+        f'<style>{STYLE}</style>',
+        '<defs><marker id="arrowhead" viewBox="0 0 6 6" refX="5" refY="3" markerWidth="6" markerHeight="6" '
+        'orient="auto"><path d="M0,0 L6,3 L0,6 z" fill="#666"/></marker>'
+        # One striped fill for all rows instead of a rect per row
+        f'<pattern id="rows" width="{width}" height="{2 * ROW_HEIGHT}" patternUnits="userSpaceOnUse" '
+        f'y="{HEADER_HEIGHT}"><rect class="grid-row" width="{width}" height="{ROW_HEIGHT}"/>'
+        f'<rect class="grid-row-alt" y="{ROW_HEIGHT}" width="{width}" height="{ROW_HEIGHT}"/></pattern></defs>',
+        f'<rect class="header" x="0" y="0" width="{width}" height="{HEADER_HEIGHT}"/>',
+        f'<rect x="0" y="{HEADER_HEIGHT}" width="{width}" height="{height - HEADER_HEIGHT}" fill="url(#rows)"/>',
+    ]
+    months = list(_month_starts(first, last)) if first else []
+    for index, month in enumerate(months):
+        left = max(x(month), 0)
+        parts.append(f'<line class="tick" x1="{left}" y1="0" x2="{left}" y2="{height}"/>')
+        # A month cut off at the left edge is only labelled if the label fits before the next month
+        if month < first and index + 1 < len(months) and x(months[index + 1]) < MONTH_LABEL_WIDTH:
+            continue
+        parts.append(f'<text class="month" x="{left + 4}" y="{HEADER_HEIGHT - 14}">{month.strftime("%b %Y")}</text>')
+
+    # Bar geometry by task id, for the arrows; an end date counts as a whole day
+    bars = {}
+    parts.append('<g class="bars">')
+    for row, task in enumerate(tasks):
+        left = x(task.start_date)
+        right = x(task.end_date) + day_width
+        top = HEADER_HEIGHT + row * ROW_HEIGHT + (ROW_HEIGHT - BAR_HEIGHT) // 2
+        bars[task.id] = (left, right, top + BAR_HEIGHT // 2)
+        progress = (right - left) * min(max(task.progress or 0, 0), 100) / 100
+        name = escape(task.name)
+        parts.append(
+            f'<g class="bar-wrapper {status_class(task.status)}" data-id="{task.id}">'
+            f'<title>{name} ({task.progress or 0}%, {escape(task.status)})</title>'
+            f'<rect class="bar" x="{left}" y="{top}" width="{right - left}" height="{BAR_HEIGHT}" rx="3"/>'
+            f'<rect class="bar-progress" x="{left}" y="{top}" width="{progress:g}" height="{BAR_HEIGHT}" rx="3"/>'
+            f'<text class="label" x="{right + LABEL_GAP}" y="{top + BAR_HEIGHT - 4}">{name}</text></g>'
+        )
+    parts.append('</g><g class="arrows">')
+    for predecessor_id, successor_id in sorted(edges):
+        if predecessor_id in bars and successor_id in bars:
+            _, start_x, start_y = bars[predecessor_id]
+            end_x, _, end_y = bars[successor_id]
+            elbow = start_x + LABEL_GAP
+            parts.append(f'<path class="arrow" d="M{start_x},{start_y} H{elbow} V{end_y} H{end_x}" '
+                         'marker-end="url(#arrowhead)"/>')
+    parts.append('</g></svg>')
+    return ''.join(parts).encode()
+
+
+def init_gantt_svg(app):
+    app.extensions['gantt_svg_cache'] = RenderCache(app.config['GANTT_SVG_CACHE_SIZE'])
@@ -0,0 +1,162 @@
+from collections import defaultdict, deque
+from datetime import timedelta
+from sqlalchemy import select
+from .extensions import db
+from .models import Task, task_dependency
+
+
+class DependencyCycleError(ValueError):
+    """Raised when a set of dependency edges does not form a DAG."""
+
+
+def load_dependency_edges(project_ids):
+    """Return every (predecessor_id, successor_id) edge inside the given projects."""
+    project_ids = list(project_ids)
+    if not project_ids:
+        return []
+    query = (
+        select(task_dependency.c.predecessor_id, task_dependency.c.successor_id)
+        .join(Task, Task.id == task_dependency.c.successor_id)
+        .where(Task.project_id.in_(project_ids))
+    )
+    return [tuple(row) for row in db.session.execute(query)]
+
+
+def load_predecessor_edges(task_ids):
+    """Return the (predecessor_id, successor_id) edges into the given tasks."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return []
+    query = (
+        select(task_dependency.c.predecessor_id, task_dependency.c.successor_id)
+        .where(task_dependency.c.successor_id.in_(task_ids))
+    )
+    return [tuple(row) for row in db.session.execute(query)]
+
+
+def predecessor_map(edges):
+    """Map successor_id -> sorted list of predecessor ids."""
+    predecessors = defaultdict(list)
+    for predecessor_id, successor_id in edges:
+        predecessors[successor_id].append(predecessor_id)
+    for ids in predecessors.values():
+        ids.sort()
+    return predecessors
+
+
+def successor_map(edges):
+    """Map predecessor_id -> list of successor ids."""
+    successors = defaultdict(list)
+    for predecessor_id, successor_id in edges:
+        successors[predecessor_id].append(successor_id)
+    return successors
+
+
+def topological_order(nodes, edges):
+    """Order ``nodes`` so every predecessor comes before its successors (Kahn, O(V+E)).
+
+    Raises DependencyCycleError listing the tasks left on a cycle.
+    """
+    successors = successor_map(edges)
+    indegree = dict.fromkeys(nodes, 0)
+    for _, successor_id in edges:
+        indegree[successor_id] += 1
+    queue = deque(node for node, degree in indegree.items() if degree == 0)
+    order = []
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for successor_id in successors.get(node, ()):
+            indegree[successor_id] -= 1
+            if indegree[successor_id] == 0:
+                queue.append(successor_id)
+    if len(order) != len(indegree):
+        remaining = sorted(node for node, degree in indegree.items() if degree > 0)
+        raise DependencyCycleError(f'Dependency cycle between tasks {remaining}.')
+    return order
+
+
+def would_create_cycle(edges, task_id, predecessor_ids):
+    """True if making ``task_id`` depend on ``predecessor_ids`` closes a cycle.
+
+    A cycle appears exactly when one of the new predecessors is already
+    reachable downstream of the task, so only that subgraph is walked.
+    """
+    targets = set(predecessor_ids)
+    if task_id in targets:
+        return True
+    successors = successor_map(edges)
+    seen = {task_id}
+    stack = [task_id]
+    while stack:
+        for successor_id in successors.get(stack.pop(), ()):
+            if successor_id in targets:
+                return True
+            if successor_id not in seen:
+                seen.add(successor_id)
+                stack.append(successor_id)
+    return False
+
+
+def compute_schedule(tasks, edges):
+    """Critical path analysis over a project's tasks in O(V+E).
+
+    Dates are inclusive, so a task lasts ``end - start + 1`` days and a
+    successor may start the day after its last predecessor ends. A task never
+    starts earlier than its own planned start; undated tasks last one day.
+    Returns ``(schedule, critical_path)`` where ``schedule`` maps task id to its
+    earliest/latest start and finish dates plus slack in days.
+    """
+    tasks = {task.id: task for task in tasks}
+    edges = [(p, s) for p, s in edges if p in tasks and s in tasks]
+    if not tasks:
+        return {}, []
+    order = topological_order(list(tasks), edges)
+    predecessors = predecessor_map(edges)
+    successors = successor_map(edges)
+    dated = [task.start_date for task in tasks.values() if task.start_date]
+    origin = min(dated) if dated else None
+
+    duration, earliest_start, earliest_finish = {}, {}, {}
+    for task_id in order:
+        task = tasks[task_id]
+        if task.start_date and task.end_date:
+            duration[task_id] = (task.end_date - task.start_date).days + 1
+        else:
+            duration[task_id] = 1
+        planned = (task.start_date - origin).days if task.start_date else 0
+        earliest_start[task_id] = max([planned] + [earliest_finish[p] for p in predecessors.get(task_id, ())])
+        earliest_finish[task_id] = earliest_start[task_id] + duration[task_id]
+
+    finish = max(earliest_finish.values())
+    latest_start, latest_finish = {}, {}
+    for task_id in reversed(order):
+        latest_finish[task_id] = min([finish] + [latest_start[s] for s in successors.get(task_id, ())])
+        latest_start[task_id] = latest_finish[task_id] - duration[task_id]
+
+    # Walk back from the last zero-slack task along predecessors that directly constrain it
+    critical_path = []
+    current = next((t for t in reversed(order)
+                    if earliest_finish[t] == finish and latest_start[t] == earliest_start[t]), None)
+    while current is not None:
+        critical_path.append(current)
+        current = next((p for p in predecessors.get(current, ())
+                        if earliest_finish[p] == earliest_start[current] and latest_start[p] == earliest_start[p]), None)
+    critical_path.reverse()
+
+    def to_date(offset):
+        return origin + timedelta(days=offset) if origin else None
+
+    schedule = {}
+    for task_id in order:
+        slack = latest_start[task_id] - earliest_start[task_id]
+        schedule[task_id] = {
+            'earliest_start': to_date(earliest_start[task_id]),
+            # Finish dates are inclusive, hence the day subtracted from the offsets
+            'earliest_finish': to_date(earliest_finish[task_id] - 1),
+            'latest_start': to_date(latest_start[task_id]),
+            'latest_finish': to_date(latest_finish[task_id] - 1),
+            'slack': slack,
+            'critical': slack == 0,
+        }
+    return schedule, critical_path
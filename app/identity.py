@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+
+
+class CachedUser(UserMixin):
+    """Detached stand-in for ``User`` carried by ``current_user``.
+
+    It only holds what routes and templates read (``id`` and ``username``)
+    plus the user's ``shard``, so it is safe to share between requests and
+    threads. Routes filter by ``current_user.id`` rather than passing the
+    object to the ORM.
+    """
+
+    __slots__ = ('id', 'username', 'shard')
+
+    def __init__(self, id, username, shard=None):
+        self.id = id
+        self.username = username
+        self.shard = shard
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+
+class IdentityCache:
+    """Bounded LRU of ``CachedUser`` objects that expire ``ttl`` seconds after loading."""
+
+    def __init__(self, max_size=1024, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def put(self, user):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user.id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def load_identity(user_id):
+    """Flask-Login ``user_loader``: return the cached identity, querying the users table on a miss."""
+    from .extensions import db
+    from .models import User
+    user_id = int(user_id)
+    cache = current_app.extensions['identity_cache']
+    user = cache.get(user_id)
+    if user is not None:
+        return user
+    row = db.session.execute(db.select(User.id, User.username, User.shard).where(User.id == user_id)).first()
+    if row is None:
+        return None
+    user = CachedUser(row.id, row.username, row.shard)
+    cache.put(user)
+    return user
+
+
+def invalidate_identity(user_id):
+    """Drop ``user_id`` from this process's cache; call after changing a user row with Core statements."""
+    cache = current_app.extensions.get('identity_cache') if has_app_context() else None
+    if cache is not None:
+        cache.invalidate(user_id)
+
+
+def _invalidate_user(mapper, connection, target):
+    invalidate_identity(target.id)
+
+
+def init_identity_cache(app):
+    """Attach the identity cache to ``app`` and drop entries when a user changes.
+
+    Only ORM updates and deletes are seen here; code changing the users
+    table through Core must call ``invalidate_identity`` itself. Each process
+    has its own cache, and nothing is evicted in other processes, so
+    IDENTITY_CACHE_TTL is how long another worker may keep serving a user
+    after a password change, a shard move or deletion.
+    """
+    from .models import User
+    app.extensions['identity_cache'] = IdentityCache(app.config['IDENTITY_CACHE_SIZE'],
+                                                     app.config['IDENTITY_CACHE_TTL'])
+    if not event.contains(User, 'after_update', _invalidate_user):
+        # Any update (password change included) or delete evicts the cached identity
+        event.listen(User, 'after_update', _invalidate_user)
+        event.listen(User, 'after_delete', _invalidate_user)
@@ -0,0 +1,213 @@
+import csv
+import io
+import json
+import tempfile
+from sqlalchemy import insert, select, update
+from .extensions import db
+from .graph import DependencyCycleError, load_dependency_edges, topological_order
+from .models import Task, task_dependency
+from .stats import add_inserted_tasks
+from .validation import validate_task_fields
+from .versioning import bump_project_versions
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+# Per-row errors kept in the report; later failures are only counted
+MAX_REPORTED_ERRORS = 1000
+# JSON types accepted per NDJSON field, as in batch.FIELD_TYPES; CSV values are always strings
+FIELD_TYPES = {
+    'name': (str, type(None)),
+    'start_date': (str, type(None)),
+    'end_date': (str, type(None)),
+    'progress': (int, str, type(None)),
+    'status': (str, type(None)),
+    'comment': (str, type(None)),
+    'dependencies': (str, list, type(None)),
+}
+
+
+def detect_format(filename=None, content_type=None):
+    """Guess the import format from a file name or content type."""
+    filename = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if filename.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonlines' in content_type:
+        return 'ndjson'
+    if filename.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return None
+
+
+def iter_rows(stream, fmt):
+    """Yield ``(line_number, row_dict_or_error)`` from a binary stream, one row at a time."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, f'Invalid JSON: {e}'
+                continue
+            if not isinstance(row, dict):
+                yield line_number, 'Each line must be a JSON object.'
+                continue
+            yield line_number, row
+    else:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+
+def _type_errors(row):
+    errors = [f'{field} has the wrong type.' for field, types in FIELD_TYPES.items()
+              if isinstance(row.get(field), bool) or not isinstance(row.get(field), types)]
+    dependencies = row.get('dependencies')
+    if isinstance(dependencies, list) and not all(isinstance(name, str) for name in dependencies):
+        errors.append('dependencies must be a list of task names.')
+    return errors
+
+
+def _dependency_names(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    names = (str(name).strip() for name in value)
+    return list(dict.fromkeys(name for name in names if name and name != 'None'))
+
+
+def import_tasks(project, stream, fmt, chunk_size=1000, on_chunk=None):
+    """Stream tasks from CSV or NDJSON into ``project``.
+
+    Rows are validated with the same rules as add_task_to_project and
+    inserted with one executemany INSERT per chunk, committed chunk by chunk.
+    Dependencies are given by task name. They are spooled to a temporary
+    file and resolved after all rows are loaded; on duplicate names the
+    oldest task wins. Python memory therefore stays bounded by the chunk size
+    rather than the file size. ``on_chunk(report)`` is called after each
+    chunk commits. Returns a report dict with per-row errors.
+    """
+    report = {'imported': 0, 'failed': 0, 'dependencies': 0, 'errors': []}
+
+    def add_error(line, errors):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line, 'errors': errors})
+
+    pending = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+    insert_stmt = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+    chunk, chunk_dependencies = [], []
+    first_version = None
+
+    def flush_chunk():
+        nonlocal first_version
+        if not chunk:
+            return
+        # Each chunk is its own project version, so delta syncs during the import see every row
+        version = bump_project_versions(db.session, [project.id])[project.id]
+        first_version = first_version or version
+        for values in chunk:
+            values['row_version'] = version
+        task_ids = db.session.scalars(insert_stmt, chunk).all()
+        add_inserted_tasks(db.session.connection(), project.id, chunk)
+        for task_id, names in zip(task_ids, chunk_dependencies):
+            for name in names:
+                pending.write(json.dumps([task_id, name]) + '\n')
+        db.session.commit()
+        report['imported'] += len(chunk)
+        chunk.clear()
+        chunk_dependencies.clear()
+        if on_chunk is not None:
+            on_chunk(report)
+
+    try:
+        for line, row in iter_rows(stream, fmt):
+            if isinstance(row, str):
+                add_error(line, [row])
+                continue
+            if row.get('type') == 'project':
+                continue  # Project records from an NDJSON export
+            errors = _type_errors(row)
+            if errors:
+                add_error(line, errors)
+                continue
+            progress = row.get('progress')
+            values, errors = validate_task_fields(
+                (row.get('name') or '').strip(),
+                row.get('start_date') or None,
+                row.get('end_date') or None,
+                0 if progress in (None, '') else progress,
+                (row.get('status') or '').strip(),
+            )
+            if errors:
+                add_error(line, errors)
+                continue
+            values.update(comment=row.get('comment') or None, project_id=project.id, user_id=project.user_id)
+            chunk.append(values)
+            chunk_dependencies.append(_dependency_names(row.get('dependencies')))
+            if len(chunk) >= chunk_size:
+                flush_chunk()
+        flush_chunk()
+        if report['imported']:
+            report['dependencies'] = _link_dependencies(project.id, pending, chunk_size, report)
+            version = bump_project_versions(db.session, [project.id])[project.id]
+            # The imported tasks gained their dependencies after their chunk was stamped
+            db.session.execute(
+                update(Task).where(Task.project_id == project.id, Task.row_version >= first_version)
+                .values(row_version=version), execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        pending.close()
+    return report
+
+
+def _link_dependencies(project_id, pending, chunk_size, report):
+    """Resolve spooled (task_id, predecessor name) pairs into task_dependency rows."""
+    pending.seek(0)
+    linked = 0
+    while True:
+        pairs = [json.loads(line) for line in _take(pending, chunk_size)]
+        if not pairs:
+            break
+        names = {name for _, name in pairs}
+        name_to_id = dict(db.session.execute(
+            select(Task.name, db.func.min(Task.id))
+            .where(Task.project_id == project_id, Task.name.in_(names))
+            .group_by(Task.name)
+        ).all())
+        edges = set()
+        for task_id, name in pairs:
+            predecessor_id = name_to_id.get(name)
+            if predecessor_id is None:
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'task_id': task_id, 'errors': [f'Unknown dependency "{name}".']})
+            elif predecessor_id != task_id:
+                edges.add((predecessor_id, task_id))
+        if edges:
+            db.session.execute(insert(task_dependency), [
+                {'predecessor_id': p, 'successor_id': s} for p, s in edges
+            ])
+            linked += len(edges)
+    # Imported names may reference each other in a loop; keep the tasks but drop the edges
+    edges = load_dependency_edges([project_id])
+    try:
+        topological_order({node for edge in edges for node in edge}, edges)
+    except DependencyCycleError as e:
+        db.session.rollback()
+        report['errors'].append({'errors': [f'Dependencies were not imported: {e}']})
+        return 0
+    return linked
+
+
+def _take(stream, count):
+    for _ in range(count):
+        line = stream.readline()
+        if not line:
+            return
+        yield line
@@ -0,0 +1,69 @@
+from datetime import date
+from sqlalchemy import and_, column, or_, select, table
+from .extensions import db
+from .models import Task, task_dependency
+
+# R*Tree maintained by triggers (see migration f2b8d4e6a015); SQLite only
+task_interval = table('task_interval', column('id'), column('project_min'), column('project_max'),
+                      column('start_day'), column('end_day'))
+EPOCH = date(1970, 1, 1)
+# Stand-ins for an open end of the window, at the limits of the rtree_i32 columns
+OPEN_START, OPEN_END = -2 ** 31, 2 ** 31 - 1
+
+
+def day_number(value):
+    return (value - EPOCH).days
+
+
+def overlap_condition(project_id, date_from=None, date_to=None):
+    """WHERE clause for the project's tasks whose [start_date, end_date] meets [date_from, date_to].
+
+    Either end may be None for an open window. On SQLite the lookup goes
+    through the task_interval R*Tree, which walks only the boxes that
+    intersect the window. A B-tree on (project_id, start_date) has to read
+    every task starting before ``date_to``. The choice follows the database
+    the session routes task reads to (a read replica or a shard), which
+    need not be the primary engine's dialect.
+    """
+    if db.session.get_bind(clause=select(Task.id)).dialect.name != 'sqlite':
+        condition = and_(Task.project_id == project_id, Task.start_date.isnot(None), Task.end_date.isnot(None))
+        if date_from:
+            condition = and_(condition, Task.end_date >= date_from)
+        if date_to:
+            condition = and_(condition, Task.start_date <= date_to)
+        return condition
+    window = select(task_interval.c.id).where(
+        task_interval.c.project_min <= project_id,
+        task_interval.c.project_max >= project_id,
+        task_interval.c.start_day <= (day_number(date_to) if date_to else OPEN_END),
+        task_interval.c.end_day >= (day_number(date_from) if date_from else OPEN_START),
+    )
+    # The R*Tree already narrows to the project; a project_id term here would make SQLite
+    # walk the project's index instead of looking the matches up by rowid
+    return Task.id.in_(window)
+
+
+def load_window(project_id, date_from=None, date_to=None):
+    """Tasks on screen for a Gantt viewport; returns ``(tasks, edges)``.
+
+    ``tasks`` holds the tasks overlapping the window plus the tasks at the
+    other end of their dependencies, so every arrow into or out of the view
+    can be drawn. ``edges`` are the (predecessor_id, successor_id) pairs
+    touching the window, all of whose ends are in ``tasks``.
+    """
+    visible = Task.query.filter(overlap_condition(project_id, date_from, date_to)).all()
+    visible_ids = [task.id for task in visible]
+    if not visible_ids:
+        return [], []
+    window_ids = select(Task.id).where(overlap_condition(project_id, date_from, date_to))
+    edges = [tuple(row) for row in db.session.execute(
+        select(task_dependency.c.predecessor_id, task_dependency.c.successor_id)
+        .where(or_(task_dependency.c.predecessor_id.in_(window_ids),
+                   task_dependency.c.successor_id.in_(window_ids)))
+    )]
+    known = set(visible_ids)
+    endpoint_ids = {task_id for edge in edges for task_id in edge} - known
+    endpoints = Task.query.filter(Task.id.in_(endpoint_ids)).all() if endpoint_ids else []
+    tasks = visible + endpoints
+    tasks.sort(key=lambda task: (task.start_date is None, task.start_date or EPOCH, task.id))
+    return tasks, edges
@@ -0,0 +1,359 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import suppress
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import delete, func, or_, select, update
+from .extensions import db
+from .models import Job, Project, ProjectStats, Task, TaskTombstone, task_dependency, utcnow
+from .sharding import use_user_shard
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+# Seconds before retry n is 2 ** n, capped
+MAX_RETRY_DELAY = 300
+NO_SYNC = {'synchronize_session': False}
+
+JobKind = namedtuple('JobKind', 'handler max_attempts cancellable cleanup')
+JOB_KINDS = {}
+UNKNOWN_KIND = JobKind(None, 0, False, None)
+
+
+class JobError(ValueError):
+    """A job request that cannot be carried out, e.g. cancelling a job that already finished."""
+
+
+class JobCancelled(Exception):
+    """Raised from ``JobContext.progress`` once a cancellation has been requested."""
+
+
+def job_handler(kind, max_attempts=3, cancellable=False, cleanup=None):
+    """Register ``handler(context, **payload)`` as the code run for jobs of ``kind``.
+
+    Handlers commit their own work, ideally in chunks with a
+    ``context.progress`` call after each. A handler that may be retried
+    must be safe to run again over its own partial result.
+    ``cleanup(**payload)`` releases what the payload refers to when the job
+    ends without the handler getting to: cancelled while queued, or failed
+    after its worker stopped responding.
+    """
+    def register(handler):
+        JOB_KINDS[kind] = JobKind(handler, max_attempts, cancellable, cleanup)
+        return handler
+    return register
+
+
+class JobContext:
+    """Handed to a running handler for reporting progress and noticing cancellation."""
+
+    def __init__(self, job_id, cancellable=False):
+        self.job_id = job_id
+        self.cancellable = cancellable
+
+    def progress(self, done, total=None, message=None):
+        """Record progress and commit the session, so a handler's chunk and its progress land together.
+
+        Doubles as the heartbeat that keeps the job from being requeued as
+        stale. Raises JobCancelled if the job is cancellable and a cancel
+        has been requested since the last call.
+        """
+        percent = min(100, int(100 * done / total)) if total else 0
+        cancel_requested = db.session.execute(
+            update(Job).where(Job.id == self.job_id)
+            .values(progress=percent, message=message, heartbeat_at=utcnow())
+            .returning(Job.cancel_requested), execution_options=NO_SYNC
+        ).scalar()
+        db.session.commit()
+        if cancel_requested and self.cancellable:
+            raise JobCancelled()
+
+
+def enqueue_job(kind, payload=None, user_id=None):
+    """Add a job to the session; the caller commits, then calls ``wake_job_workers``."""
+    if kind not in JOB_KINDS:
+        raise JobError(f'Unknown job kind: {kind}')
+    job = Job(kind=kind, payload=json.dumps(payload or {}), user_id=user_id,
+              max_attempts=JOB_KINDS[kind].max_attempts, run_after=utcnow())
+    db.session.add(job)
+    return job
+
+
+def wake_job_workers():
+    """Tell this process's workers a job was queued, instead of waiting for their next poll."""
+    current_app.extensions['job_workers'].wake()
+
+
+def cancel_job(job):
+    """Cancel a queued job outright, or ask a running one to stop at its next progress report."""
+    if job.status in FINISHED_STATUSES:
+        raise JobError(f'Job {job.id} has already {job.status}.')
+    if not JOB_KINDS.get(job.kind, UNKNOWN_KIND).cancellable:
+        raise JobError(f'{job.kind} jobs cannot be cancelled.')
+    now = utcnow()
+    # Conditional on the status so a worker claiming the job at the same moment cannot be overruled
+    abandoned = db.session.execute(update(Job).where(Job.id == job.id, Job.status == 'queued')
+                                   .values(status='cancelled', finished_at=now, cancel_requested=True)
+                                   .returning(Job.kind, Job.payload), execution_options=NO_SYNC).all()
+    db.session.execute(update(Job).where(Job.id == job.id, Job.status == 'running')
+                       .values(cancel_requested=True), execution_options=NO_SYNC)
+    db.session.commit()
+    _clean_up(abandoned)
+    db.session.refresh(job)
+
+
+def requeue_stale_jobs(stale_seconds):
+    """Return running jobs whose worker stopped reporting to the queue, or fail them if out of attempts."""
+    cutoff = utcnow() - timedelta(seconds=stale_seconds)
+    stale = (Job.status == 'running', Job.heartbeat_at < cutoff)
+    # Checked with a read first so idle polls never take the write lock
+    if db.session.scalar(select(Job.id).where(*stale).limit(1)) is None:
+        db.session.rollback()
+        return
+    abandoned = db.session.execute(update(Job).where(*stale, Job.attempts >= Job.max_attempts)
+                                   .values(status='failed', finished_at=utcnow(), locked_by=None,
+                                           message='Worker stopped responding.')
+                                   .returning(Job.kind, Job.payload), execution_options=NO_SYNC).all()
+    db.session.execute(update(Job).where(*stale).values(status='queued', locked_by=None),
+                       execution_options=NO_SYNC)
+    db.session.commit()
+    _clean_up(abandoned)
+
+
+def _clean_up(jobs):
+    """Run the cleanup hook of ``(kind, payload)`` jobs that ended without their handler finishing."""
+    for kind, payload in jobs:
+        cleanup = JOB_KINDS.get(kind, UNKNOWN_KIND).cleanup
+        if cleanup is not None:
+            try:
+                cleanup(**json.loads(payload))
+            except Exception:
+                logger.exception("Cleaning up after a %s job failed", kind)
+
+
+def claim_next_job(worker_id):
+    """Mark the oldest due job as running for ``worker_id``; returns its id, or None.
+
+    The claim is an UPDATE conditional on the job still being queued, so
+    of two workers that picked the same job only one gets it back; the
+    other moves on to the next.
+    """
+    while True:
+        now = utcnow()
+        job_id = db.session.scalar(select(Job.id).where(Job.status == 'queued', Job.run_after <= now)
+                                   .order_by(Job.run_after, Job.id).limit(1))
+        if job_id is None:
+            db.session.rollback()
+            return None
+        claimed = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', attempts=Job.attempts + 1, started_at=now, heartbeat_at=now,
+                    locked_by=worker_id, message=None)
+            .returning(Job.id), execution_options=NO_SYNC
+        ).scalar()
+        db.session.commit()
+        if claimed is not None:
+            return claimed
+
+
+def run_job(job_id):
+    """Run a claimed job to completion, recording success, a retry, a failure or a cancellation."""
+    job = db.session.get(Job, job_id)
+    kind = JOB_KINDS.get(job.kind)
+    if kind is None:
+        _finish(job, 'failed', message=f'Unknown job kind: {job.kind}')
+        return
+    use_user_shard(job.user_id)
+    try:
+        result = kind.handler(JobContext(job.id, kind.cancellable), **json.loads(job.payload))
+    except JobCancelled:
+        db.session.rollback()
+        _finish(db.session.get(Job, job_id), 'cancelled', message='Cancelled.')
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        if job.attempts < job.max_attempts:
+            logger.warning("Job %s (%s) failed on attempt %s; retrying", job.id, job.kind, job.attempts,
+                           exc_info=True)
+            job.status = 'queued'
+            job.locked_by = None
+            job.message = str(e)
+            job.run_after = utcnow() + timedelta(seconds=min(2 ** job.attempts, MAX_RETRY_DELAY))
+            db.session.commit()
+        else:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            _finish(job, 'failed', message=str(e))
+    else:
+        _finish(db.session.get(Job, job_id), 'succeeded', result=result, progress=100)
+
+
+def _finish(job, status, message=None, result=None, progress=None):
+    job.status = status
+    job.message = message
+    job.result = json.dumps(result) if result is not None else None
+    if progress is not None:
+        job.progress = progress
+    job.finished_at = utcnow()
+    job.locked_by = None
+    db.session.commit()
+
+
+def run_pending_jobs(worker_id):
+    """Run due jobs one after another until none are left; returns how many ran."""
+    count = 0
+    while (job_id := claim_next_job(worker_id)) is not None:
+        run_job(job_id)
+        count += 1
+    return count
+
+
+class JobWorkerPool:
+    """Threads that take jobs off the queue table inside this process.
+
+    The table is the queue, so jobs survive restarts and any process can
+    run them: web workers, ``flask run-jobs``, or both. Workers sleep for
+    ``poll_interval`` between empty polls unless woken by ``wake``.
+    """
+
+    def __init__(self, app, workers=2, poll_interval=2.0, stale_seconds=300):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_seconds = stale_seconds
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self.started = False
+
+    def start(self):
+        # Deferred to first use so the threads start in the worker, not a preloading master
+        with self._lock:
+            if self.started:
+                return
+            self.started = True
+            for index in range(self.workers):
+                worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+                threading.Thread(target=self.run, args=(worker_id,), name=f'job-worker-{index}',
+                                 daemon=True).start()
+
+    def wake(self):
+        if not self.started:
+            self.start()
+        self._wake.set()
+
+    def run(self, worker_id):
+        """Claim and run jobs forever; the body of each worker thread and of `flask run-jobs`."""
+        while True:
+            try:
+                with self.app.app_context():
+                    requeue_stale_jobs(self.stale_seconds)
+                    run_pending_jobs(worker_id)
+            except Exception:
+                logger.exception("Job worker %s failed", worker_id)
+            # A wake between the last claim and clear() is missed; the poll interval bounds the delay
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+def serialize_job(job):
+    kind = JOB_KINDS.get(job.kind)
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'result': json.loads(job.result) if job.result else None,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'cancellable': bool(kind and kind.cancellable) and job.status not in FINISHED_STATUSES,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def spool_upload(stream, suffix=''):
+    """Copy an upload to a file in JOBS_SPOOL_DIR for a job to read later; returns the path."""
+    spool_dir = current_app.config['JOBS_SPOOL_DIR']
+    os.makedirs(spool_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=spool_dir, suffix=suffix, delete=False) as spooled:
+        shutil.copyfileobj(stream, spooled)
+    return spooled.name
+
+
+# --- Handlers ---
+
+@job_handler('delete_project', max_attempts=5)
+def delete_project_job(context, project_id):
+    """Remove a project queued for deletion, a chunk of tasks per transaction.
+
+    Short transactions keep the write lock free for other requests between
+    chunks. A retry carries on with whatever tasks are left.
+    """
+    chunk_size = current_app.config['PROJECT_DELETE_CHUNK']
+    total = db.session.scalar(select(func.count()).select_from(Task).where(Task.project_id == project_id))
+    deleted = 0
+    while True:
+        task_ids = db.session.scalars(select(Task.id).where(Task.project_id == project_id)
+                                      .limit(chunk_size)).all()
+        if not task_ids:
+            break
+        db.session.execute(delete(task_dependency).where(or_(
+            task_dependency.c.predecessor_id.in_(task_ids),
+            task_dependency.c.successor_id.in_(task_ids))))
+        db.session.execute(delete(Task).where(Task.id.in_(task_ids)), execution_options=NO_SYNC)
+        deleted += len(task_ids)
+        context.progress(deleted, total, f'Deleted {deleted} of {total} tasks.')
+    db.session.execute(delete(TaskTombstone).where(TaskTombstone.project_id == project_id))
+    db.session.execute(delete(ProjectStats).where(ProjectStats.project_id == project_id))
+    db.session.execute(delete(Project).where(Project.id == project_id), execution_options=NO_SYNC)
+    db.session.commit()
+    return {'project_id': project_id, 'deleted_tasks': deleted}
+
+
+def _remove_spooled_upload(path, **payload):
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+@job_handler('import_tasks', max_attempts=1, cancellable=True, cleanup=_remove_spooled_upload)
+def import_tasks_job(context, project_id, path, fmt, chunk_size):
+    """Run a spooled upload through import_tasks. Not retried, since a rerun would add the rows twice.
+
+    Cancelling stops the import at the next chunk; chunks already
+    committed stay in the project.
+    """
+    from .events import publish_project_changes
+    from .importer import import_tasks
+    try:
+        project = db.session.get(Project, project_id)
+        if project is None or project.deleted_at is not None:
+            raise JobError(f'Project {project_id} no longer exists.')
+        since = project.version
+        size = os.path.getsize(path) or 1
+        with open(path, 'rb') as stream:
+            try:
+                return import_tasks(project, stream, fmt, chunk_size, on_chunk=lambda report: context.progress(
+                    stream.tell(), size, f'Imported {report["imported"]} rows.'))
+            finally:
+                publish_project_changes(project_id, since)
+    finally:
+        _remove_spooled_upload(path)
+
+
+def init_jobs(app):
+    pool = JobWorkerPool(app, workers=app.config['JOBS_WORKERS'], poll_interval=app.config['JOBS_POLL_INTERVAL'],
+                         stale_seconds=app.config['JOBS_STALE_SECONDS'])
+    app.extensions['job_workers'] = pool
+
+    @app.before_request
+    def _start_job_workers():
+        # Picks up jobs left queued by a previous run as soon as this process serves anything
+        if not pool.started:
+            pool.start()
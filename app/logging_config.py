@@ -0,0 +1,42 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+# LogRecord attributes that are not user supplied ``extra`` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra={...}`` fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(app):
+    """Configure the ``app`` package logger from LOG_LEVEL and LOG_FORMAT (text or json).
+
+    Messages use %-style arguments, so below the configured level they are
+    discarded before any formatting happens.
+    """
+    level = os.getenv('LOG_LEVEL', 'DEBUG' if app.debug else 'INFO').upper()
+    handler = logging.StreamHandler(sys.stderr)
+    if os.getenv('LOG_FORMAT', 'text') == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    logger = logging.getLogger('app')
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
@@ -1,11 +1,18 @@
+from datetime import datetime, timezone
 from .extensions import db
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from .passwords import hash_password, verify_password
+
+def utcnow():
+    """Naive UTC timestamp, the form the DateTime columns store."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False, default='')  # Default empty string, set by set_password
+    # Shard database holding this user's projects and tasks (see sharding.py); None is the primary database
+    shard = db.Column(db.String(50), nullable=True)
 
     # Relationship: A User can have many Projects
     projects = db.relationship('Project', backref='user', lazy=True, cascade="all, delete-orphan")
@@ -13,40 +20,144 @@ class User(db.Model, UserMixin):
     # tasks = db.relationship('Task', backref='user', lazy=True, cascade="all, delete-orphan")
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def __repr__(self):
         return f'<User {self.username}>'
 
 # NEW: Project Model
 class Project(db.Model):
+    __table_args__ = (
+        db.Index('ix_project_user_id_name', 'user_id', 'name'),  # projects() list, also covers user_id lookups
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text, nullable=True)  # Optional: for project details
+    # Bumped on every task insert/update/delete (see versioning.py); used for ETags
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=True, default=utcnow, onupdate=utcnow)
+    # Highest version whose tombstones have been pruned; delta syncs from before it must start over
+    pruned_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Set when deletion is queued; the project is hidden from lists while a job removes it (see jobs.py)
+    deleted_at = db.Column(db.DateTime, nullable=True)
 
     # Foreign Key to User
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
     # Relationship: A Project can have many Tasks
     tasks = db.relationship('Task', backref='project', lazy=True, cascade="all, delete-orphan")
+    # Summary row kept up to date by stats.py
+    stats = db.relationship('ProjectStats', uselist=False, lazy=True, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f'<Project {self.id}: {self.name}>'
 
+# Directed dependency edges between tasks: the successor cannot start before the predecessor ends.
+# The composite primary key covers lookups by predecessor; successors get their own index.
+task_dependency = db.Table(
+    'task_dependency',
+    db.Column('predecessor_id', db.Integer, db.ForeignKey('task.id'), primary_key=True),
+    db.Column('successor_id', db.Integer, db.ForeignKey('task.id'), primary_key=True),
+    db.Index('ix_task_dependency_successor_id', 'successor_id'),
+)
+
 class Task(db.Model):
+    __table_args__ = (
+        db.Index('ix_task_project_id_start_date', 'project_id', 'start_date'),  # Gantt/API order, also covers project_id lookups
+        db.Index('ix_task_project_id_name', 'project_id', 'name'),  # view_project order and name lookups on import
+        db.Index('ix_task_user_id', 'user_id'),
+        db.Index('ix_task_project_id_row_version', 'project_id', 'row_version'),  # Delta sync
+        db.Index('ix_task_project_id_end_date', 'project_id', 'end_date'),  # project_stats.max_end
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     start_date = db.Column(db.Date, nullable=True)
     end_date = db.Column(db.Date, nullable=True)
     progress = db.Column(db.Integer, default=0, nullable=False)
     status = db.Column(db.String(50), default='To Do', nullable=False)
-    dependencies = db.Column(db.String(255), nullable=True)
     comment = db.Column(db.Text, nullable=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Project version at this task's last change (see versioning.py)
+    row_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=True, default=utcnow, onupdate=utcnow)
+
+    # Tasks this task depends on, and (via backref) the tasks that depend on it
+    predecessors = db.relationship(
+        'Task',
+        secondary=task_dependency,
+        primaryjoin=lambda: Task.id == task_dependency.c.successor_id,
+        secondaryjoin=lambda: Task.id == task_dependency.c.predecessor_id,
+        backref=db.backref('successors', lazy=True),
+        lazy=True,
+    )
+
+    def __repr__(self):
+        return f'<Task {self.id}: {self.name}>'
+
+# Deleted tasks, kept so delta syncs can tell clients what to drop; pruned by `flask prune-tombstones`
+class TaskTombstone(db.Model):
+    __tablename__ = 'task_tombstone'
+    __table_args__ = (
+        db.Index('ix_task_tombstone_project_id_row_version', 'project_id', 'row_version'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    row_version = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    def __repr__(self):
+        return f'<TaskTombstone {self.task_id} @ {self.row_version}>'
+
+# Per-project rollup of its tasks, maintained incrementally on every flush (see stats.py)
+class ProjectStats(db.Model):
+    __tablename__ = 'project_stats'
+
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), primary_key=True)
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+    todo_count = db.Column(db.Integer, nullable=False, default=0)
+    in_progress_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    blocked_count = db.Column(db.Integer, nullable=False, default=0)
+    progress_sum = db.Column(db.Integer, nullable=False, default=0)
+    min_start = db.Column(db.Date, nullable=True)
+    max_end = db.Column(db.Date, nullable=True)
+
+    def __repr__(self):
+        return f'<ProjectStats {self.project_id}: {self.task_count} tasks>'
+
+# Durable background work, claimed and run by the worker pool in jobs.py
+class Job(db.Model):
+    __table_args__ = (
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),  # Claiming the next due job
+        db.Index('ix_job_user_id', 'user_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON keyword arguments for the handler
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON returned by the handler
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    run_after = db.Column(db.DateTime, nullable=False, default=utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    # Refreshed while running; a running job whose heartbeat stops is requeued
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    locked_by = db.Column(db.String(100), nullable=True)
 
     def __repr__(self):
-        return f'<Task {self.id}: {self.name}>'
\ No newline at end of file
+        return f'<Job {self.id}: {self.kind} {self.status}>'
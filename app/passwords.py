@@ -0,0 +1,121 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app, has_app_context, jsonify, request
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool and its queue are full, or a hash overruns its timeout; served as 503."""
+
+
+def hash_prefix(method):
+    """The prefix werkzeug stores for ``method`` with its defaults filled in, e.g. 'scrypt:32768:8:1'.
+
+    Worked out from the method string, as werkzeug does, rather than by
+    paying for a hash at startup.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2' and len(args) <= 2:
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Unsupported password hash method {method!r}.')
+
+
+class PasswordHasher:
+    """Runs password hashing on a small dedicated thread pool.
+
+    hashlib's scrypt/pbkdf2 release the GIL, so at most ``workers`` hashes
+    burn CPU at once per process, and request threads serving other routes
+    keep running. At most ``queue_size`` further calls may wait for a free
+    worker; beyond that ``HashingBusy`` is raised instead of queueing.
+    """
+
+    def __init__(self, method, workers=2, queue_size=8, timeout=10.0):
+        self.method = method
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self.prefix = hash_prefix(method)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the hash finishes, even if the caller gave up waiting for it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy() from None
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.prefix
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _hasher():
+    return current_app.extensions.get('password_hasher') if has_app_context() else None
+
+
+def hash_password(password):
+    """Hash with the configured method, on the pool when an app is active (inline otherwise)."""
+    hasher = _hasher()
+    if hasher is None:
+        return generate_password_hash(password)
+    return hasher.hash(password)
+
+
+def verify_password(password_hash, password):
+    hasher = _hasher()
+    if hasher is None:
+        return check_password_hash(password_hash, password)
+    return hasher.verify(password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True when ``password_hash`` was made with other parameters than the configured ones."""
+    hasher = _hasher()
+    return hasher is not None and hasher.needs_rehash(password_hash)
+
+
+def _busy_response(error):
+    retry_after = str(current_app.config['PASSWORD_HASH_RETRY_AFTER'])
+    logger.warning("Password hashing pool full; rejecting %s %s", request.method, request.path)
+    if request.accept_mimetypes.best == 'application/json' or request.is_json:
+        response = jsonify({'error': 'Too many sign-in attempts in progress, please retry shortly.'})
+    else:
+        response = current_app.response_class('Too many sign-in attempts in progress, please retry shortly.\n',
+                                               mimetype='text/plain')
+    response.status_code = 503
+    response.headers['Retry-After'] = retry_after
+    return response
+
+
+def init_password_hashing(app):
+    """Create the per-process hashing pool and serve ``HashingBusy`` as 503 + Retry-After."""
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    )
+    app.register_error_handler(HashingBusy, _busy_response)
@@ -0,0 +1,143 @@
+import os
+import re
+import tempfile
+from datetime import date, timedelta
+from flask_migrate import upgrade
+from sqlalchemy import event
+from .extensions import db
+from .jobs import run_pending_jobs
+
+# Tables whose hot-path queries must always go through an index
+CHECKED_TABLES = ('user', 'project', 'task', 'task_dependency', 'job')
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')  # SQLite < 3.36 says 'SCAN TABLE'
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+# A route answering anything else ran fewer queries than it does in use, so its plans prove nothing
+EXPECTED_STATUSES = (302, 304)
+
+
+def _seed(users=2, projects_per_user=3, tasks_per_project=40):
+    """Create a small portfolio with dependency chains; returns ids used by the route list."""
+    from .models import Project, Task, User
+    first_project = first_task = None
+    for u in range(users):
+        user = User(username=f'plan-user-{u}')
+        user.set_password('plan-password')
+        db.session.add(user)
+        db.session.flush()
+        for p in range(projects_per_user):
+            project = Project(name=f'Project {p}', user_id=user.id)
+            db.session.add(project)
+            db.session.flush()
+            previous = None
+            for t in range(tasks_per_project):
+                start = date(2025, 1, 1) + timedelta(days=t)
+                task = Task(name=f'Task {t}', start_date=start, end_date=start + timedelta(days=2),
+                            status='To Do', progress=0, project_id=project.id, user_id=user.id,
+                            predecessors=[previous] if previous else [])
+                db.session.add(task)
+                previous = task
+            db.session.flush()
+            first_project = first_project or project.id
+            first_task = first_task or previous.id
+    db.session.commit()
+    return first_project, first_task
+
+
+def _routes(project_id, task_id):
+    """(label, method, url, kwargs) for every route whose queries are checked."""
+    task_form = {'task_name': 'Renamed', 'start_date': '2025-03-01', 'end_date': '2025-03-05',
+                 'progress': '50', 'status': 'In Progress', 'dependencies': ['None'], 'comment': 'x'}
+    return [
+        ('login', 'POST', '/login', {'data': {'username': 'plan-user-0', 'password': 'plan-password'}}),
+        ('projects', 'GET', '/projects', {}),
+        ('view_project', 'GET', f'/projects/{project_id}', {}),
+        ('api_get_all_projects', 'GET', '/api/projects?limit=2', {}),
+        ('api_project_summaries', 'GET', '/api/projects?view=summary', {}),
+        ('api_get_project_tasks', 'GET', f'/api/projects/{project_id}/tasks', {}),
+        ('api_get_project_tasks_window', 'GET', f'/api/projects/{project_id}/tasks?from=2025-01-10&to=2025-01-20', {}),
+        ('api_query_project_tasks_window', 'GET', f'/api/projects/{project_id}/tasks/query?from=2025-01-10&to=2025-01-20', {}),
+        ('api_query_project_tasks', 'GET', f'/api/projects/{project_id}/tasks/query?limit=10&status=To+Do', {}),
+        ('api_query_project_tasks_by_name', 'GET', f'/api/projects/{project_id}/tasks/query?sort=name&name_prefix=Task+1', {}),
+        ('api_get_project_changes', 'GET', f'/api/projects/{project_id}/changes?since=1', {}),
+        ('api_search', 'GET', '/api/search?q=task+1', {}),
+        ('api_analytics', 'GET', '/api/analytics', {}),
+        ('api_analytics_project', 'GET', f'/api/analytics?project_id={project_id}&from=2025-01-01&to=2025-03-31', {}),
+        ('project_gantt_svg', 'GET', f'/projects/{project_id}/gantt.svg?from=2025-01-10&to=2025-01-20', {}),
+        ('api_get_project_schedule', 'GET', f'/api/projects/{project_id}/schedule', {}),
+        ('task_comment_api', 'GET', f'/api/tasks/{task_id}/comment', {}),
+        ('update_comment', 'POST', f'/projects/{project_id}/update_comment/{task_id}', {'json': {'comment': 'hi'}}),
+        ('edit_task', 'POST', f'/tasks/{task_id}/edit', {'data': task_form}),
+        ('api_export', 'GET', '/api/export?format=csv', {}),
+        ('delete_task', 'POST', f'/tasks/{task_id}/delete', {}),
+        ('delete_project', 'POST', f'/projects/{project_id}/delete', {}),
+        ('api_get_jobs', 'GET', '/api/jobs', {}),
+    ]
+
+
+def full_scans(connection, statement, parameters):
+    """Return the EXPLAIN QUERY PLAN lines that scan a checked table without an index."""
+    plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    failures = []
+    for row in plan:
+        detail = row[-1]
+        match = FULL_SCAN.match(detail)
+        if match and match.group(1) in CHECKED_TABLES:
+            failures.append(detail)
+    return failures
+
+
+def check_query_plans():
+    """Seed a scratch database built from the migrations, drive each hot route
+    through the test client and EXPLAIN every query it issued.
+
+    Returns a list of ``(route, statement, plan lines)`` for queries that fall
+    back to a full table scan, plus ``(route, request, [status])`` for routes
+    that did not answer 2xx, 302 or 304; an empty list means every route
+    ran and every plan uses an index.
+    """
+    from . import create_app
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'query_plans.db'),
+            'WTF_CSRF_ENABLED': False,
+            'TESTING': True,
+            'JOBS_WORKERS': 0,  # Jobs queued by the routes are run below, where their queries can be captured
+            'DATABASE_SHARDS': {},  # Everything in the scratch database, where the capture hook sees it
+        })
+        failures = []
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            project_id, task_id = _seed()
+            engine = db.engine
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                captured.append((statement, parameters))
+
+        # Requests run outside the seeding context so each one gets a fresh session, as in production
+        event.listen(engine, 'before_cursor_execute', capture)
+
+        def check(label):
+            with engine.connect() as connection:
+                for statement, parameters in list(captured):
+                    scans = full_scans(connection, statement, parameters)
+                    if scans:
+                        failures.append((label, statement, scans))
+
+        try:
+            client = app.test_client()
+            for label, method, url, kwargs in _routes(project_id, task_id):
+                captured.clear()
+                response = client.open(url, method=method, **kwargs)
+                if not (response.status_code // 100 == 2 or response.status_code in EXPECTED_STATUSES):
+                    failures.append((label, f'{method} {url}', [f'unexpected status {response.status}']))
+                check(label)
+            captured.clear()
+            with app.app_context():
+                run_pending_jobs('query-plans')
+            check('background jobs')
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+            engine.dispose()
+        return failures
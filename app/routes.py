@@ -1,8 +1,31 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, current_app, Response, stream_with_context
 from .extensions import db
-from .models import Task, User, Project
+from .analytics import AnalyticsError, parse_analytics, portfolio_analytics
+from .batch import BatchError, apply_batch
+from .database import active_shard, read_only
+from .models import Job, Task, User, Project, utcnow
+from .events import StreamLimitReached, changes_event, publish_project_changes, stream_events
+from .exporter import EXPORT_FORMATS, EXPORT_MIMETYPES, iter_export
+from .gantt_svg import DEFAULT_SCALE, SCALES, render_gantt_svg
+from .graph import DependencyCycleError, compute_schedule, load_dependency_edges, predecessor_map
+from .importer import IMPORT_FORMATS, detect_format, import_tasks
+from .intervals import load_window
+from .jobs import JobError, cancel_job, enqueue_job, serialize_job, spool_upload, wake_job_workers
+from .passwords import needs_rehash
+from .scheduling import propagate_schedule
+from .search import SearchError, parse_search, search
+from .serializers import format_date, format_dependencies, serialize_task, serialize_gantt_tasks
+from .sharding import project_topic, shard_for_new_user
+from .stats import serialize_stats
+from .sync import changes_since
+from .task_query import TaskQueryError, parse_task_query, parse_window, run_task_query
+from .validation import resolve_dependencies, validate_task_fields
+from .versioning import project_etag, not_modified_response, with_etag
+import hashlib
 import json
-from datetime import datetime
+import logging
+from sqlalchemy import and_
+from sqlalchemy.orm import joinedload, selectinload
 from flask_login import login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, TextAreaField
@@ -10,6 +33,7 @@ from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationE
 from werkzeug.security import generate_password_hash, check_password_hash
 
 bp = Blueprint('main', __name__)
+logger = logging.getLogger(__name__)
 
 # --- Forms ---
 class RegisterForm(FlaskForm):
@@ -41,16 +65,16 @@ def register():
     if form.validate_on_submit():
         username = form.username.data
         password = form.password.data
-        new_user = User(username=username)
+        new_user = User(username=username, shard=shard_for_new_user(username))
         new_user.set_password(password)  # Ensure this sets password_hash
         db.session.add(new_user)
         db.session.commit()
-        print("User before commit:", new_user.__dict__)  # Debug print moved here
+        logger.info("User registered: id=%s username=%s", new_user.id, new_user.username)
         flash('Registration successful! You can now log in.', 'success')
         return redirect(url_for('main.login'))
     # Debug form errors if validation fails
     if form.errors:
-        print("Form errors:", form.errors)
+        logger.debug("Register form errors: %s", form.errors)
     return render_template('register.html', form=form)
 
 @bp.route('/login', methods=['GET', 'POST'])
@@ -63,6 +87,11 @@ def login():
         password = form.password.data
         user = User.query.filter_by(username=username).first()
         if user and user.check_password(password):  # Assuming check_password verifies the hash
+            if needs_rehash(user.password_hash):
+                # Upgrade hashes made with older parameters while the plain password is at hand
+                user.set_password(password)
+                db.session.commit()
+                logger.info("Rehashed password for user id=%s", user.id)
             login_user(user)
             flash('Logged in successfully!', 'success')
             next_page = request.args.get('next')
@@ -88,13 +117,16 @@ def projects():
         if not project_name:
             flash('Project name is required!', 'error')
         else:
-            new_project = Project(name=project_name, description=project_description, user=current_user)
+            new_project = Project(name=project_name, description=project_description, user_id=current_user.id)
             db.session.add(new_project)
             db.session.commit()
             flash(f'Project "{project_name}" created successfully!', 'success')
             return redirect(url_for('main.projects'))
-    user_projects = Project.query.filter_by(user=current_user).order_by(Project.name).all()
-    return render_template('projects.html', projects=user_projects)
+    # Summaries come from project_stats in the same query, so the page never touches task rows
+    user_projects = (Project.query.filter_by(user_id=current_user.id, deleted_at=None)
+                     .options(joinedload(Project.stats)).order_by(Project.name).all())
+    return render_template('projects.html', projects=user_projects,
+                           summaries={project.id: serialize_stats(project.stats) for project in user_projects})
 
 @bp.route('/projects/<int:project_id>/delete', methods=['POST'])
 @login_required
@@ -104,63 +136,45 @@ def delete_project(project_id):
         flash('You do not have permission to delete this project.', 'error')
         return redirect(url_for('main.projects'))
     try:
-        # Delete all tasks associated with the project
-        Task.query.filter_by(project_id=project_id).delete()
-        db.session.delete(project)
-        db.session.commit()
-        flash('Project and its tasks deleted successfully!', 'success')
-    except Exception as e:
+        # The project disappears from every list now; a background job deletes its tasks in chunks
+        if project.deleted_at is None:
+            project.deleted_at = utcnow()
+            enqueue_job('delete_project', {'project_id': project.id}, user_id=current_user.id)
+            db.session.commit()
+            wake_job_workers()
+        flash('Project deleted. Its tasks are being removed in the background.', 'success')
+    except Exception:
         db.session.rollback()
         flash('An error occurred while deleting the project.', 'error')
-        print("Delete project error:", str(e))
+        logger.exception("Delete project %s failed", project_id)
     return redirect(url_for('main.projects'))
 
 @bp.route('/projects/<int:project_id>')
 @login_required
 def view_project(project_id):
-    project = Project.query.filter_by(id=project_id, user=current_user).first_or_404()
+    project = (Project.query.filter_by(id=project_id, user_id=current_user.id, deleted_at=None)
+               .options(joinedload(Project.stats)).first_or_404())
+    # Past a few thousand bars frappe-gantt stalls the browser; show the server-rendered SVG instead,
+    # and leave the task list to tasks.js rather than rendering every row into the page as well
+    if project.stats and project.stats.task_count > current_app.config['GANTT_CLIENT_MAX_TASKS']:
+        return render_template('tasks.html', project=project, tasks=None, gantt_svg=True)
     project_tasks = Task.query.filter_by(project=project).order_by(Task.name).all()
-    gantt_tasks_data = []
-    task_name_to_id = {task.name.strip(): str(task.id) for task in project_tasks}  # Strip whitespace
-    print("Task name to ID mapping:", task_name_to_id)  # Debug mapping
-    for task in project_tasks:
-        start_date_formatted = task.start_date.strftime('%Y-%m-%d') if task.start_date else ''
-        end_date_formatted = task.end_date.strftime('%Y-%m-%d') if task.end_date else ''
-        if start_date_formatted and end_date_formatted:
-            custom_class = 'bar-blue'
-            if task.status == 'Completed':
-                custom_class = 'bar-green'
-            elif task.status == 'In Progress':
-                custom_class = 'bar-yellow'
-            elif task.status == 'Blocked':
-                custom_class = 'bar-red'
-            gantt_task_item = {
-                'id': str(task.id),
-                'name': task.name,
-                'start': start_date_formatted,
-                'end': end_date_formatted,
-                'progress': task.progress,
-                'custom_class': custom_class,
-                'comment': task.comment if task.comment else 'No comment',
-            }
-            print(f"Task {task.id} raw dependency (name): {task.dependencies}")  # Debug raw value
-            if task.dependencies and task.dependencies != 'None':
-                dep_id = task_name_to_id.get(task.dependencies.strip())
-                print(f"Converted dependency for task {task.id}: {dep_id}")  # Debug conversion
-                if dep_id:
-                    gantt_task_item['dependencies'] = str(dep_id)  # Ensure string format
-            gantt_tasks_data.append(gantt_task_item)
-    # Sort by start date
-    gantt_tasks_data.sort(key=lambda x: datetime.strptime(x['start'], '%Y-%m-%d'))
-    gantt_tasks_json = json.dumps(gantt_tasks_data)
-    print("Gantt tasks JSON:", gantt_tasks_json)  # Debug final JSON
+    predecessors = predecessor_map(load_dependency_edges([project.id]))
+    gantt_tasks_json = json.dumps(serialize_gantt_tasks(project_tasks, predecessors))
     return render_template('tasks.html', project=project, tasks=project_tasks, gantt_tasks_json=gantt_tasks_json)
 
 # --- Task Management Routes ---
+def _get_live_task_or_404(task_id):
+    # A project waiting for its delete job is already gone, and so are its tasks
+    task = Task.query.get_or_404(task_id)
+    if task.project.deleted_at is not None:
+        abort(404)
+    return task
+
 @bp.route('/projects/<int:project_id>/add_task', methods=['GET', 'POST'])
 @login_required
 def add_task_to_project(project_id):
-    project = Project.query.get_or_404(project_id)
+    project = Project.query.filter_by(id=project_id, deleted_at=None).first_or_404()
     if project.user_id != current_user.id:
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({'success': False, 'message': 'You do not have permission to add tasks to this project.'}), 403
@@ -173,48 +187,64 @@ def add_task_to_project(project_id):
         progress = request.form.get('progress', '0')  # Default to 0 if not set
         status = request.form.get('status')
         dependencies = request.form.getlist('dependencies')  # Multiple values
-        errors = []
-        if not task_name:
-            errors.append('Task name is required.')
-        if not status:
-            errors.append('Status is required.')
-        try:
-            progress = int(progress)
-            if not (0 <= progress <= 100):
-                errors.append('Progress must be between 0 and 100.')
-        except ValueError:
-            errors.append('Progress must be a valid number.')
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
-        if start_date and end_date and start_date > end_date:
-            errors.append('End date cannot be before start date.')
-        dependencies_str = ','.join(dependencies) if dependencies and 'None' not in dependencies else None
+        values, errors = validate_task_fields(task_name, start_date_str, end_date_str, progress, status)
+        predecessors, dependency_errors = resolve_dependencies(project.id, dependencies)
+        errors.extend(dependency_errors)
         if errors:
-            print("Add task errors:", errors)  # Debug
+            logger.debug("Add task errors: %s", errors)
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return jsonify({'success': False, 'errors': errors}), 400
             for error in errors:
                 flash(error, 'error')
             return render_template('add_task_to_project.html', project=project), 400
         new_task = Task(
-            name=task_name,
-            start_date=start_date,
-            end_date=end_date,
-            progress=progress,
-            status=status,
-            dependencies=dependencies_str,
+            **values,
+            predecessors=predecessors,
             project_id=project.id,
             user_id=current_user.id
         )
+        since = project.version
         db.session.add(new_task)
         db.session.commit()
-        print("New task added:", new_task.id, new_task.name, "dependency:", new_task.dependencies)  # Debug
+        publish_project_changes(project.id, since)
+        logger.debug("Task added: id=%s project=%s dependencies=%s", new_task.id, project.id, len(predecessors))
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({'success': True, 'message': 'Task added successfully!', 'task_id': new_task.id, 'project_id': project.id}), 201
         flash('Task added successfully!', 'success')
         return redirect(url_for('main.view_project', project_id=project.id))
     return render_template('add_task_to_project.html', project=project)
 
+@bp.route('/projects/<int:project_id>/import', methods=['POST'])
+@login_required
+def import_project_tasks(project_id):
+    project = Project.query.filter_by(id=project_id, user_id=current_user.id, deleted_at=None).first_or_404()
+    # Either a multipart upload in "file" or the raw CSV/NDJSON request body
+    upload = request.files.get('file')
+    if upload:
+        stream, fmt = upload.stream, detect_format(upload.filename, upload.content_type)
+    else:
+        stream, fmt = request.stream, detect_format(content_type=request.content_type)
+    fmt = request.args.get('format') or fmt
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'Upload a .csv or .ndjson file or pass ?format=csv|ndjson.'}), 400
+    chunk_size = request.args.get('chunk_size', type=int) or current_app.config['IMPORT_CHUNK_SIZE']
+    if request.args.get('async') == '1':
+        # ?async=1: keep the upload and return at once; poll the job for progress and the report
+        path = spool_upload(stream, suffix=f'.{fmt}')
+        job = enqueue_job('import_tasks', {'project_id': project.id, 'path': path, 'fmt': fmt,
+                                           'chunk_size': max(chunk_size, 1)}, user_id=current_user.id)
+        db.session.commit()
+        wake_job_workers()
+        response = jsonify({'success': True, 'job': serialize_job(job)})
+        response.headers['Location'] = url_for('main.api_get_job', job_id=job.id)
+        return response, 202
+    since = project.version
+    report = import_tasks(project, stream, fmt, max(chunk_size, 1))
+    publish_project_changes(project.id, since)
+    logger.info("Imported tasks into project %s: imported=%s failed=%s dependencies=%s",
+                project.id, report['imported'], report['failed'], report['dependencies'])
+    return jsonify({'success': True, **report}), 200
+
 @bp.route('/tasks', methods=['GET'])
 @login_required
 def tasks():
@@ -224,7 +254,7 @@ def tasks():
 @bp.route('/tasks/<int:task_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_task(task_id):
-    task = Task.query.get_or_404(task_id)
+    task = _get_live_task_or_404(task_id)
     if task.project.user_id != current_user.id:
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({'success': False, 'message': 'You do not have permission to edit this task.'}), 403
@@ -238,64 +268,75 @@ def edit_task(task_id):
         status = request.form.get('status')
         dependencies = request.form.getlist('dependencies')  # Multiple values
         comment = request.form.get('comment')
-        errors = []
-        if not task_name:
-            errors.append('Task name is required.')
-        if not status:
-            errors.append('Status is required.')
-        try:
-            progress = int(progress)
-            if not (0 <= progress <= 100):
-                errors.append('Progress must be between 0 and 100.')
-        except ValueError:
-            errors.append('Progress must be a valid number.')
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
-        if start_date and end_date and start_date > end_date:
-            errors.append('End date cannot be before start date.')
+        since = task.project.version
+        values, errors = validate_task_fields(task_name, start_date_str, end_date_str, progress, status)
+        predecessors, dependency_errors = resolve_dependencies(task.project_id, dependencies, task_id=task.id)
+        errors.extend(dependency_errors)
         if errors:
-            print("Edit task errors:", errors)  # Debug
+            logger.debug("Edit task errors: %s", errors)
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return jsonify({'success': False, 'errors': errors}), 400
             for error in errors:
                 flash(error, 'error')
             return render_template('edit_task.html', task=task, current_project=task.project), 400
-        task.name = task_name
-        task.start_date = start_date
-        task.end_date = end_date
-        task.progress = progress
-        task.status = status
-        task.dependencies = ','.join(dependencies) if dependencies and 'None' not in dependencies else None
+        dates_changed = (task.start_date, task.end_date) != (values['start_date'], values['end_date'])
+        for field, value in values.items():
+            setattr(task, field, value)
+        task.predecessors = predecessors
         task.comment = comment
+        # Push dependents that would now start before this task ends; saved in the same commit
+        try:
+            moved_tasks = propagate_schedule(task) if dates_changed else []
+        except DependencyCycleError as e:
+            db.session.rollback()
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return jsonify({'success': False, 'errors': [str(e)]}), 409
+            flash(str(e), 'error')
+            return redirect(url_for('main.view_project', project_id=task.project_id))
         db.session.commit()
-        print("Task updated:", task.id, task.name, "dependency:", task.dependencies)  # Debug
+        publish_project_changes(task.project_id, since)
+        logger.debug("Task updated: id=%s dependencies=%s moved=%s", task.id, len(predecessors), len(moved_tasks))
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return jsonify({'success': True, 'message': 'Task updated successfully!', 'task_id': task.id, 'project_id': task.project_id}), 200
+            return jsonify({
+                'success': True,
+                'message': 'Task updated successfully!',
+                'task_id': task.id,
+                'project_id': task.project_id,
+                'moved_tasks': [{
+                    'id': str(moved.id),
+                    'start': format_date(moved.start_date),
+                    'end': format_date(moved.end_date)
+                } for moved in moved_tasks]
+            }), 200
         flash('Task updated successfully!', 'success')
+        if moved_tasks:
+            flash(f'{len(moved_tasks)} dependent task(s) were rescheduled.', 'info')
         return redirect(url_for('main.view_project', project_id=task.project_id))
     return render_template('edit_task.html', task=task, current_project=task.project)
 
 @bp.route('/tasks/<int:task_id>/delete', methods=['POST'])
 @login_required
 def delete_task(task_id):
-    task = Task.query.get_or_404(task_id)
+    task = _get_live_task_or_404(task_id)
     is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
-    print(f"DEBUG: Delete request for task {task_id}. Is AJAX: {is_ajax}")
+    logger.debug("Delete request for task %s (ajax=%s)", task_id, is_ajax)
     if task.project.user_id != current_user.id:
         if is_ajax:
             return jsonify({'success': False, 'message': 'You do not have permission to delete this task.'}), 403
         flash('You do not have permission to delete this task.', 'error')
         return redirect(url_for('main.view_project', project_id=task.project_id))
+    project_id, since = task.project_id, task.project.version
     try:
         db.session.delete(task)
         db.session.commit()
+        publish_project_changes(project_id, since)
         if is_ajax:
             return jsonify({'success': True, 'message': 'Task deleted successfully!'}), 200
         flash('Task deleted successfully!', 'success')
         return redirect(url_for('main.view_project', project_id=task.project_id))
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        print(f"Error deleting task: {e}")
+        logger.exception("Deleting task %s failed", task_id)
         if is_ajax:
             return jsonify({'success': False, 'message': 'An unexpected server error occurred while deleting the task.'}), 500
         flash('An unexpected error occurred while deleting the task.', 'error')
@@ -304,14 +345,16 @@ def delete_task(task_id):
 @bp.route('/projects/<int:project_id>/update_comment/<int:task_id>', methods=['POST'])
 @login_required
 def update_comment(project_id, task_id):
-    task = Task.query.get_or_404(task_id)
+    task = _get_live_task_or_404(task_id)
     if task.project.user_id != current_user.id or task.project_id != project_id:
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
     comment = request.get_json().get('comment')  # Handle JSON
     if comment:
+        since = task.project.version
         task.comment = comment.strip()
         try:
             db.session.commit()
+            publish_project_changes(project_id, since)
             return jsonify({'success': True, 'message': 'Comment updated!'})
         except Exception as e:
             db.session.rollback()
@@ -320,107 +363,333 @@ def update_comment(project_id, task_id):
 
 @bp.route('/api/projects', methods=['GET'])
 @login_required
+@read_only
 def api_get_all_projects():
-    print("--- DEBUG: api_get_all_projects function was called! ---")
-    projects = Project.query.filter_by(user=current_user).all()
-    print(f"Projects fetched for user {current_user.id}:")
-    for project in projects:
-        print(f"  Project ID: {project.id}, Name: {project.name}")
+    # Optional keyset pagination: ?limit=N&cursor=<last project id of previous page>
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', type=int)
+    if limit is not None and limit <= 0:
+        return jsonify({'success': False, 'message': 'limit must be a positive integer.'}), 400
+    if request.args.get('view') == 'summary':
+        return _api_project_summaries(limit, cursor)
+    dated = and_(Task.start_date.isnot(None), Task.end_date.isnot(None))
+    # One query for the page of projects plus one selectinload query for all of their dated tasks
+    query = (Project.query
+             .filter(Project.user_id == current_user.id, Project.deleted_at.is_(None), Project.tasks.any(dated))
+             .options(selectinload(Project.tasks.and_(dated)))
+             .order_by(Project.id))
+    if cursor is not None:
+        query = query.filter(Project.id > cursor)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    projects = query.all()
+    next_cursor = None
+    if limit is not None and len(projects) > limit:
+        projects = projects[:limit]
+        next_cursor = str(projects[-1].id)
+    logger.debug("Fetched %d projects for user %s", len(projects), current_user.id)
+    predecessors = predecessor_map(load_dependency_edges([project.id for project in projects]))
     projects_data = []
     for project in projects:
-        project_tasks = Task.query.filter_by(project=project).order_by(Task.start_date.asc()).all()
-        gantt_tasks_data = []
-        for task in project_tasks:
-            start_date_formatted = task.start_date.strftime('%Y-%m-%d') if task.start_date else None
-            end_date_formatted = task.end_date.strftime('%Y-%m-%d') if task.end_date else None
-            if not start_date_formatted or not end_date_formatted:
-                continue
-            custom_class = 'bar-blue'
-            if task.status == 'Completed':
-                custom_class = 'bar-green'
-            elif task.status == 'In Progress':
-                custom_class = 'bar-yellow'
-            elif task.status == 'Blocked':
-                custom_class = 'bar-red'
-            dependencies = task.dependencies if task.dependencies else ''
-            if isinstance(dependencies, list):
-                dependencies = ' '.join(str(dep) for dep in dependencies if dep)
-            gantt_task_item = {
-                'id': str(task.id),
-                'name': task.name,
-                'start': start_date_formatted,
-                'end': end_date_formatted,
-                'progress': task.progress or 0,
-                'custom_class': custom_class,
-                'comment': task.comment if task.comment else '',
-                'dependencies': dependencies
-            }
-            gantt_tasks_data.append(gantt_task_item)
-        if gantt_tasks_data:
-            projects_data.append({
-                'id': project.id,
-                'name': project.name,
-                'gantt_tasks': gantt_tasks_data
-            })
+        gantt_tasks_data = serialize_gantt_tasks(project.tasks, predecessors)
+        projects_data.append({
+            'id': project.id,
+            'name': project.name,
+            'gantt_tasks': gantt_tasks_data
+        })
     return jsonify({
         'success': True,
-        'projects': projects_data
+        'projects': projects_data,
+        'next_cursor': next_cursor
+    })
+
+def _api_project_summaries(limit, cursor):
+    # ?view=summary: one row per project from project_stats, no task rows, empty projects included
+    query = (Project.query
+             .filter(Project.user_id == current_user.id, Project.deleted_at.is_(None))
+             .options(joinedload(Project.stats))
+             .order_by(Project.id))
+    if cursor is not None:
+        query = query.filter(Project.id > cursor)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    projects = query.all()
+    next_cursor = None
+    if limit is not None and len(projects) > limit:
+        projects = projects[:limit]
+        next_cursor = str(projects[-1].id)
+    return jsonify({
+        'success': True,
+        'projects': [dict(serialize_stats(project.stats), id=project.id, name=project.name,
+                          version=project.version) for project in projects],
+        'next_cursor': next_cursor
     })
 
 @bp.route('/api/projects/<int:project_id>/tasks', methods=['GET'])
 @login_required
+@read_only
 def api_get_project_tasks(project_id):
-    print("--- DEBUG: api_get_project_tasks function was called! ---")
-    project = Project.query.filter_by(id=project_id, user=current_user).first_or_404()
-    project_tasks = Task.query.filter_by(project=project).order_by(Task.start_date.asc()).all()
-    print(f"Tasks fetched for project {project_id}, ordered by start_date:")
-    for task in project_tasks:
-        print(f"  Task ID: {task.id}, Name: {task.name}, Start Date: {task.start_date}, Comment: {task.comment}")
-    tasks_data = []
-    gantt_tasks_data = []
-    for task in project_tasks:
-        tasks_data.append({
-            'id': task.id,
-            'name': task.name,
-            'start_date': task.start_date.strftime('%Y-%m-%d') if task.start_date else '',
-            'end_date': task.end_date.strftime('%Y-%m-%d') if task.end_date else '',
-            'progress': task.progress,
-            'status': task.status,
-            'dependencies': task.dependencies if task.dependencies else '',
-            'comment': task.comment if task.comment else ''  # Add comment here
-        })
-        start_date_formatted = task.start_date.strftime('%Y-%m-%d') if task.start_date else ''
-        end_date_formatted = task.end_date.strftime('%Y-%m-%d') if task.end_date else ''
-        custom_class = 'bar-blue'
-        if task.status == 'Completed':
-            custom_class = 'bar-green'
-        elif task.status == 'In Progress':
-            custom_class = 'bar-yellow'
-        elif task.status == 'Blocked':
-            custom_class = 'bar-red'
-        gantt_task_item = {
-            'id': str(task.id),
-            'name': task.name,
-            'start': start_date_formatted,
-            'end': end_date_formatted,
-            'progress': task.progress,
-            'custom_class': custom_class,
-            'comment': task.comment if task.comment else ''  # Add comment here
-        }
-        if task.dependencies:
-            gantt_task_item['dependencies'] = task.dependencies
-        gantt_tasks_data.append(gantt_task_item)
-    return jsonify({
+    # Only the version is read up front so an unchanged project costs no task loads
+    version = (db.session.query(Project.version)
+               .filter_by(id=project_id, user_id=current_user.id, deleted_at=None).scalar())
+    if version is None:
+        abort(404)
+    # Optional Gantt viewport: ?from=&to= returns only the tasks on screen and their dependency endpoints
+    try:
+        date_from, date_to = parse_window(request.args)
+    except TaskQueryError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    windowed = bool(date_from or date_to)
+    etag = project_etag(project_id, version, f'{format_date(date_from)}_{format_date(date_to)}' if windowed else '')
+    not_modified = not_modified_response(etag)
+    if not_modified is not None:
+        return not_modified
+    if windowed:
+        project_tasks, edges = load_window(project_id, date_from, date_to)
+    else:
+        project_tasks = Task.query.filter_by(project_id=project_id).order_by(Task.start_date.asc()).all()
+        edges = load_dependency_edges([project_id])
+    logger.debug("Fetched %d tasks for project %s", len(project_tasks), project_id)
+    predecessors = predecessor_map(edges)
+    return with_etag(jsonify({
         'success': True,
-        'tasks': tasks_data,
-        'gantt_tasks': gantt_tasks_data,
+        'tasks': [serialize_task(task, format_dependencies(predecessors, task.id)) for task in project_tasks],
+        'gantt_tasks': serialize_gantt_tasks(project_tasks, predecessors),
+        'sync_token': str(version),
         'messages': []
+    }), etag)
+
+@bp.route('/projects/<int:project_id>/gantt.svg', methods=['GET'])
+@login_required
+@read_only
+def project_gantt_svg(project_id):
+    # Read-only, printable timeline: ?from=&to= viewport and ?scale=day|week|month, cached per project version
+    project = Project.query.filter_by(id=project_id, user_id=current_user.id, deleted_at=None).first_or_404()
+    scale = request.args.get('scale', DEFAULT_SCALE)
+    if scale not in SCALES:
+        return jsonify({'success': False, 'message': f"scale must be one of: {', '.join(SCALES)}."}), 400
+    try:
+        date_from, date_to = parse_window(request.args)
+    except TaskQueryError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    variant = f'svg-{scale}-{format_date(date_from)}_{format_date(date_to)}'
+    etag = project_etag(project.id, project.version, variant)
+    not_modified = not_modified_response(etag)
+    if not_modified is not None:
+        return not_modified
+    cache = current_app.extensions['gantt_svg_cache']
+    key = (active_shard(), project.id, project.version, variant)
+    rendered = cache.get(key)
+    if rendered is None:
+        if date_from or date_to:
+            project_tasks, edges = load_window(project.id, date_from, date_to)
+        else:
+            project_tasks = Task.query.filter_by(project_id=project.id).all()
+            edges = load_dependency_edges([project.id])
+        rendered = cache.put(key, render_gantt_svg(project_tasks, edges, project.name, date_from, date_to, scale))
+    svg, compressed = rendered
+    response = Response(svg, mimetype='image/svg+xml')
+    response.vary.add('Accept-Encoding')
+    if request.accept_encodings['gzip']:
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return with_etag(response, etag)
+
+@bp.route('/api/projects/<int:project_id>/tasks/batch', methods=['POST'])
+@login_required
+def api_batch_tasks(project_id):
+    # {"operations": [{"op": "create"|"update"|"delete", "id": ..., "ref": ..., "fields": {...}}, ...]}
+    project = Project.query.filter_by(id=project_id, user_id=current_user.id, deleted_at=None).first_or_404()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'message': 'Send a JSON object with an operations list.'}), 400
+    since = project.version
+    try:
+        ok, results, moved_tasks = apply_batch(project, data.get('operations'))
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except DependencyCycleError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 409
+    if not ok:
+        db.session.rollback()
+        return jsonify({'success': False, 'results': results}), 400
+    db.session.commit()
+    publish_project_changes(project.id, since)
+    logger.debug("Batch on project %s: operations=%d moved=%d", project.id, len(results), len(moved_tasks))
+    return jsonify({
+        'success': True,
+        'results': results,
+        'moved_tasks': [{
+            'id': str(moved.id),
+            'start': format_date(moved.start_date),
+            'end': format_date(moved.end_date)
+        } for moved in moved_tasks],
+        'sync_token': str(project.version)
     })
 
+@bp.route('/api/projects/<int:project_id>/changes', methods=['GET'])
+@login_required
+@read_only
+def api_get_project_changes(project_id):
+    # Delta sync: ?since=<sync_token from a previous tasks or changes response>
+    project = Project.query.filter_by(id=project_id, user_id=current_user.id, deleted_at=None).first_or_404()
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'success': False, 'message': 'since must be a sync token.'}), 400
+    return jsonify(dict(changes_since(project, since), success=True))
+
+@bp.route('/api/projects/<int:project_id>/events', methods=['GET'])
+@login_required
+@read_only
+def api_project_events(project_id):
+    # Server-sent events: each write to the project pushes the delta the changes endpoint would return
+    project = Project.query.filter_by(id=project_id, user_id=current_user.id, deleted_at=None).first_or_404()
+    hub = current_app.extensions['event_hub']
+    try:
+        subscription = hub.subscribe(project_topic(project.id))
+    except StreamLimitReached:
+        # Streams hold a thread each; past the limit the page polls the changes endpoint instead
+        response = jsonify({'success': False, 'message': 'Too many live streams open; poll the changes endpoint.'})
+        response.headers['Retry-After'] = str(current_app.config['EVENTS_RETRY_AFTER'])
+        return response, 503
+    # A reconnecting EventSource sends the last token it saw; catch it up before going live
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+    first = changes_event(changes_since(project, since)) if since is not None and since != project.version else None
+    body = stream_events(hub, subscription, first, keepalive=current_app.config['EVENTS_KEEPALIVE'],
+                         max_seconds=current_app.config['EVENTS_MAX_STREAM_SECONDS'])
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Let nginx pass events through unbuffered
+    response.call_on_close(lambda: hub.unsubscribe(subscription))  # Also when the stream never started
+    return response
+
+@bp.route('/api/projects/<int:project_id>/tasks/query', methods=['GET'])
+@login_required
+@read_only
+def api_query_project_tasks(project_id):
+    # Filtered, sparse, keyset-paginated task listing; see task_query.parse_task_query for parameters
+    version = (db.session.query(Project.version)
+               .filter_by(id=project_id, user_id=current_user.id, deleted_at=None).scalar())
+    if version is None:
+        abort(404)
+    try:
+        spec = parse_task_query(request.args)
+    except TaskQueryError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    # Every page of every query is its own representation of the project version
+    etag = project_etag(project_id, version, hashlib.sha1(request.query_string).hexdigest()[:16])
+    not_modified = not_modified_response(etag)
+    if not_modified is not None:
+        return not_modified
+    tasks, next_cursor = run_task_query(project_id, spec)
+    return with_etag(jsonify({
+        'success': True,
+        'tasks': tasks,
+        'next_cursor': next_cursor
+    }), etag)
+
+@bp.route('/api/search', methods=['GET'])
+@login_required
+@read_only
+def api_search():
+    # Ranked full-text search over the user's tasks and projects: ?q=&kind=task|project&limit=&cursor=
+    try:
+        hits, next_cursor = search(current_user.id, parse_search(request.args))
+    except SearchError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({
+        'success': True,
+        'results': hits,
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/api/analytics', methods=['GET'])
+@login_required
+@read_only
+def api_analytics():
+    # Burndown, earned value and daily load over the user's projects: ?project_id=&from=&to=&as_of=
+    try:
+        analytics = portfolio_analytics(current_user.id, parse_analytics(request.args))
+    except AnalyticsError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, **analytics})
+
+@bp.route('/api/projects/<int:project_id>/schedule', methods=['GET'])
+@login_required
+@read_only
+def api_get_project_schedule(project_id):
+    project = Project.query.filter_by(id=project_id, user_id=current_user.id, deleted_at=None).first_or_404()
+    project_tasks = Task.query.filter_by(project_id=project.id).all()
+    try:
+        schedule, critical_path = compute_schedule(project_tasks, load_dependency_edges([project.id]))
+    except DependencyCycleError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    return jsonify({
+        'success': True,
+        'critical_path': [str(task_id) for task_id in critical_path],
+        'tasks': [{
+            'id': str(task_id),
+            'earliest_start': format_date(entry['earliest_start']),
+            'earliest_finish': format_date(entry['earliest_finish']),
+            'latest_start': format_date(entry['latest_start']),
+            'latest_finish': format_date(entry['latest_finish']),
+            'slack': entry['slack'],
+            'critical': entry['critical'],
+        } for task_id, entry in schedule.items()]
+    })
+
+@bp.route('/api/export', methods=['GET'])
+@login_required
+@read_only
+def api_export():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'format must be ndjson or csv.'}), 400
+    project_id = request.args.get('project_id', type=int)
+    # Streamed straight from the database cursor; the first bytes go out before the query finishes
+    body = iter_export(current_user.id, fmt, project_id=project_id,
+                       batch_size=current_app.config['EXPORT_BATCH_SIZE'])
+    response = Response(stream_with_context(body), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=projects-export.{fmt}'
+    return response
+
+@bp.route('/api/jobs', methods=['GET'])
+@login_required
+@read_only
+def api_get_jobs():
+    # The user's most recent background jobs, newest first: ?limit=N (default 20, at most 100)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    jobs = Job.query.filter_by(user_id=current_user.id).order_by(Job.id.desc()).limit(limit).all()
+    return jsonify({'success': True, 'jobs': [serialize_job(job) for job in jobs]})
+
+@bp.route('/api/jobs/<int:job_id>', methods=['GET'])
+@login_required
+@read_only
+def api_get_job(job_id):
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    return jsonify({'success': True, 'job': serialize_job(job)})
+
+@bp.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def api_cancel_job(job_id):
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    try:
+        cancel_job(job)
+    except JobError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    return jsonify({'success': True, 'job': serialize_job(job)})
+
 @bp.route('/api/tasks/<int:task_id>/comment', methods=['GET', 'POST'])
 @login_required
 def task_comment_api(task_id):
-    task = Task.query.get_or_404(task_id)
+    task = _get_live_task_or_404(task_id)
     if task.project.user_id != current_user.id:
         return jsonify({'success': False, 'message': 'Unauthorized'}), 403
     if request.method == 'GET':
@@ -431,9 +700,11 @@ def task_comment_api(task_id):
     elif request.method == 'POST':
         data = request.get_json()
         new_comment = data.get('comment', '').strip()
+        since = task.project.version
         task.comment = new_comment
         try:
             db.session.commit()
+            publish_project_changes(task.project_id, since)
             return jsonify({
                 'success': True,
                 'message': 'Comment updated successfully!',
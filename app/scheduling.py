@@ -0,0 +1,86 @@
+from datetime import timedelta
+from sqlalchemy import select
+from .extensions import db
+from .graph import predecessor_map, topological_order
+from .models import Task, task_dependency
+
+
+def _downstream_edges(task_ids):
+    """Edges of the subgraph reachable from ``task_ids``, fetched one level per query."""
+    edges = []
+    seen = set(task_ids)
+    frontier = list(seen)
+    while frontier:
+        rows = db.session.execute(
+            select(task_dependency.c.predecessor_id, task_dependency.c.successor_id)
+            .where(task_dependency.c.predecessor_id.in_(frontier))
+        ).all()
+        frontier = []
+        for predecessor_id, successor_id in rows:
+            edges.append((predecessor_id, successor_id))
+            if successor_id not in seen:
+                seen.add(successor_id)
+                frontier.append(successor_id)
+    return seen, edges
+
+
+def propagate_schedule(task):
+    """Shift tasks downstream of ``task`` so none starts before a predecessor ends.
+
+    Only the subgraph reachable from ``task`` is loaded. Each dependent is
+    visited in topological order and, if it starts on or before the end date
+    of any predecessor, it moves forward to the day after the latest one,
+    keeping its duration. Tasks are never moved earlier. Changes are left in
+    the session so the caller commits them together with the edit itself.
+    Returns the moved tasks in the order they were processed.
+    """
+    return propagate_schedules([task])
+
+
+def propagate_schedules(roots):
+    """``propagate_schedule`` for several edited tasks at once, walking their union once.
+
+    The roots themselves keep the dates they were given.
+    """
+    roots = {root.id: root for root in roots}
+    affected, edges = _downstream_edges(roots)
+    affected.difference_update(roots)
+    if not affected:
+        return []
+    tasks = {t.id: t for t in Task.query.filter(Task.id.in_(affected)).all()}
+    tasks.update(roots)
+
+    # Predecessors outside the subgraph still constrain it, but only their end dates are needed
+    inbound = db.session.execute(
+        select(task_dependency.c.predecessor_id, task_dependency.c.successor_id)
+        .where(task_dependency.c.successor_id.in_(affected))
+    ).all()
+    outside_ids = {p for p, _ in inbound if p not in tasks}
+    end_dates = {}
+    if outside_ids:
+        end_dates = dict(db.session.execute(
+            select(Task.id, Task.end_date).where(Task.id.in_(outside_ids))
+        ).all())
+
+    predecessors = predecessor_map(inbound)
+    moved = []
+    for task_id in topological_order(list(tasks), edges):
+        if task_id in roots:
+            continue
+        dependent = tasks[task_id]
+        if not dependent.start_date:
+            continue
+        latest_end = None
+        for predecessor_id in predecessors.get(task_id, ()):
+            predecessor = tasks.get(predecessor_id)
+            end_date = predecessor.end_date if predecessor is not None else end_dates.get(predecessor_id)
+            if end_date and (latest_end is None or end_date > latest_end):
+                latest_end = end_date
+        if latest_end is None or dependent.start_date > latest_end:
+            continue
+        shift = latest_end + timedelta(days=1) - dependent.start_date
+        dependent.start_date += shift
+        if dependent.end_date:
+            dependent.end_date += shift
+        moved.append(dependent)
+    return moved
@@ -0,0 +1,127 @@
+import re
+from markupsafe import escape
+from sqlalchemy import text
+from .extensions import db
+
+SEARCH_KINDS = ('task', 'project')
+SEARCH_TABLES = ('task_search', 'project_search')
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_TERMS = 16
+TERM = re.compile(r'\w+')
+# Snippet markers that cannot occur in user text; swapped for <mark> after HTML-escaping
+MARK_START, MARK_END = '\x02', '\x03'
+
+TASK_HITS = """
+    SELECT 'task' AS kind, task.id AS id, task.project_id AS project_id, project.name AS project_name,
+           task.name AS name, highlight(task_search, 1, :mark_start, :mark_end) AS highlight,
+           snippet(task_search, 2, :mark_start, :mark_end, '…', 12) AS snippet,
+           task_search.rank AS rank
+    FROM task_search
+    JOIN task ON task.id = task_search.rowid
+    JOIN project ON project.id = task.project_id
+    WHERE task_search MATCH :match AND project.deleted_at IS NULL
+"""
+PROJECT_HITS = """
+    SELECT 'project' AS kind, project.id AS id, project.id AS project_id, project.name AS project_name,
+           project.name AS name, highlight(project_search, 1, :mark_start, :mark_end) AS highlight,
+           snippet(project_search, 2, :mark_start, :mark_end, '…', 12) AS snippet,
+           project_search.rank AS rank
+    FROM project_search
+    JOIN project ON project.id = project_search.rowid
+    WHERE project_search MATCH :match AND project.deleted_at IS NULL
+"""
+SEARCH_SQL = {
+    'task': TASK_HITS,
+    'project': PROJECT_HITS,
+}
+
+
+class SearchError(ValueError):
+    """Raised for search parameters that cannot be satisfied; served as 400."""
+
+
+def build_match(query, user_id):
+    """Turn free text into an FTS5 MATCH expression limited to ``user_id``'s rows.
+
+    Every word must appear in the name or body; the last word also matches as
+    a prefix so results follow the user while typing. Words are quoted, so
+    FTS5 operators in the input are searched for literally.
+    """
+    terms = TERM.findall(query)[:MAX_TERMS]
+    if not terms:
+        raise SearchError('q must contain at least one word.')
+    quoted = [f'"{term}"' for term in terms]
+    if not query[-1:].isspace():
+        quoted[-1] += '*'
+    return f'owner : "{int(user_id)}" AND {{name body}} : ({" AND ".join(quoted)})'
+
+
+def parse_search(args):
+    """Validate ``q``, ``kind``, ``limit`` and ``cursor`` into a spec dict."""
+    kinds = SEARCH_KINDS
+    if args.get('kind'):
+        if args['kind'] not in SEARCH_KINDS:
+            raise SearchError(f"kind must be one of: {', '.join(SEARCH_KINDS)}.")
+        kinds = (args['kind'],)
+    try:
+        limit = int(args['limit']) if args.get('limit') else DEFAULT_LIMIT
+        offset = int(args['cursor']) if args.get('cursor') else 0
+    except ValueError:
+        raise SearchError('limit and cursor must be integers.') from None
+    if not 1 <= limit <= MAX_LIMIT:
+        raise SearchError(f'limit must be between 1 and {MAX_LIMIT}.')
+    if offset < 0:
+        raise SearchError('cursor is not valid.')
+    return {'q': args.get('q', ''), 'kinds': kinds, 'limit': limit, 'offset': offset}
+
+
+def _highlight(snippet):
+    return str(escape(snippet or '')).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def search(user_id, spec):
+    """Rank ``user_id``'s tasks and projects against ``spec['q']``; returns ``(hits, next_cursor)``.
+
+    FTS5 answers from its inverted index (bm25, name weighted over body), so
+    the cost follows the number of matching rows rather than the table size.
+    Ranked results page by offset; the cursor is the offset of the next page.
+    ``highlight`` is the name and ``snippet`` an excerpt of the comment or
+    description, both HTML-escaped with the matches wrapped in ``<mark>``.
+    """
+    match = build_match(spec['q'], user_id)
+    sql = ' UNION ALL '.join(SEARCH_SQL[kind] for kind in spec['kinds'])
+    sql = f'SELECT * FROM ({sql}) ORDER BY rank, kind, id LIMIT :limit OFFSET :offset'
+    rows = db.session.execute(text(sql), {
+        'match': match, 'mark_start': MARK_START, 'mark_end': MARK_END,
+        'limit': spec['limit'] + 1, 'offset': spec['offset'],
+    }).mappings().all()
+    next_cursor = None
+    if len(rows) > spec['limit']:
+        rows = rows[:spec['limit']]
+        next_cursor = str(spec['offset'] + spec['limit'])
+    hits = [{
+        'kind': row['kind'],
+        'id': row['id'],
+        'project_id': row['project_id'],
+        'project_name': row['project_name'],
+        'name': row['name'],
+        'highlight': _highlight(row['highlight']),
+        'snippet': _highlight(row['snippet']),
+    } for row in rows]
+    return hits, next_cursor
+
+
+def rebuild_search_index(session):
+    """Repopulate the search tables from task and project; used by `flask rebuild-search-index`."""
+    connection = session.connection()
+    for table in SEARCH_TABLES:
+        connection.execute(text(f'DELETE FROM {table}'))
+    connection.execute(text('INSERT INTO task_search(rowid, owner, name, body) '
+                            'SELECT id, user_id, name, comment FROM task'))
+    connection.execute(text('INSERT INTO project_search(rowid, owner, name, body) '
+                            'SELECT id, user_id, name, description FROM project'))
+    for table in SEARCH_TABLES:
+        connection.execute(text(f"INSERT INTO {table}({table}) VALUES ('optimize')"))
+    return connection.execute(text('SELECT (SELECT COUNT(*) FROM task_search) + '
+                                   '(SELECT COUNT(*) FROM project_search)')).scalar()
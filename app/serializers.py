@@ -0,0 +1,63 @@
+# Gantt bar colour for each task status; anything unknown renders as 'To Do'
+STATUS_CLASSES = {
+    'To Do': 'bar-blue',
+    'In Progress': 'bar-yellow',
+    'Completed': 'bar-green',
+    'Blocked': 'bar-red',
+}
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def status_class(status):
+    return STATUS_CLASSES.get(status, 'bar-blue')
+
+
+def format_date(value):
+    return value.strftime(DATE_FORMAT) if value else ''
+
+
+def serialize_task(task, dependency_ids=''):
+    """Plain task dict used by the task list in tasks.js."""
+    return {
+        'id': task.id,
+        'name': task.name,
+        'start_date': format_date(task.start_date),
+        'end_date': format_date(task.end_date),
+        'progress': task.progress,
+        'status': task.status,
+        'dependencies': dependency_ids,
+        'comment': task.comment if task.comment else ''
+    }
+
+
+def serialize_gantt_task(task, dependency_ids=''):
+    """Frappe Gantt bar for a task that has both a start and an end date."""
+    return {
+        'id': str(task.id),
+        'name': task.name,
+        'start': format_date(task.start_date),
+        'end': format_date(task.end_date),
+        'progress': task.progress or 0,
+        'custom_class': status_class(task.status),
+        'comment': task.comment if task.comment else '',
+        'dependencies': dependency_ids
+    }
+
+
+def format_dependencies(predecessors, task_id):
+    """Comma-separated predecessor ids in the format frappe-gantt expects."""
+    return ','.join(str(predecessor_id) for predecessor_id in predecessors.get(task_id, ()))
+
+
+def serialize_gantt_tasks(tasks, predecessors):
+    """Gantt bars for the dated tasks of one project, ordered by start date.
+
+    ``predecessors`` maps task id to predecessor ids (see graph.predecessor_map).
+    """
+    gantt_tasks = [
+        serialize_gantt_task(task, format_dependencies(predecessors, task.id))
+        for task in tasks
+        if task.start_date and task.end_date
+    ]
+    gantt_tasks.sort(key=lambda item: item['start'])
+    return gantt_tasks
@@ -0,0 +1,211 @@
+import zlib
+from flask import current_app, g
+from sqlalchemy import delete, func, insert, or_, select, update
+from .database import active_shard
+from .extensions import db
+from .identity import invalidate_identity
+from .models import Job, Project, ProjectStats, Task, TaskTombstone, User, task_dependency
+from .stats import refresh_project_stats
+
+# Name of the primary database in commands and reports; users on it have shard None
+PRIMARY = 'primary'
+COPY_CHUNK = 1000
+
+project_table = Project.__table__
+task_table = Task.__table__
+
+
+class ShardError(ValueError):
+    """Raised for shard operations that cannot be carried out."""
+
+
+def shard_names():
+    return list(current_app.config['DATABASE_SHARDS'])
+
+
+def all_shards():
+    """Every database holding tenant data: the primary (None) and the configured shards."""
+    return [None] + shard_names()
+
+
+def shard_label(shard):
+    return shard or PRIMARY
+
+
+def parse_shard(name):
+    shard = None if name == PRIMARY else name
+    if shard not in all_shards():
+        raise ShardError(f"Unknown shard {name!r}; choose from: {', '.join(map(shard_label, all_shards()))}.")
+    return shard
+
+
+def engine_for(shard):
+    return db.engines[shard]
+
+
+def shard_for_new_user(username):
+    """Shard for a new user's data: a stable hash of the name over the configured shards.
+
+    Existing users keep the shard recorded on their row, so adding a shard
+    only changes where new users go; `flask shards rebalance` moves the rest.
+    """
+    names = shard_names()
+    return names[zlib.crc32(username.encode()) % len(names)] if names else None
+
+
+def use_shard(shard):
+    """Route tenant statements in this app context to ``shard``; for jobs and commands."""
+    g.db_shard = shard
+
+
+def use_user_shard(user_id):
+    use_shard(db.session.scalar(select(User.shard).where(User.id == user_id)) if user_id else None)
+
+
+def project_topic(project_id):
+    """Key for a project's live events; project ids are only unique within a shard."""
+    shard = active_shard()
+    return f'{shard}:{project_id}' if shard else str(project_id)
+
+
+def user_weights(shard):
+    """``{user_id: task count}`` for the users whose data lives on ``shard``."""
+    owners = set(db.session.scalars(select(User.id).where(
+        User.shard.is_(None) if shard is None else User.shard == shard)))
+    with engine_for(shard).connect() as connection:
+        rows = connection.execute(
+            select(project_table.c.user_id, func.count(task_table.c.id))
+            .select_from(project_table)
+            .outerjoin(task_table, task_table.c.project_id == project_table.c.id)
+            .group_by(project_table.c.user_id)
+        ).all()
+    return {user_id: count for user_id, count in rows if user_id in owners}
+
+
+def plan_rebalance(weights, shards):
+    """Moves ``[(user_id, source, target)]`` that even out task counts over ``shards``.
+
+    ``weights`` maps each database to its ``{user_id: tasks}``. Users on a
+    database outside ``shards`` (the primary, or a shard being retired) are
+    all moved in, largest first, to the emptiest shard. Then, while some
+    user on the fullest shard would narrow its gap to the emptiest, the
+    one that closes it most is moved across. Each such move lowers the sum
+    of squared loads, so the loop ends.
+    """
+    origin = {user_id: source for source, users in weights.items() for user_id in users}
+    placed = {shard: dict(weights.get(shard, {})) for shard in shards}
+    load = {shard: sum(users.values()) for shard, users in placed.items()}
+    for source, users in weights.items():
+        if source in placed:
+            continue
+        for user_id, tasks in sorted(users.items(), key=lambda item: -item[1]):
+            target = min(shards, key=load.get)
+            placed[target][user_id] = tasks
+            load[target] += tasks
+    while True:
+        heavy, light = max(shards, key=load.get), min(shards, key=load.get)
+        gap = load[heavy] - load[light]
+        candidates = [(tasks, user_id) for user_id, tasks in placed[heavy].items() if 0 < tasks < gap]
+        if not candidates:
+            break
+        tasks, user_id = max(candidates, key=lambda candidate: min(candidate[0], gap - candidate[0]))
+        placed[light][user_id] = placed[heavy].pop(user_id)
+        load[heavy] -= tasks
+        load[light] += tasks
+    return sorted((user_id, origin[user_id], shard) for shard, users in placed.items()
+                  for user_id in users if origin[user_id] != shard)
+
+
+def copy_user_to_shard(user_id, target, chunk_size=COPY_CHUNK):
+    """Copy a user's projects and tasks to ``target`` and point the user there.
+
+    The source shard's write lock is held from the first read until the
+    user row is switched, so nothing written meanwhile is left behind.
+    Rows get new ids on the target, where the search and interval
+    triggers index them. Tombstones are not copied: projects start with
+    ``pruned_version`` at their current version, so clients resync in full.
+    The source copy stays until ``purge_user`` removes it. Call that once
+    other processes' cached identities (IDENTITY_CACHE_TTL) have stopped
+    routing the user to the source. Returns ``(source shard, row counts)``.
+    """
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise ShardError(f'User {user_id} does not exist.')
+    source = user.shard
+    if source == target:
+        raise ShardError(f'User {user_id} is already on {shard_label(target)}.')
+    running = db.session.scalar(select(func.count()).select_from(Job).where(
+        Job.user_id == user_id, Job.status.in_(('queued', 'running'))))
+    if running:
+        raise ShardError(f'User {user_id} has {running} unfinished jobs; move them once the jobs are done.')
+    # End the session's read transaction so it cannot hold up the locks taken below
+    db.session.commit()
+    # Whatever an interrupted earlier move left on the target is not the user's live data
+    purge_user(target, user_id)
+    switch = update(User.__table__).where(User.__table__.c.id == user_id).values(shard=target)
+    with engine_for(source).connect() as src, src.begin():
+        # A no-op write takes SQLite's write lock, keeping the user's data still while it is copied
+        src.execute(update(project_table).where(project_table.c.user_id == user_id)
+                    .values(version=project_table.c.version))
+        with engine_for(target).begin() as dst:
+            counts = _copy_user(src, dst, user_id, chunk_size)
+        # The user row is on the primary; when that is the source too, only this connection can write it
+        if source is None:
+            src.execute(switch)
+        else:
+            with engine_for(None).begin() as primary:
+                primary.execute(switch)
+    # Core writes skip the ORM events that evict cached identities; other processes wait out the TTL
+    invalidate_identity(user_id)
+    db.session.expire(user)
+    return source, counts
+
+
+def _copy_user(src, dst, user_id, chunk_size):
+    project_ids = {}
+    for row in src.execute(select(project_table).where(project_table.c.user_id == user_id)).mappings():
+        values = dict(row)
+        old_id = values.pop('id')
+        values['pruned_version'] = values['version']
+        project_ids[old_id] = dst.execute(insert(project_table).values(values)).inserted_primary_key[0]
+
+    user_projects = select(project_table.c.id).where(project_table.c.user_id == user_id)
+    task_ids = {}
+    insert_tasks = insert(task_table).returning(task_table.c.id, sort_by_parameter_order=True)
+    tasks = src.execute(select(task_table).where(task_table.c.project_id.in_(user_projects)))
+    for rows in tasks.mappings().partitions(chunk_size):
+        values = [dict(row, project_id=project_ids[row['project_id']]) for row in rows]
+        old_ids = [value.pop('id') for value in values]
+        task_ids.update(zip(old_ids, dst.execute(insert_tasks, values).scalars()))
+
+    user_tasks = select(task_table.c.id).where(task_table.c.project_id.in_(user_projects))
+    edges = src.execute(select(task_dependency.c.predecessor_id, task_dependency.c.successor_id)
+                        .where(task_dependency.c.successor_id.in_(user_tasks)))
+    dependencies = 0
+    for rows in edges.partitions(chunk_size):
+        values = [{'predecessor_id': task_ids[predecessor], 'successor_id': task_ids[successor]}
+                  for predecessor, successor in rows if predecessor in task_ids]
+        if values:
+            dst.execute(insert(task_dependency), values)
+            dependencies += len(values)
+    refresh_project_stats(dst, project_ids.values())
+    return {'projects': len(project_ids), 'tasks': len(task_ids), 'dependencies': dependencies}
+
+
+def purge_user(shard, user_id):
+    """Delete a user's projects and tasks from ``shard``, one project per transaction."""
+    engine = engine_for(shard)
+    with engine.connect() as connection:
+        project_ids = connection.scalars(select(project_table.c.id)
+                                         .where(project_table.c.user_id == user_id)).all()
+    for project_id in project_ids:
+        project_tasks = select(task_table.c.id).where(task_table.c.project_id == project_id)
+        with engine.begin() as connection:
+            connection.execute(delete(task_dependency).where(or_(
+                task_dependency.c.predecessor_id.in_(project_tasks),
+                task_dependency.c.successor_id.in_(project_tasks))))
+            connection.execute(delete(task_table).where(task_table.c.project_id == project_id))
+            connection.execute(delete(TaskTombstone.__table__).where(TaskTombstone.project_id == project_id))
+            connection.execute(delete(ProjectStats.__table__).where(ProjectStats.project_id == project_id))
+            connection.execute(delete(project_table).where(project_table.c.id == project_id))
+    return len(project_ids)
@@ -96,6 +96,21 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     };
 
+    // Apply {id, start, end} patches (e.g. moved_tasks from an edit) without refetching
+    window.patchGanttTasks = function(patches) {
+        if (!gantt || !Array.isArray(patches) || patches.length === 0) {
+            return;
+        }
+        patches.forEach(function(patch) {
+            const task = window.tasks.find(t => t.id === patch.id);
+            if (task) {
+                task.start = patch.start;
+                task.end = patch.end;
+            }
+        });
+        gantt.refresh(window.tasks);
+    };
+
     document.querySelector('.close-button').addEventListener('click', closeCommentModal);
     document.getElementById('saveCommentButton')?.addEventListener('click', function() {
         const taskId = parseInt(tasks.find(t => t.name === document.getElementById('commentTaskName').textContent).id);
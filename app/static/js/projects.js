@@ -89,18 +89,8 @@ $(document).ready(function() {
                                     let end = task.end || '';
                                     if (start && !isNaN(Date.parse(start))) start = new Date(start).toISOString().split('T')[0];
                                     if (end && !isNaN(Date.parse(end))) end = new Date(end).toISOString().split('T')[0];
+                                    // Dependencies already arrive as comma-separated task ids
                                     let dependencies = task.dependencies || '';
-                                    if (dependencies && typeof dependencies === 'string') {
-                                        dependencies = dependencies.trim().split(' ').map(depName => {
-                                            const depTask = project.gantt_tasks.find(t => t.name === depName);
-                                            return depTask ? depTask.id : '';
-                                        }).filter(id => id).join(' ');
-                                    } else if (Array.isArray(dependencies)) {
-                                        dependencies = dependencies.map(depName => {
-                                            const depTask = project.gantt_tasks.find(t => t.name === depName);
-                                            return depTask ? depTask.id : '';
-                                        }).filter(id => id).join(' ');
-                                    }
                                     return {
                                         id: task.id,
                                         name: task.name,
@@ -68,6 +68,9 @@ $(document).ready(function() {
             },
             success: function(response) {
                 if (response.success) {
+                    if (typeof patchGanttTasks === 'function' && response.moved_tasks) {
+                        patchGanttTasks(response.moved_tasks); // Dependents shifted by the server
+                    }
                     showModal('successModal', response.message);
                     setTimeout(function() {
                         window.location.href = '/projects/' + response.project_id;
@@ -145,48 +148,86 @@ $(document).ready(function() {
         });
     };
 
-    // Function to fetch tasks and refresh Gantt chart
+    // Client copy of the project's tasks, kept current with delta syncs after the first load
+    let syncToken = null;
+    const taskCache = new Map();
+    const ganttCache = new Map();
+
+    function renderTasks() {
+        const tasks = Array.from(taskCache.values()).sort(function(a, b) {
+            return (a.start_date || '').localeCompare(b.start_date || '') || a.id - b.id;
+        });
+        const taskList = $('#task-list');
+        taskList.empty();
+        if (tasks.length > 0) {
+            tasks.forEach(function(task) {
+                taskList.append(
+                    '<li id="task-' + task.id + '">' +
+                    task.name +
+                    ' (Starts: ' + (task.start_date || 'N/A') +
+                    ', Ends: ' + (task.end_date || 'N/A') +
+                    ', Progress: ' + task.progress + '%' +
+                    ', Status: ' + task.status + ')' +
+                    ' <a href="/tasks/' + task.id + '/edit">Edit</a>' +
+                    ' <form action="/tasks/' + task.id + '/delete" method="POST" style="display:inline;" class="delete-task-form">' +
+                    '<input type="hidden" name="csrf_token" value="' + $('meta[name="csrf-token"]').attr('content') + '">' +
+                    '<button type="submit" class="delete-task-btn" data-task-id="' + task.id + '">Delete</button>' +
+                    '</form></li>'
+                );
+            });
+        } else {
+            taskList.append('<li>No tasks yet for this project. Add one above!</li>');
+        }
+        const ganttSvg = document.getElementById('gantt-svg');
+        if (ganttSvg) {
+            // Large project: the server renders the chart; a new sync token means a new image
+            if (ganttSvg.dataset.token !== String(syncToken)) {
+                ganttSvg.dataset.token = syncToken;
+                ganttSvg.src = ganttSvg.dataset.src + '?v=' + syncToken;
+            }
+            return;
+        }
+        const ganttTasks = Array.from(ganttCache.values()).sort(function(a, b) {
+            return a.start.localeCompare(b.start);
+        });
+        if (typeof refreshGantt === 'function') {
+            refreshGantt(ganttTasks);
+        } else {
+            console.warn("refreshGantt not available, retrying...");
+            setTimeout(() => {
+                if (typeof refreshGantt === 'function') {
+                    refreshGantt(ganttTasks);
+                }
+            }, 500);
+        }
+    }
+
+    // Function to fetch tasks and refresh Gantt chart; after the first load only changes are fetched
     function fetchTasks(projectId) {
+        if (syncToken !== null) {
+            fetchChanges(projectId);
+            return;
+        }
         $.ajax({
             url: '/api/projects/' + projectId + '/tasks',
             type: 'GET',
+            ifModified: true, // Send If-None-Match; unchanged projects answer 304
             headers: {
                 'X-Requested-With': 'XMLHttpRequest',
                 'X-CSRF-Token': $('meta[name="csrf-token"]').attr('content')
             },
-            success: function(response) {
+            success: function(response, status) {
+                if (status === 'notmodified') {
+                    return; // Task list and Gantt chart are already current
+                }
                 if (response.success) {
-                    const taskList = $('#task-list');
-                    taskList.empty();
-                    if (response.tasks.length > 0) {
-                        response.tasks.forEach(function(task) {
-                            taskList.append(
-                                '<li id="task-' + task.id + '">' +
-                                task.name +
-                                ' (Starts: ' + (task.start_date || 'N/A') +
-                                ', Ends: ' + (task.end_date || 'N/A') +
-                                ', Progress: ' + task.progress + '%' +
-                                ', Status: ' + task.status + ')' +
-                                ' <a href="/tasks/' + task.id + '/edit">Edit</a>' +
-                                ' <form action="/tasks/' + task.id + '/delete" method="POST" style="display:inline;" class="delete-task-form">' +
-                                '<input type="hidden" name="csrf_token" value="' + $('meta[name="csrf-token"]').attr('content') + '">' +
-                                '<button type="submit" class="delete-task-btn" data-task-id="' + task.id + '">Delete</button>' +
-                                '</form></li>'
-                            );
-                        });
-                    } else {
-                        taskList.append('<li>No tasks yet for this project. Add one above!</li>');
-                    }
-                    if (typeof refreshGantt === 'function') {
-                        refreshGantt(response.gantt_tasks);
-                    } else {
-                        console.warn("refreshGantt not available, retrying...");
-                        setTimeout(() => {
-                            if (typeof refreshGantt === 'function') {
-                                refreshGantt(response.gantt_tasks);
-                            }
-                        }, 500);
-                    }
+                    taskCache.clear();
+                    ganttCache.clear();
+                    response.tasks.forEach(task => taskCache.set(task.id, task));
+                    response.gantt_tasks.forEach(task => ganttCache.set(task.id, task));
+                    syncToken = response.sync_token;
+                    renderTasks();
+                    subscribeToProject(projectId);
                 } else {
                     showModal('errorModal', [response.message], true);
                 }
@@ -198,6 +239,94 @@ $(document).ready(function() {
         });
     }
 
+    // Apply a delta from the changes endpoint or the live event stream
+    function applyChanges(projectId, changes) {
+        if (changes.reset) {
+            syncToken = null; // Too far behind for a delta; reload everything
+            fetchTasks(projectId);
+            return;
+        }
+        syncToken = changes.token;
+        if (changes.tasks.length === 0 && changes.deleted.length === 0) {
+            return;
+        }
+        changes.deleted.forEach(function(id) {
+            taskCache.delete(id);
+            ganttCache.delete(String(id));
+        });
+        changes.tasks.forEach(function(task) {
+            taskCache.set(task.id, task);
+            ganttCache.delete(String(task.id)); // Re-added below if it still has both dates
+        });
+        changes.gantt_tasks.forEach(task => ganttCache.set(task.id, task));
+        renderTasks();
+    }
+
+    // Live updates from other viewers of the project, opened once the first snapshot is in.
+    // The server catches up from ?since, and from Last-Event-ID when EventSource reconnects.
+    // When the server turns the stream away (it caps open streams), the page polls for changes instead.
+    const POLL_INTERVAL_MS = 15000;
+    let eventSource = null;
+    let pollTimer = null;
+    function pollForChanges(projectId) {
+        if (pollTimer === null) {
+            pollTimer = setInterval(function() {
+                if (syncToken !== null) {
+                    fetchChanges(projectId);
+                }
+            }, POLL_INTERVAL_MS);
+        }
+    }
+
+    function subscribeToProject(projectId) {
+        if (eventSource !== null || pollTimer !== null) {
+            return;
+        }
+        if (!window.EventSource) {
+            pollForChanges(projectId);
+            return;
+        }
+        eventSource = new EventSource('/api/projects/' + projectId + '/events?since=' + encodeURIComponent(syncToken));
+        const source = eventSource;
+        source.addEventListener('error', function() {
+            // A refused stream (503) closes for good; dropped connections reconnect on their own
+            if (source.readyState === EventSource.CLOSED) {
+                pollForChanges(projectId);
+            }
+        });
+        source.addEventListener('changes', function(event) {
+            if (syncToken !== null) {
+                applyChanges(projectId, JSON.parse(event.data));
+            }
+        });
+        source.addEventListener('reset', function() {
+            syncToken = null;
+            fetchTasks(projectId);
+        });
+    }
+
+    function fetchChanges(projectId) {
+        $.ajax({
+            url: '/api/projects/' + projectId + '/changes',
+            type: 'GET',
+            data: { since: syncToken },
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            success: function(response) {
+                if (!response.success) {
+                    showModal('errorModal', [response.message], true);
+                    return;
+                }
+                applyChanges(projectId, response);
+            },
+            error: function(xhr) {
+                const message = xhr.responseJSON ? xhr.responseJSON.message : 'Unknown error';
+                showModal('errorModal', [message], true);
+            }
+        });
+    }
+
     // Save comment
     $('#saveCommentButton').click(function() {
         const taskId = $('#commentTaskName').data('task-id'); // Rely on data-task-id set by showCommentModal
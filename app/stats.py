@@ -0,0 +1,174 @@
+from collections import defaultdict
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+from .models import Project, ProjectStats, Task
+
+stats_table = ProjectStats.__table__
+task_table = Task.__table__
+# Statuses with their own counter; any other status only counts towards task_count
+STATUS_COLUMNS = {
+    'To Do': 'todo_count',
+    'In Progress': 'in_progress_count',
+    'Completed': 'completed_count',
+    'Blocked': 'blocked_count',
+}
+COUNT_COLUMNS = ('task_count', 'progress_sum') + tuple(STATUS_COLUMNS.values())
+
+
+def _aggregate_query(project_ids=None):
+    query = (
+        select(
+            Project.id,
+            func.count(Task.id),
+            func.coalesce(func.sum(Task.progress), 0),
+            *(func.count(case((Task.status == status, 1))) for status in STATUS_COLUMNS),
+            func.min(Task.start_date),
+            func.max(Task.end_date),
+        )
+        .select_from(Project)
+        .outerjoin(Task, Task.project_id == Project.id)
+        .group_by(Project.id)
+    )
+    if project_ids is not None:
+        query = query.where(Project.id.in_(project_ids))
+    return query
+
+
+def _rows(result):
+    return [
+        dict(zip(('project_id',) + COUNT_COLUMNS + ('min_start', 'max_end'), row))
+        for row in result
+    ]
+
+
+def refresh_project_stats(connection, project_ids):
+    """Recompute the rollup of the given projects from their tasks."""
+    project_ids = list(project_ids)
+    if not project_ids:
+        return
+    rows = _rows(connection.execute(_aggregate_query(project_ids)))
+    connection.execute(delete(stats_table).where(stats_table.c.project_id.in_(project_ids)))
+    if rows:
+        connection.execute(insert(stats_table), rows)
+
+
+def rebuild_project_stats(session):
+    """Recompute every project's rollup; used by `flask rebuild-project-stats` for repair."""
+    connection = session.connection()
+    rows = _rows(connection.execute(_aggregate_query()))
+    connection.execute(delete(stats_table))
+    if rows:
+        connection.execute(insert(stats_table), rows)
+    return len(rows)
+
+
+def _old_value(state, key):
+    """The value ``key`` had when loaded, even if it has been changed since."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return state.dict.get(key)
+
+
+def _contribution(values, sign):
+    contribution = dict.fromkeys(COUNT_COLUMNS, 0)
+    contribution['task_count'] = sign
+    contribution['progress_sum'] = sign * (values['progress'] or 0)
+    column = STATUS_COLUMNS.get(values['status'])
+    if column:
+        contribution[column] = sign
+    return contribution
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_project_stats(session, flush_context):
+    """Apply the flush's task inserts, updates and deletes to project_stats as deltas.
+
+    Counts and the progress sum change by the difference between old and new
+    values. The date bounds are re-read with MIN/MAX over the
+    (project_id, start_date) and (project_id, end_date) indexes, which costs
+    an index lookup rather than a scan. Runs in the flush's transaction.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(COUNT_COLUMNS, 0))
+    dates_changed = set()
+    new_projects = [obj.id for obj in session.new if isinstance(obj, Project)]
+
+    def add(project_id, contribution):
+        delta = deltas[project_id]
+        for column, amount in contribution.items():
+            delta[column] += amount
+
+    for obj in session.new:
+        if isinstance(obj, Task):
+            add(obj.project_id, _contribution({'progress': obj.progress, 'status': obj.status}, 1))
+            dates_changed.add(obj.project_id)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            state = inspect(obj)
+            old = {key: _old_value(state, key) for key in ('progress', 'status', 'project_id')}
+            add(old['project_id'], _contribution(old, -1))
+            dates_changed.add(old['project_id'])
+    for obj in session.dirty:
+        if not isinstance(obj, Task):
+            continue
+        state = inspect(obj)
+        changed = {key for key in ('progress', 'status', 'project_id', 'start_date', 'end_date')
+                   if state.attrs[key].history.has_changes()}
+        if not changed:
+            continue
+        old = {key: _old_value(state, key) for key in ('progress', 'status', 'project_id')}
+        if changed & {'progress', 'status', 'project_id'}:
+            add(old['project_id'], _contribution(old, -1))
+            add(obj.project_id, _contribution({'progress': obj.progress, 'status': obj.status}, 1))
+        dates_changed.update({old['project_id'], obj.project_id})
+
+    if not (deltas or dates_changed or new_projects):
+        return
+    connection = session.connection()
+    if new_projects:
+        connection.execute(insert(stats_table), [{'project_id': project_id, **dict.fromkeys(COUNT_COLUMNS, 0)}
+                                                 for project_id in new_projects])
+    _apply_deltas(connection, deltas, dates_changed)
+
+
+def _apply_deltas(connection, deltas, dates_changed):
+    missing = []
+    for project_id in set(deltas) | dates_changed:
+        values = {column: stats_table.c[column] + amount
+                  for column, amount in deltas.get(project_id, {}).items() if amount}
+        if project_id in dates_changed:
+            values['min_start'] = (select(func.min(task_table.c.start_date))
+                                   .where(task_table.c.project_id == project_id).scalar_subquery())
+            values['max_end'] = (select(func.max(task_table.c.end_date))
+                                 .where(task_table.c.project_id == project_id).scalar_subquery())
+        if not values:
+            continue
+        result = connection.execute(update(stats_table).where(stats_table.c.project_id == project_id).values(values))
+        if result.rowcount == 0:
+            missing.append(project_id)
+    # Projects created outside the ORM (bulk loads) have no row yet; build it from their tasks
+    refresh_project_stats(connection, missing)
+
+
+def add_inserted_tasks(connection, project_id, rows):
+    """Count task rows inserted with Core (bulk import), which the flush listener never sees."""
+    delta = dict.fromkeys(COUNT_COLUMNS, 0)
+    for row in rows:
+        for column, amount in _contribution(row, 1).items():
+            delta[column] += amount
+    _apply_deltas(connection, {project_id: delta}, {project_id})
+
+
+def serialize_stats(stats):
+    """Summary dict for a project from its ProjectStats row (None reads as an empty project)."""
+    count = stats.task_count if stats else 0
+    return {
+        'task_count': count,
+        'status_counts': {status: getattr(stats, column) if stats else 0
+                          for status, column in STATUS_COLUMNS.items()},
+        'average_progress': round(stats.progress_sum / count, 1) if count else 0,
+        'earliest_start': stats.min_start.isoformat() if stats and stats.min_start else '',
+        'latest_end': stats.max_end.isoformat() if stats and stats.max_end else '',
+    }
@@ -0,0 +1,74 @@
+from sqlalchemy import delete, func, select, update
+from .extensions import db
+from .graph import load_predecessor_edges, predecessor_map
+from .models import Project, Task, TaskTombstone
+from .serializers import format_dependencies, serialize_gantt_task, serialize_task
+
+# Past this many changed rows a full reload is cheaper than a delta
+MAX_CHANGES = 2000
+
+
+def changes_since(project, since, max_changes=MAX_CHANGES):
+    """Describe what changed in ``project`` after version ``since``.
+
+    The sync token is the project version: every task insert/update stamps
+    the new version on the row and every delete leaves a tombstone at it
+    (see versioning.py). Returns a dict with ``token`` and either ``reset``
+    (the client must reload everything: the token predates pruned
+    tombstones, is from the future, or too much changed) or the changed
+    ``tasks``/``gantt_tasks`` and ``deleted`` task ids.
+    """
+    version = project.version
+    result = {'token': str(version), 'reset': False, 'tasks': [], 'gantt_tasks': [], 'deleted': []}
+    if since == version:
+        return result
+    if since > version or since < project.pruned_version:
+        result['reset'] = True
+        return result
+    changed = db.session.scalars(
+        select(Task)
+        .where(Task.project_id == project.id, Task.row_version > since)
+        .order_by(Task.id)
+        .limit(max_changes + 1)
+    ).all()
+    deleted_ids = db.session.scalars(
+        select(TaskTombstone.task_id).distinct()
+        .where(TaskTombstone.project_id == project.id, TaskTombstone.row_version > since)
+        .limit(max_changes + 1)
+    ).all()
+    if len(changed) + len(deleted_ids) > max_changes:
+        result['reset'] = True
+        return result
+    predecessors = predecessor_map(load_predecessor_edges(task.id for task in changed))
+    live_ids = {task.id for task in changed}
+    for task in changed:
+        dependency_ids = format_dependencies(predecessors, task.id)
+        result['tasks'].append(serialize_task(task, dependency_ids))
+        if task.start_date and task.end_date:
+            result['gantt_tasks'].append(serialize_gantt_task(task, dependency_ids))
+    # A task id reused after a delete is live again, not deleted
+    result['deleted'] = sorted(task_id for task_id in deleted_ids if task_id not in live_ids)
+    return result
+
+
+def prune_tombstones(older_than):
+    """Delete tombstones recorded before ``older_than``; returns how many went.
+
+    Each affected project remembers the highest pruned version, so clients
+    holding an older token are told to reload instead of missing deletes.
+    """
+    horizons = db.session.execute(
+        select(TaskTombstone.project_id, func.max(TaskTombstone.row_version))
+        .where(TaskTombstone.deleted_at < older_than)
+        .group_by(TaskTombstone.project_id)
+    ).all()
+    for project_id, pruned_version in horizons:
+        db.session.execute(
+            update(Project)
+            .where(Project.id == project_id, Project.pruned_version < pruned_version)
+            .values(pruned_version=pruned_version),
+            execution_options={'synchronize_session': False},
+        )
+    pruned = db.session.execute(delete(TaskTombstone).where(TaskTombstone.deleted_at < older_than)).rowcount
+    db.session.commit()
+    return pruned
@@ -0,0 +1,201 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, select
+from .extensions import db
+from .graph import load_predecessor_edges, predecessor_map
+from .intervals import overlap_condition
+from .models import Task
+from .serializers import DATE_FORMAT, format_date, format_dependencies
+
+# Fields a client may ask for with ?fields=; 'dependencies' costs one extra query per page
+QUERY_FIELDS = ('id', 'name', 'start_date', 'end_date', 'progress', 'status', 'comment', 'dependencies')
+FIELD_COLUMNS = {
+    'id': Task.id,
+    'name': Task.name,
+    'start_date': Task.start_date,
+    'end_date': Task.end_date,
+    'progress': Task.progress,
+    'status': Task.status,
+    'comment': Task.comment,
+}
+DEFAULT_FIELDS = ('id', 'name', 'start_date', 'end_date', 'progress', 'status', 'dependencies')
+# Sort keys; every sort is tie-broken by id so (value, id) identifies a row for the cursor
+SORT_COLUMNS = {
+    'start_date': Task.start_date,
+    'end_date': Task.end_date,
+    'name': Task.name,
+    'progress': Task.progress,
+    'id': Task.id,
+}
+DATE_SORTS = ('start_date', 'end_date')
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class TaskQueryError(ValueError):
+    """Raised for query parameters that cannot be satisfied; served as 400."""
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        raise TaskQueryError(f'{name} must be in YYYY-MM-DD format.') from None
+
+
+def _parse_int(value, name):
+    try:
+        return int(value)
+    except ValueError:
+        raise TaskQueryError(f'{name} must be an integer.') from None
+
+
+def encode_cursor(sort, descending, value, task_id):
+    if sort in DATE_SORTS:
+        value = format_date(value) or None
+    payload = json.dumps([sort, int(descending), value, task_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort, descending):
+    """Return the (value, id) a page ended at, checking it was issued for the same sort."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, cursor_descending, value, task_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise TaskQueryError('cursor is not valid.') from None
+    if cursor_sort != sort or bool(cursor_descending) != descending or not isinstance(task_id, int):
+        raise TaskQueryError('cursor was issued for a different sort order.')
+    if sort in DATE_SORTS and value is not None:
+        value = _parse_date(value, 'cursor')
+    return value, task_id
+
+
+def parse_window(args):
+    """Validate the optional ``from`` / ``to`` viewport dates; returns ``(from, to)``, either may be None."""
+    date_from = _parse_date(args['from'], 'from') if args.get('from') else None
+    date_to = _parse_date(args['to'], 'to') if args.get('to') else None
+    if date_from and date_to and date_from > date_to:
+        raise TaskQueryError('from cannot be after to.')
+    return date_from, date_to
+
+
+def parse_task_query(args):
+    """Validate the query string of the task query endpoint into a spec dict.
+
+    Filters: ``status`` (repeatable or comma-separated), ``progress_min`` /
+    ``progress_max``, ``from`` / ``to`` (dated tasks overlapping the range),
+    ``name_prefix`` (case-sensitive). Shape: ``sort`` (prefix ``-`` for
+    descending), ``fields``, ``limit`` and ``cursor``.
+    """
+    statuses = [status for value in args.getlist('status') for status in value.split(',') if status]
+    progress_min = args.get('progress_min')
+    progress_max = args.get('progress_max')
+    date_from, date_to = parse_window(args)
+
+    sort = args.get('sort', 'start_date')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in SORT_COLUMNS:
+        raise TaskQueryError(f"sort must be one of: {', '.join(SORT_COLUMNS)}.")
+
+    fields = DEFAULT_FIELDS
+    if args.get('fields'):
+        fields = tuple(dict.fromkeys(field.strip() for field in args['fields'].split(',') if field.strip()))
+        unknown = [field for field in fields if field not in QUERY_FIELDS]
+        if unknown or not fields:
+            raise TaskQueryError(f"fields must be chosen from: {', '.join(QUERY_FIELDS)}.")
+
+    limit = _parse_int(args['limit'], 'limit') if args.get('limit') else DEFAULT_LIMIT
+    if not 1 <= limit <= MAX_LIMIT:
+        raise TaskQueryError(f'limit must be between 1 and {MAX_LIMIT}.')
+
+    spec = {
+        'statuses': statuses,
+        'progress_min': _parse_int(progress_min, 'progress_min') if progress_min else None,
+        'progress_max': _parse_int(progress_max, 'progress_max') if progress_max else None,
+        'from': date_from,
+        'to': date_to,
+        'name_prefix': args.get('name_prefix') or None,
+        'sort': sort,
+        'descending': descending,
+        'fields': fields,
+        'limit': limit,
+        'after': None,
+    }
+    if args.get('cursor'):
+        spec['after'] = decode_cursor(args['cursor'], sort, descending)
+    return spec
+
+
+def _after_clause(column, descending, value, task_id):
+    # SQLite sorts NULLs first ascending and last descending; the clause mirrors that
+    if column is Task.id:
+        return Task.id < task_id if descending else Task.id > task_id
+    if descending:
+        if value is None:
+            return and_(column.is_(None), Task.id < task_id)
+        return or_(column < value, and_(column == value, Task.id < task_id), column.is_(None))
+    if value is None:
+        return or_(and_(column.is_(None), Task.id > task_id), column.isnot(None))
+    return or_(column > value, and_(column == value, Task.id > task_id))
+
+
+def build_task_query(project_id, spec):
+    sort_column = SORT_COLUMNS[spec['sort']]
+    columns = {'id': Task.id, spec['sort']: sort_column}
+    columns.update((field, FIELD_COLUMNS[field]) for field in spec['fields'] if field in FIELD_COLUMNS)
+    query = select(*(column.label(name) for name, column in columns.items())).where(Task.project_id == project_id)
+    if spec['statuses']:
+        query = query.where(Task.status.in_(spec['statuses']))
+    if spec['progress_min'] is not None:
+        query = query.where(Task.progress >= spec['progress_min'])
+    if spec['progress_max'] is not None:
+        query = query.where(Task.progress <= spec['progress_max'])
+    if spec['from'] or spec['to']:
+        query = query.where(overlap_condition(project_id, spec['from'], spec['to']))
+    if spec['name_prefix']:
+        # A range instead of LIKE, so ix_task_project_id_name serves the lookup
+        query = query.where(Task.name >= spec['name_prefix'], Task.name < spec['name_prefix'] + '\U0010ffff')
+    if spec['after'] is not None:
+        query = query.where(_after_clause(sort_column, spec['descending'], *spec['after']))
+    if spec['descending']:
+        query = query.order_by(sort_column.desc(), Task.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Task.id.asc())
+    # One extra row tells whether there is a next page
+    return query.limit(spec['limit'] + 1)
+
+
+def run_task_query(project_id, spec):
+    """Fetch one page of a project's tasks; returns ``(tasks, next_cursor)``.
+
+    Each page is a single index range scan that starts where the cursor left
+    off, so page N costs the same as page 1.
+    """
+    rows = db.session.execute(build_task_query(project_id, spec)).mappings().all()
+    next_cursor = None
+    if len(rows) > spec['limit']:
+        rows = rows[:spec['limit']]
+        last = rows[-1]
+        next_cursor = encode_cursor(spec['sort'], spec['descending'], last[spec['sort']], last['id'])
+    fields = spec['fields']
+    predecessors = {}
+    if 'dependencies' in fields:
+        predecessors = predecessor_map(load_predecessor_edges(row['id'] for row in rows))
+    tasks = []
+    for row in rows:
+        task = {}
+        for field in fields:
+            if field == 'dependencies':
+                task[field] = format_dependencies(predecessors, row['id'])
+            elif field in DATE_SORTS:
+                task[field] = format_date(row[field])
+            elif field == 'comment':
+                task[field] = row[field] or ''
+            else:
+                task[field] = row[field]
+        tasks.append(task)
+    return tasks, next_cursor
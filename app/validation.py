@@ -0,0 +1,63 @@
+from datetime import datetime
+from .graph import load_dependency_edges, would_create_cycle
+from .models import Task
+from .serializers import DATE_FORMAT
+
+
+def validate_task_fields(name, start_date, end_date, progress, status):
+    """Validate raw task fields as submitted by a form, import row or API call.
+
+    Dates are YYYY-MM-DD strings (or empty), progress anything int() accepts.
+    Returns ``(values, errors)`` where ``values`` holds the converted fields.
+    """
+    errors = []
+    if not name:
+        errors.append('Task name is required.')
+    if not status:
+        errors.append('Status is required.')
+    try:
+        progress = int(progress)
+        if not (0 <= progress <= 100):
+            errors.append('Progress must be between 0 and 100.')
+    except (TypeError, ValueError):
+        errors.append('Progress must be a valid number.')
+    try:
+        start_date = datetime.strptime(start_date, DATE_FORMAT).date() if start_date else None
+    except ValueError:
+        errors.append('Start date must be in YYYY-MM-DD format.')
+        start_date = None
+    try:
+        end_date = datetime.strptime(end_date, DATE_FORMAT).date() if end_date else None
+    except ValueError:
+        errors.append('End date must be in YYYY-MM-DD format.')
+        end_date = None
+    if start_date and end_date and start_date > end_date:
+        errors.append('End date cannot be before start date.')
+    values = {
+        'name': name,
+        'start_date': start_date,
+        'end_date': end_date,
+        'progress': progress,
+        'status': status,
+    }
+    return values, errors
+
+
+def resolve_dependencies(project_id, values, task_id=None):
+    """Turn submitted dependency ids into Task objects of the same project.
+
+    ``task_id`` is the task being edited; its new dependencies must not close a
+    cycle. Returns ``(predecessors, errors)``.
+    """
+    if not values or 'None' in values:
+        return [], []
+    try:
+        ids = {int(value) for value in values}
+    except (TypeError, ValueError):
+        return [], ['Dependencies must be task ids.']
+    predecessors = Task.query.filter(Task.id.in_(ids), Task.project_id == project_id).all()
+    if len(predecessors) != len(ids):
+        return [], ['Dependencies must be tasks of the same project.']
+    if task_id is not None and would_create_cycle(load_dependency_edges([project_id]), task_id, ids):
+        return [], ['These dependencies would create a dependency cycle.']
+    return predecessors, []
@@ -0,0 +1,101 @@
+from flask import request, make_response
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from .models import Project, Task, TaskTombstone, task_dependency, utcnow
+
+
+def bump_project_versions(session, project_ids):
+    """Increment the version of each project and return {project_id: new_version}.
+
+    The UPDATE runs first so the write lock is held before the new values are
+    read back, which keeps versions monotonic across concurrent writers.
+    """
+    project_ids = sorted(set(project_ids))
+    if not project_ids:
+        return {}
+    connection = session.connection()
+    connection.execute(
+        update(Project.__table__)
+        .where(Project.__table__.c.id.in_(project_ids))
+        .values(version=Project.__table__.c.version + 1)
+    )
+    versions = dict(connection.execute(
+        select(Project.__table__.c.id, Project.__table__.c.version)
+        .where(Project.__table__.c.id.in_(project_ids))
+    ).all())
+    # Keep already loaded projects in step without marking them dirty
+    for project_id, version in versions.items():
+        project = session.identity_map.get(session.identity_key(Project, project_id))
+        if project is not None:
+            set_committed_value(project, 'version', version)
+    return versions
+
+
+@event.listens_for(Session, 'before_flush')
+def _bump_versions_for_changed_tasks(session, flush_context, instances):
+    """Bump each touched project's version and stamp it on the changed tasks.
+
+    Inserted and updated tasks get the new version as ``row_version``;
+    deleted ones leave a tombstone at that version, and their successors
+    are re-stamped because their dependency lists shrink.
+    """
+    changed, deleted = [], []
+    for obj in session.new:
+        if isinstance(obj, Task):
+            if obj.project_id is None and obj.project is not None:
+                obj.project_id = obj.project.id
+            changed.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Task) and session.is_modified(obj):
+            changed.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            deleted.append(obj)
+    project_ids = {task.project_id for task in changed + deleted} - {None}
+    versions = bump_project_versions(session, project_ids)
+    if not versions:
+        return
+    for task in changed:
+        if task.project_id in versions:
+            task.row_version = versions[task.project_id]
+    if deleted:
+        connection = session.connection()
+        deleted_ids = [task.id for task in deleted]
+        connection.execute(insert(TaskTombstone.__table__), [
+            {'task_id': task.id, 'project_id': task.project_id, 'row_version': versions[task.project_id],
+             'deleted_at': utcnow()}
+            for task in deleted
+        ])
+        for project_id, version in versions.items():
+            connection.execute(
+                update(Task.__table__)
+                .where(Task.__table__.c.project_id == project_id,
+                       Task.__table__.c.id.in_(select(task_dependency.c.successor_id)
+                                               .where(task_dependency.c.predecessor_id.in_(deleted_ids))),
+                       Task.__table__.c.id.notin_(deleted_ids))
+                .values(row_version=version)
+            )
+
+
+def project_etag(project_id, version, variant=''):
+    """Strong ETag for a representation of a project at a given version."""
+    etag = f'p{project_id}-v{version}'
+    return f'{etag}-{variant}' if variant else etag
+
+
+def not_modified_response(etag):
+    """Return a 304 response if the client already holds ``etag``, else None."""
+    # Weak comparison: gzipped responses carry the same ETag marked weak (see compression.py)
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,5 @@
+"""Reproducible benchmarks for the Project Planner routes.
+
+Run ``python -m benchmarks run --help`` for options; results are written as
+JSON baselines that ``python -m benchmarks compare`` can diff.
+"""
@@ -0,0 +1,47 @@
+import argparse
+import json
+import sys
+from .runner import compare, run_benchmarks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Seed a scratch database and benchmark every route.')
+    run.add_argument('--users', type=int, default=5)
+    run.add_argument('--projects', type=int, default=20, help='Projects per user.')
+    run.add_argument('--tasks', type=int, default=200, help='Tasks per project.')
+    run.add_argument('--density', type=float, default=1.0, help='Average predecessors per task.')
+    run.add_argument('--iterations', type=int, default=50, help='Requests per scenario and worker.')
+    run.add_argument('--workers', type=int, default=4, help='Concurrent worker threads.')
+    run.add_argument('--scenario', action='append', dest='scenarios', help='Only run this scenario (repeatable).')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--output', help='Write the JSON results to this file.')
+
+    diff = commands.add_parser('compare', help='Diff two JSON results files.')
+    diff.add_argument('baseline')
+    diff.add_argument('current')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        results = run_benchmarks(args.users, args.projects, args.tasks, args.density,
+                                 args.iterations, args.workers, args.scenarios, args.seed)
+        text = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text + '\n')
+        print(text)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        print(f"{'scenario':32} {'mode':11} {'metric':15} {'baseline':>10} {'current':>10} {'change':>8}")
+        for name, mode, metric, before, after, change in compare(baseline, current):
+            print(f'{name:32} {mode:11} {metric:15} {before:>10} {after:>10} {change:>+7.1f}%')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
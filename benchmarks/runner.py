@@ -0,0 +1,245 @@
+import math
+import os
+import platform
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from flask_migrate import upgrade
+from sqlalchemy import event
+import sqlalchemy
+from app import create_app
+from app.extensions import db
+from app.query_plans import MIGRATIONS_DIR
+from .seed import BENCHMARK_PASSWORD, seed_portfolio
+
+_counter = threading.local()
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    _counter.queries = getattr(_counter, 'queries', 0) + 1
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Scenario:
+    """One route exercised by a logged-in client; ``request`` returns (method, url, kwargs).
+
+    ``anonymous`` scenarios send every request from a new client without
+    cookies. With ``background_logins`` set, that many threads keep posting logins
+    from fresh clients while the scenario is measured.
+    """
+
+    def __init__(self, name, request, expected=(200,), anonymous=False, background_logins=0):
+        self.name = name
+        self.request = request
+        self.expected = expected
+        self.anonymous = anonymous
+        self.background_logins = background_logins
+
+
+def build_scenarios():
+    def task_form(user, i, shift_days=0):
+        start = date(2025, 1, 1) + timedelta(days=shift_days)
+        return {'task_name': 'Task 00000', 'start_date': start.isoformat(),
+                'end_date': (start + timedelta(days=3)).isoformat(), 'progress': str((i * 25) % 125),
+                'status': 'In Progress', 'dependencies': ['None'], 'comment': f'edit {i}'}
+
+    def batch_reschedule(user, i, size=50):
+        # Tasks of a seeded project have consecutive ids starting at its first task
+        start = date(2025, 1, 1) + timedelta(days=i % 30)
+        fields = {'start_date': start.isoformat(), 'end_date': (start + timedelta(days=3)).isoformat()}
+        first = user['task_ids'][0]
+        return 'POST', f"/api/projects/{user['project_ids'][0]}/tasks/batch", {
+            'json': {'operations': [{'op': 'update', 'id': first + n, 'fields': fields} for n in range(size)]}}
+
+    def project_tasks(user, i):
+        return 'GET', f"/api/projects/{user['project_ids'][0]}/tasks", {}
+
+    return [
+        # 503 is the hashing pool's admission control turning a login away
+        Scenario('login', lambda user, i: ('POST', '/login', {
+            'data': {'username': user['username'], 'password': BENCHMARK_PASSWORD}}), expected=(200, 302, 503), anonymous=True),
+        Scenario('view_project', lambda user, i: ('GET', f"/projects/{user['project_ids'][i % len(user['project_ids'])]}", {})),
+        Scenario('projects_page', lambda user, i: ('GET', '/projects', {})),
+        Scenario('api_projects', lambda user, i: ('GET', '/api/projects', {})),
+        Scenario('api_projects_summary', lambda user, i: ('GET', '/api/projects?view=summary', {})),
+        Scenario('api_project_tasks', project_tasks),
+        # Same request while a login storm runs; compare with api_project_tasks to see
+        # how much password hashing leaks into API latency
+        Scenario('api_project_tasks_during_logins', project_tasks, background_logins=8),
+        Scenario('api_project_tasks_conditional', lambda user, i: ('GET', f"/api/projects/{user['project_ids'][0]}/tasks", {
+            'headers': {'If-None-Match': user.get('etag', '')}}), expected=(200, 304)),
+        # Steady-state refresh: nothing changed since the token the page loaded with
+        Scenario('api_project_changes', lambda user, i: ('GET', f"/api/projects/{user['project_ids'][0]}/changes", {
+            'query_string': {'since': user['sync_token']}})),
+        Scenario('api_query_tasks_page', lambda user, i: ('GET', f"/api/projects/{user['project_ids'][0]}/tasks/query", {
+            'query_string': {'limit': 50, 'fields': 'id,name,start_date,end_date,status', 'from': '2025-02-01'}})),
+        # Ranked full-text search across every task of the user
+        Scenario('api_search', lambda user, i: ('GET', '/api/search', {
+            'query_string': {'q': ('vendor', 'task 01', 'reviewed proj')[i % 3]}})),
+        # Burndown, earned value and load curves over every task of the user
+        Scenario('api_analytics', lambda user, i: ('GET', '/api/analytics', {})),
+        Scenario('comment_update', lambda user, i: ('POST', f"/api/tasks/{user['task_ids'][0]}/comment", {
+            'json': {'comment': f'benchmark comment {i}'}})),
+        Scenario('edit_task', lambda user, i: ('POST', f"/tasks/{user['task_ids'][-1]}/edit", {
+            'data': task_form(user, i), 'headers': {'X-Requested-With': 'XMLHttpRequest'}})),
+        # Moves the first task of a project, which drags its downstream dependents along
+        # One request moving 50 bars, versus 50 edit_task_reschedule round-trips
+        Scenario('batch_reschedule_50', batch_reschedule),
+        Scenario('edit_task_reschedule', lambda user, i: ('POST', f"/tasks/{user['task_ids'][0]}/edit", {
+            'data': task_form(user, i, shift_days=i % 30), 'headers': {'X-Requested-With': 'XMLHttpRequest'}})),
+    ]
+
+
+def _login(app, user):
+    client = app.test_client()
+    response = client.post('/login', data={'username': user['username'], 'password': BENCHMARK_PASSWORD})
+    if response.status_code not in (200, 302):
+        raise RuntimeError(f"Login failed for {user['username']}: {response.status_code}")
+    response = client.get(f"/api/projects/{user['project_ids'][0]}/tasks")
+    return client, dict(user, etag=response.headers.get('ETag') or '', sync_token=response.get_json()['sync_token'])
+
+
+def _timed(client, scenario, user, i):
+    method, url, kwargs = scenario.request(user, i)
+    if scenario.anonymous:
+        client = client.application.test_client()
+    _counter.queries = 0
+    start = time.perf_counter()
+    response = client.open(url, method=method, **kwargs)
+    body = response.get_data()
+    elapsed = time.perf_counter() - start
+    if response.status_code not in scenario.expected:
+        raise RuntimeError(f'{scenario.name}: {method} {url} returned {response.status_code}')
+    return elapsed, _counter.queries, len(body)
+
+
+def _login_storm(app, user, stop, outcomes):
+    data = {'username': user['username'], 'password': BENCHMARK_PASSWORD}
+    while not stop.is_set():
+        # A fresh client each time, so every request really verifies the password
+        response = app.test_client().post('/login', data=data)
+        outcomes.append(response.status_code)
+        if response.status_code == 503:
+            stop.wait(float(response.headers.get('Retry-After', 1)))
+
+
+def _summarise(samples, wall_time):
+    latencies = sorted(sample[0] for sample in samples)
+    count = len(samples)
+    return {
+        'requests': count,
+        'throughput_rps': round(count / wall_time, 2) if wall_time else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_queries': round(sum(sample[1] for sample in samples) / count, 2) if count else 0.0,
+        'mean_bytes': round(sum(sample[2] for sample in samples) / count, 1) if count else 0.0,
+    }
+
+
+def run_benchmarks(users=5, projects=20, tasks=200, dependency_density=1.0, iterations=50,
+                   workers=4, scenarios=None, seed=42):
+    """Seed a scratch database and measure each scenario serially and with ``workers`` threads.
+
+    Returns a JSON-serialisable dict suitable for saving as a baseline.
+    """
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    selected = [s for s in build_scenarios() if not scenarios or s.name in scenarios]
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'benchmark.db'),
+            'WTF_CSRF_ENABLED': False,
+            'TESTING': True,
+        })
+        results = {}
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            seed_start = time.perf_counter()
+            portfolio = seed_portfolio(users, projects, tasks, dependency_density, seed)
+            seed_time = time.perf_counter() - seed_start
+            engine = db.engine
+        # Requests run outside that context so each gets its own app context, g and session
+        event.listen(engine, 'before_cursor_execute', _count_query)
+        try:
+            users_info = [dict(info, username=username) for username, info in portfolio.items()]
+            sessions = [_login(app, users_info[0])]
+            # Every worker gets its own client (cookie jar), spread over the seeded users
+            worker_sessions = [_login(app, users_info[i % len(users_info)]) for i in range(workers)]
+            for scenario in selected:
+                client, user = sessions[0]
+                worker_clients = worker_sessions
+                stop, login_outcomes = threading.Event(), []
+                storm = [threading.Thread(target=_login_storm, args=(app, user, stop, login_outcomes), daemon=True)
+                         for _ in range(scenario.background_logins)]
+                for thread in storm:
+                    thread.start()
+                start = time.perf_counter()
+                serial = [_timed(client, scenario, user, i) for i in range(iterations)]
+                serial_wall = time.perf_counter() - start
+
+                def worker(index):
+                    worker_client, worker_user = worker_clients[index]
+                    return [_timed(worker_client, scenario, worker_user, i) for i in range(iterations)]
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    concurrent = [sample for chunk in pool.map(worker, range(workers)) for sample in chunk]
+                concurrent_wall = time.perf_counter() - start
+                stop.set()
+                for thread in storm:
+                    thread.join()
+                results[scenario.name] = {
+                    'serial': _summarise(serial, serial_wall),
+                    'concurrent': dict(_summarise(concurrent, concurrent_wall), workers=workers),
+                }
+                if storm:
+                    results[scenario.name]['background_logins'] = {
+                        'threads': len(storm),
+                        'requests': len(login_outcomes),
+                        'rejected_503': login_outcomes.count(503),
+                    }
+        finally:
+            event.remove(engine, 'before_cursor_execute', _count_query)
+            engine.dispose()
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'users': users,
+            'projects_per_user': projects,
+            'tasks_per_project': tasks,
+            'dependency_density': dependency_density,
+            'iterations': iterations,
+            'workers': workers,
+            'seed': seed,
+            'seed_seconds': round(seed_time, 3),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, metrics=('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'mean_queries')):
+    """Rows of (scenario, mode, metric, baseline, current, change %) for two result dicts."""
+    rows = []
+    for name, modes in current['results'].items():
+        for mode, values in modes.items():
+            old = baseline['results'].get(name, {}).get(mode)
+            if old is None:
+                continue
+            for metric in metrics:
+                before, after = old.get(metric), values.get(metric)
+                if before is None or after is None:
+                    continue
+                change = ((after - before) / before * 100) if before else 0.0
+                rows.append((name, mode, metric, before, after, round(change, 1)))
+    return rows
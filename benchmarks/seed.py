@@ -0,0 +1,63 @@
+import random
+from datetime import date, timedelta
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from app.extensions import db
+from app.models import Project, Task, User, task_dependency
+from app.stats import rebuild_project_stats
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+STATUSES = ('To Do', 'In Progress', 'Completed', 'Blocked')
+
+
+def seed_portfolio(users=5, projects=20, tasks=200, dependency_density=1.0, seed=42):
+    """Fill the current database with a synthetic portfolio.
+
+    ``projects`` and ``tasks`` are per user and per project. Each task gets on
+    average ``dependency_density`` predecessors picked among the earlier tasks
+    of its project, so the graph is always acyclic. The same ``seed`` always
+    produces the same data. Returns a dict of the created ids per user.
+    """
+    rng = random.Random(seed)
+    # Hashing once keeps seeding fast; every user shares the same password
+    password_hash = generate_password_hash(BENCHMARK_PASSWORD)
+    base = date(2025, 1, 1)
+    portfolio = {}
+    for u in range(users):
+        username = f'bench-user-{u}'
+        user_id = db.session.scalar(insert(User).values(username=username, password_hash=password_hash)
+                                    .returning(User.id))
+        project_ids = []
+        first_task_ids = []
+        for p in range(projects):
+            project_id = db.session.scalar(insert(Project).values(name=f'Project {p:04d}', user_id=user_id)
+                                           .returning(Project.id))
+            rows = []
+            for t in range(tasks):
+                start = base + timedelta(days=rng.randint(0, 365))
+                rows.append({
+                    'name': f'Task {t:05d}',
+                    'start_date': start,
+                    'end_date': start + timedelta(days=rng.randint(0, 20)),
+                    'progress': rng.choice((0, 25, 50, 75, 100)),
+                    'status': rng.choice(STATUSES),
+                    'comment': rng.choice((None, 'Waiting on vendor', 'Reviewed')),
+                    'project_id': project_id,
+                    'user_id': user_id,
+                })
+            task_ids = db.session.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).all()
+            edges = set()
+            for index in range(1, len(task_ids)):
+                count = int(dependency_density) + (rng.random() < dependency_density % 1)
+                for predecessor in rng.sample(task_ids[:index], min(count, index)):
+                    edges.add((predecessor, task_ids[index]))
+            if edges:
+                db.session.execute(insert(task_dependency),
+                                   [{'predecessor_id': a, 'successor_id': b} for a, b in sorted(edges)])
+            project_ids.append(project_id)
+            first_task_ids.append(task_ids[0] if task_ids else None)
+        portfolio[username] = {'user_id': user_id, 'project_ids': project_ids, 'task_ids': first_task_ids}
+    # Core inserts bypass the flush listener that maintains the rollup
+    rebuild_project_stats(db.session)
+    db.session.commit()
+    return portfolio
@@ -0,0 +1,30 @@
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+# Event streams each hold one of these threads; EVENTS_MAX_STREAMS keeps some free for other routes
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+# Load wsgi:app once in the master; workers fork from it and share its memory copy-on-write
+preload_app = True
+wsgi_app = 'wsgi:app'
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach. Collections in a
+    # worker then never touch these objects, so their pages are not copied on write.
+    gc.freeze()
+    server.log.info("Master ready; %d objects frozen for workers to share", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    # Sockets must not be shared between processes. Drop any pooled connection
+    # inherited from the master without closing it, so the master's connection is
+    # left alone, and let the worker open its own on first use.
+    from app.extensions import db
+    from wsgi import app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -94,9 +94,16 @@ def run_migrations_online():
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
 
-    connectable = get_engine()
+    # The FTS5 search and R*Tree interval tables (and their shadow tables) live outside the models
+    def include_name(name, type_, parent_names):
+        if type_ == 'table':
+            return not name.startswith(('task_search', 'project_search', 'task_interval'))
+        return True
 
-    with connectable.connect() as connection:
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
+
+    def run_on(connection):
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
@@ -106,6 +113,17 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+    # `flask shards upgrade` passes in a connection to each shard database in turn
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        run_on(connection)
+        return
+
+    connectable = get_engine()
+
+    with connectable.connect() as connection:
+        run_on(connection)
+
 
 if context.is_offline_mode():
     run_migrations_offline()
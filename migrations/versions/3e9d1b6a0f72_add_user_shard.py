@@ -0,0 +1,27 @@
+"""Add user.shard, naming the database that holds a user's projects and tasks
+
+Revision ID: 3e9d1b6a0f72
+Revises: a7c3e5f90b12
+Create Date: 2025-08-09 15:04:12.518306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9d1b6a0f72'
+down_revision = 'a7c3e5f90b12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL keeps every existing user on the primary database
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('shard', sa.String(length=50), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('shard')
@@ -0,0 +1,26 @@
+"""Add version counter to project
+
+Revision ID: 4c1f7a2b9e3d
+Revises: d8749333a158
+Create Date: 2025-07-05 10:12:31.418204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1f7a2b9e3d'
+down_revision = 'd8749333a158'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.drop_column('version')
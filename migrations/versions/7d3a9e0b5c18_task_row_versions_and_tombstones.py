@@ -0,0 +1,58 @@
+"""Add row versions, updated_at and task tombstones for delta sync
+
+Revision ID: 7d3a9e0b5c18
+Revises: e31a8c6f4d27
+Create Date: 2025-07-19 14:03:52.604917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3a9e0b5c18'
+down_revision = 'e31a8c6f4d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('row_version', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('task_tombstone', schema=None) as batch_op:
+        batch_op.create_index('ix_task_tombstone_project_id_row_version', ['project_id', 'row_version'], unique=False)
+
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('pruned_version', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('row_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_task_project_id_row_version', ['project_id', 'row_version'], unique=False)
+
+    # Existing tasks count as changed at their project's current version
+    op.execute('UPDATE task SET row_version = (SELECT version FROM project WHERE project.id = task.project_id)')
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_project_id_row_version')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('row_version')
+
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.drop_column('pruned_version')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('task_tombstone', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_tombstone_project_id_row_version')
+
+    op.drop_table('task_tombstone')
@@ -0,0 +1,70 @@
+"""Replace task.dependencies names with a task_dependency edge table
+
+Revision ID: 9b2e5d71c0a4
+Revises: 4c1f7a2b9e3d
+Create Date: 2025-07-08 14:03:55.702419
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2e5d71c0a4'
+down_revision = '4c1f7a2b9e3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_dependency',
+    sa.Column('predecessor_id', sa.Integer(), nullable=False),
+    sa.Column('successor_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['predecessor_id'], ['task.id'], ),
+    sa.ForeignKeyConstraint(['successor_id'], ['task.id'], ),
+    sa.PrimaryKeyConstraint('predecessor_id', 'successor_id')
+    )
+    op.create_index('ix_task_dependency_successor_id', 'task_dependency', ['successor_id'], unique=False)
+
+    # Resolve the comma-joined dependency names within each project. When
+    # several tasks share a name the oldest one (lowest id) is used.
+    connection = op.get_bind()
+    name_to_id = {}
+    for task_id, project_id, name in connection.execute(sa.text(
+            'SELECT id, project_id, name FROM task ORDER BY id')):
+        name_to_id.setdefault((project_id, name.strip()), task_id)
+    edges = set()
+    for task_id, project_id, dependencies in connection.execute(sa.text(
+            "SELECT id, project_id, dependencies FROM task WHERE dependencies IS NOT NULL AND dependencies != ''")):
+        for name in dependencies.split(','):
+            predecessor_id = name_to_id.get((project_id, name.strip()))
+            if predecessor_id is not None and predecessor_id != task_id:
+                edges.add((predecessor_id, task_id))
+    if edges:
+        connection.execute(
+            sa.text('INSERT INTO task_dependency (predecessor_id, successor_id) VALUES (:p, :s)'),
+            [{'p': p, 's': s} for p, s in sorted(edges)]
+        )
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_column('dependencies')
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('dependencies', sa.String(length=255), nullable=True))
+
+    connection = op.get_bind()
+    names = {}
+    for successor_id, name in connection.execute(sa.text(
+            'SELECT d.successor_id, t.name FROM task_dependency d '
+            'JOIN task t ON t.id = d.predecessor_id ORDER BY d.successor_id, t.id')):
+        names.setdefault(successor_id, []).append(name)
+    for task_id, task_names in names.items():
+        connection.execute(
+            sa.text('UPDATE task SET dependencies = :deps WHERE id = :id'),
+            {'deps': ','.join(task_names)[:255], 'id': task_id}
+        )
+
+    op.drop_index('ix_task_dependency_successor_id', table_name='task_dependency')
+    op.drop_table('task_dependency')
@@ -0,0 +1,58 @@
+"""Add the project_stats rollup table
+
+Revision ID: b6f0c2d8e913
+Revises: 7d3a9e0b5c18
+Create Date: 2025-07-26 11:38:05.271644
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f0c2d8e913'
+down_revision = '7d3a9e0b5c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('project_stats',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('task_count', sa.Integer(), nullable=False),
+    sa.Column('todo_count', sa.Integer(), nullable=False),
+    sa.Column('in_progress_count', sa.Integer(), nullable=False),
+    sa.Column('completed_count', sa.Integer(), nullable=False),
+    sa.Column('blocked_count', sa.Integer(), nullable=False),
+    sa.Column('progress_sum', sa.Integer(), nullable=False),
+    sa.Column('min_start', sa.Date(), nullable=True),
+    sa.Column('max_end', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_project_id_end_date', ['project_id', 'end_date'], unique=False)
+
+    # Backfill every existing project, including empty ones
+    op.execute("""
+        INSERT INTO project_stats (project_id, task_count, todo_count, in_progress_count, completed_count,
+                                   blocked_count, progress_sum, min_start, max_end)
+        SELECT project.id,
+               COUNT(task.id),
+               COUNT(CASE WHEN task.status = 'To Do' THEN 1 END),
+               COUNT(CASE WHEN task.status = 'In Progress' THEN 1 END),
+               COUNT(CASE WHEN task.status = 'Completed' THEN 1 END),
+               COUNT(CASE WHEN task.status = 'Blocked' THEN 1 END),
+               COALESCE(SUM(task.progress), 0),
+               MIN(task.start_date),
+               MAX(task.end_date)
+        FROM project LEFT OUTER JOIN task ON task.project_id = project.id
+        GROUP BY project.id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_project_id_end_date')
+
+    op.drop_table('project_stats')
@@ -0,0 +1,67 @@
+"""Add FTS5 search tables over tasks and projects, kept in sync by triggers
+
+Revision ID: c4e7a91d2f36
+Revises: b6f0c2d8e913
+Create Date: 2025-07-28 09:14:52.806117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e7a91d2f36'
+down_revision = 'b6f0c2d8e913'
+branch_labels = None
+depends_on = None
+
+# owner holds the user id as a token so a search only walks that user's rows;
+# rank weighs name hits above body hits and ignores the owner column
+STATEMENTS = [
+    """CREATE VIRTUAL TABLE task_search USING fts5(
+           owner, name, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')""",
+    "INSERT INTO task_search(task_search, rank) VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')",
+    """CREATE VIRTUAL TABLE project_search USING fts5(
+           owner, name, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')""",
+    "INSERT INTO project_search(project_search, rank) VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')",
+    # Triggers rather than ORM events so Core bulk inserts and bulk deletes stay indexed too
+    """CREATE TRIGGER task_search_insert AFTER INSERT ON task BEGIN
+           INSERT INTO task_search(rowid, owner, name, body) VALUES (new.id, new.user_id, new.name, new.comment);
+       END""",
+    """CREATE TRIGGER task_search_update AFTER UPDATE OF name, comment, user_id ON task BEGIN
+           UPDATE task_search SET owner = new.user_id, name = new.name, body = new.comment WHERE rowid = old.id;
+       END""",
+    """CREATE TRIGGER task_search_delete AFTER DELETE ON task BEGIN
+           DELETE FROM task_search WHERE rowid = old.id;
+       END""",
+    """CREATE TRIGGER project_search_insert AFTER INSERT ON project BEGIN
+           INSERT INTO project_search(rowid, owner, name, body)
+           VALUES (new.id, new.user_id, new.name, new.description);
+       END""",
+    """CREATE TRIGGER project_search_update AFTER UPDATE OF name, description, user_id ON project BEGIN
+           UPDATE project_search SET owner = new.user_id, name = new.name, body = new.description
+           WHERE rowid = old.id;
+       END""",
+    """CREATE TRIGGER project_search_delete AFTER DELETE ON project BEGIN
+           DELETE FROM project_search WHERE rowid = old.id;
+       END""",
+    "INSERT INTO task_search(rowid, owner, name, body) SELECT id, user_id, name, comment FROM task",
+    "INSERT INTO project_search(rowid, owner, name, body) SELECT id, user_id, name, description FROM project",
+]
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases go without the search index
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in ('task_search_insert', 'task_search_update', 'task_search_delete',
+                    'project_search_insert', 'project_search_update', 'project_search_delete'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS task_search')
+    op.execute('DROP TABLE IF EXISTS project_search')
@@ -0,0 +1,61 @@
+"""Add an R*Tree interval index over task dates, kept in sync by triggers
+
+Revision ID: f2b8d4e6a015
+Revises: c4e7a91d2f36
+Create Date: 2025-07-30 15:02:11.447390
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4e6a015'
+down_revision = 'c4e7a91d2f36'
+branch_labels = None
+depends_on = None
+
+# Days since 1970-01-01, the unit of the start_day/end_day dimensions
+START_DAY = "CAST(julianday({row}.start_date) - 2440587.5 AS INTEGER)"
+END_DAY = "CAST(julianday({row}.end_date) - 2440587.5 AS INTEGER)"
+
+
+def _interval_values(row):
+    start, end = START_DAY.format(row=row), END_DAY.format(row=row)
+    return (f"{row}.id, {row}.project_id, {row}.project_id, MIN({start}, {end}), MAX({start}, {end})")
+
+
+STATEMENTS = [
+    # Two dimensions: the project (a point) and the task's [start, end] in days.
+    # Only tasks with both dates have an interval; undated tasks are never on the chart.
+    "CREATE VIRTUAL TABLE task_interval USING rtree_i32(id, project_min, project_max, start_day, end_day)",
+    f"""CREATE TRIGGER task_interval_insert AFTER INSERT ON task
+        WHEN new.start_date IS NOT NULL AND new.end_date IS NOT NULL BEGIN
+           INSERT INTO task_interval VALUES ({_interval_values('new')});
+       END""",
+    f"""CREATE TRIGGER task_interval_update AFTER UPDATE OF start_date, end_date, project_id ON task BEGIN
+           DELETE FROM task_interval WHERE id = old.id;
+           INSERT INTO task_interval SELECT {_interval_values('new')}
+           WHERE new.start_date IS NOT NULL AND new.end_date IS NOT NULL;
+       END""",
+    """CREATE TRIGGER task_interval_delete AFTER DELETE ON task BEGIN
+           DELETE FROM task_interval WHERE id = old.id;
+       END""",
+    f"""INSERT INTO task_interval SELECT {_interval_values('task')} FROM task
+        WHERE task.start_date IS NOT NULL AND task.end_date IS NOT NULL""",
+]
+
+
+def upgrade():
+    # R*Tree is SQLite-only; other databases filter on the date columns instead
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in ('task_interval_insert', 'task_interval_update', 'task_interval_delete'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS task_interval')
@@ -0,0 +1,46 @@
+import pytest
+from flask_migrate import upgrade
+from app import create_app
+from app.extensions import db
+from app.models import Project, User
+from app.query_plans import MIGRATIONS_DIR
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'test.db'),
+        'SECRET_KEY': 'test',
+        'WTF_CSRF_ENABLED': False,
+        'TESTING': True,
+        'JOBS_WORKERS': 0,
+        'JOBS_SPOOL_DIR': str(tmp_path / 'jobs'),
+        'DATABASE_SHARDS': {},
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',  # Cheap hashes; the tests are not about them
+    })
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+        user = User(username='tester')
+        user.set_password('test-password')
+        db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'test-password'})
+    return client
+
+
+@pytest.fixture
+def project_id(app):
+    with app.app_context():
+        project = Project(name='Test project', user_id=db.session.scalar(db.select(User.id)))
+        db.session.add(project)
+        db.session.commit()
+        return project.id
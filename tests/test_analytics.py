@@ -0,0 +1,23 @@
+from app.extensions import db
+from app.models import Task, User
+from app.validation import validate_task_fields
+
+
+def _add_task(app, project_id, start, end, progress=0):
+    with app.app_context():
+        values, _ = validate_task_fields('Task', start, end, progress, 'To Do')
+        db.session.add(Task(**values, project_id=project_id, user_id=db.session.scalar(db.select(User.id))))
+        db.session.commit()
+
+
+def test_to_before_every_task_gives_a_one_day_axis(app, client, project_id):
+    _add_task(app, project_id, '2025-07-01', '2025-07-10')
+    _add_task(app, project_id, '2025-08-01', '2025-08-05')
+
+    response = client.get('/api/analytics?to=2025-06-01')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data['from'], data['to'], data['days']) == ('2025-06-01', '2025-06-01', 1)
+    assert data['load']['active'] == [0]
+    assert data['work']['planned'] == [0.0]
@@ -0,0 +1,23 @@
+from app.extensions import db
+from app.models import Task
+
+
+def _batch(client, project_id, operations):
+    return client.post(f'/api/projects/{project_id}/tasks/batch', json={'operations': operations})
+
+
+def test_updates_to_the_same_task_build_on_each_other(app, client, project_id):
+    response = _batch(client, project_id, [{'op': 'create', 'fields': {
+        'name': 'Design', 'start_date': '2025-01-01', 'end_date': '2025-01-05', 'progress': 10, 'status': 'To Do'}}])
+    task_id = response.get_json()['results'][0]['id']
+
+    response = _batch(client, project_id, [
+        {'op': 'update', 'id': task_id, 'fields': {'progress': 50}},
+        {'op': 'update', 'id': task_id, 'fields': {'status': 'Completed'}},
+    ])
+
+    assert response.status_code == 200
+    assert [result['success'] for result in response.get_json()['results']] == [True, True]
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        assert (task.progress, task.status) == (50, 'Completed')
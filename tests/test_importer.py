@@ -0,0 +1,28 @@
+import io
+import json
+from app.extensions import db
+from app.importer import import_tasks
+from app.models import Project, Task
+
+
+def _ndjson(*rows):
+    return io.BytesIO(''.join(json.dumps(row) + '\n' for row in rows).encode())
+
+
+def test_ndjson_fields_of_the_wrong_type_are_row_errors(app, project_id):
+    valid = {'name': 'Build', 'start_date': '2025-01-01', 'end_date': '2025-01-03', 'status': 'To Do'}
+    with app.app_context():
+        project = db.session.get(Project, project_id)
+        report = import_tasks(project, _ndjson(
+            valid,
+            dict(valid, name=5),
+            dict(valid, start_date=20260101),
+            dict(valid, comment={'text': 'nested'}),
+            dict(valid, dependencies=[1, 2]),
+        ), 'ndjson')
+
+        assert report['imported'] == 1
+        assert report['failed'] == 4
+        assert [error['line'] for error in report['errors']] == [2, 3, 4, 5]
+        assert report['errors'][0]['errors'] == ['name has the wrong type.']
+        assert Task.query.filter_by(project_id=project_id).count() == 1